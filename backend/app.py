@@ -12,6 +12,11 @@ from routes.peta    import peta_bp
 from routes.ai      import ai_bp
 from routes.auth    import auth_bp
 from routes.admin   import admin_bp
+from utils.antrean import antrean_laporan
+from utils.indeks_spasial import indeks_spasial
+from utils.json_provider import pilih_json_provider
+from utils.kompresi import pasang_kompresi
+from utils.siaran import siaran_aktivitas
 
 # ── Content Security Policy ─────────────────────────────────────────────────
 CSP = {
@@ -34,6 +39,7 @@ CSP = {
 
 def buat_app() -> Flask:
     app = Flask(__name__)
+    app.json = pilih_json_provider(config.JSON_PROVIDER)(app)
 
     # ── Konfigurasi ─────────────────────────────────────────────────────────
     app.config["SECRET_KEY"]                     = config.SECRET_KEY
@@ -78,6 +84,12 @@ def buat_app() -> Flask:
         referrer_policy="strict-origin-when-cross-origin",
     )
 
+    # ── Kompresi respons (gzip/br/zstd) ─────────────────────────────────────
+    # Didaftarkan sebelum hook header lain → dijalankan setelahnya
+    app.config["KOMPRESI_MIN_BYTE"] = config.KOMPRESI_MIN_BYTE
+    if config.KOMPRESI_AKTIF:
+        pasang_kompresi(app)
+
     # ── Blueprints ──────────────────────────────────────────────────────────
     app.register_blueprint(laporan_bp)
     app.register_blueprint(peta_bp)
@@ -92,7 +104,8 @@ def buat_app() -> Flask:
         response.headers["X-Frame-Options"]         = "DENY"
         response.headers["Referrer-Policy"]         = "strict-origin-when-cross-origin"
         response.headers["Permissions-Policy"]      = "geolocation=(), microphone=(), camera=()"
-        response.headers["Cache-Control"]           = "no-store, no-cache, must-revalidate"
+        # Default no-store; route publik mengatur sendiri (utils.http_cache)
+        response.headers.setdefault("Cache-Control", "no-store, no-cache, must-revalidate")
         # Hapus header yang bocorkan info server
         response.headers.pop("Server", None)
         response.headers.pop("X-Powered-By", None)
@@ -144,6 +157,18 @@ def buat_app() -> Flask:
     with app.app_context():
         db.create_all()
 
+        # ── Indeks spasial laporan terbaru (opsional) ──────────────────────
+        if indeks_spasial.aktif:
+            indeks_spasial.muat()
+
+    # ── Antrean write-behind laporan (opsional) ─────────────────────────────
+    if antrean_laporan.aktif:
+        antrean_laporan.init_app(app)
+
+    # ── Siaran aktivitas langsung (SSE, LISTEN/NOTIFY) ──────────────────────
+    if siaran_aktivitas.aktif:
+        siaran_aktivitas.init_app(app)
+
     return app
 
 
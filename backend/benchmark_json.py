@@ -0,0 +1,108 @@
+"""
+Bandingkan JSON provider (utils.json_provider) pada payload khas FluWatch.
+Penggunaan: python benchmark_json.py [--jumlah N] [--ulang R]
+
+Tidak butuh database: payload dibuat sintetis dengan tipe yang sama seperti
+hasil query (UUID, Decimal, datetime ber-zona waktu).
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+from flask import Flask
+
+from models import JUMLAH_MASK, SKOR_PER_MASK, LaporanInfluenza, RekapLaporanJam
+from routes.peta import _marker, _titik
+from utils.json_provider import JSONProviderOrjson, JSONProviderStdlib, orjson
+
+
+def buat_payload(jumlah: int) -> dict:
+    """
+    Baris berbentuk hasil query kolom_ringkas()/peta (UUID, Decimal, datetime),
+    dibentuk dengan fungsi yang sama seperti route sehingga isi payload = produksi.
+    """
+    acak = random.Random(42)
+    sekarang = datetime.now(timezone.utc)
+    wilayah = ["Kota Bandung", "Kota Cimahi", "Kab. Bandung", "Kab. Sumedang", None]
+    batas_baru = sekarang - timedelta(hours=2)
+
+    baris = []
+    for i in range(jumlah):
+        mask = acak.randrange(1, JUMLAH_MASK)
+        baris.append(SimpleNamespace(
+            id=uuid.UUID(int=acak.getrandbits(128)),
+            lat=Decimal(f"{-6.9 + acak.uniform(-0.2, 0.2):.7f}"),
+            lng=Decimal(f"{107.6 + acak.uniform(-0.2, 0.2):.7f}"),
+            nama_wilayah=acak.choice(wilayah),
+            gejala_mask=mask,
+            tingkat_keparahan=acak.randint(1, 10),
+            durasi_hari=acak.choice([None, *range(1, 15)]),
+            sudah_vaksin=acak.choice([True, False, None]),
+            kelompok_usia=acak.choice(RekapLaporanJam.KELOMPOK_USIA),
+            skor_influenza=SKOR_PER_MASK[mask],
+            timestamp=sekarang - timedelta(minutes=i),
+            user_id=uuid.UUID(int=acak.getrandbits(128)) if acak.random() < 0.8 else None,
+        ))
+
+    kolom = [k.key for k in LaporanInfluenza.kolom_ringkas()]
+    laporan = [
+        LaporanInfluenza.laporan_dari_baris(tuple(getattr(r, k) for k in kolom))
+        for r in baris
+    ]
+    return {
+        "laporan": {"data": laporan, "total": jumlah, "halaman": 1},
+        "peta":    {
+            "titik":   [_titik(r) for r in baris],
+            "markers": [_marker(r, batas_baru) for r in baris],
+            "jumlah":  jumlah,
+        },
+    }
+
+
+def ukur(fn, ulang: int) -> float:
+    """Waktu terbaik (ms) dari `ulang` kali percobaan."""
+    terbaik = float("inf")
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        fn()
+        terbaik = min(terbaik, time.perf_counter() - mulai)
+    return terbaik * 1000
+
+
+def jalankan():
+    parser = argparse.ArgumentParser(description="Benchmark JSON provider")
+    parser.add_argument("--jumlah", type=int, default=1000, help="jumlah item per payload")
+    parser.add_argument("--ulang", type=int, default=20, help="jumlah pengulangan")
+    args = parser.parse_args()
+
+    provider = {"stdlib": JSONProviderStdlib}
+    if orjson is not None:
+        provider["orjson"] = JSONProviderOrjson
+    else:
+        print("⚠️  orjson tidak terpasang — hanya stdlib yang diukur.")
+
+    payload = buat_payload(args.jumlah)
+    hasil = {}
+    for nama, kelas in provider.items():
+        app = Flask(__name__)
+        app.json = kelas(app)
+        with app.app_context():
+            for jenis, obj in payload.items():
+                ms = ukur(lambda: app.json.response(obj), args.ulang)
+                ukuran = len(app.json.response(obj).get_data())
+                hasil[nama, jenis] = (ms, ukuran)
+
+    print(f"\n{'payload':<10} {'provider':<8} {'ms':>9} {'KB':>9} {'speedup':>8}")
+    for jenis in payload:
+        dasar = hasil["stdlib", jenis][0]
+        for nama in provider:
+            ms, ukuran = hasil[nama, jenis]
+            print(f"{jenis:<10} {nama:<8} {ms:>9.2f} {ukuran / 1024:>9.1f} {dasar / ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    jalankan()
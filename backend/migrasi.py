@@ -5,7 +5,13 @@ Jalankan SEKALI saja: python migrasi.py
 Aman dijalankan berulang (menggunakan IF NOT EXISTS).
 """
 from app import buat_app
-from models import db
+from models import GEJALA_FIELDS, JUMLAH_MASK, db, encode_gejala
+
+# gejala_mask dari kolom Boolean (= models.encode_gejala). Penjumlahan, bukan
+# | dan <<: di Postgres keduanya setingkat dan dievaluasi dari kiri ke kanan.
+SQL_GEJALA_MASK = "(" + " + ".join(
+    f"CAST({g} AS INT) * {1 << i}" for i, g in enumerate(GEJALA_FIELDS)
+) + ")"
 
 MIGRASI = [
     # Tambah kolom ip_hash (hash SHA-256 16 karakter dari IP pengguna)
@@ -67,13 +73,224 @@ MIGRASI = [
     ALTER TABLE pengguna
     ADD COLUMN IF NOT EXISTS reset_token_expires TIMESTAMPTZ DEFAULT NULL;
     """,
+
+    # Tabel rekap laporan per jam (isi dengan: python rekap_db.py)
+    """
+    CREATE TABLE IF NOT EXISTS rekap_laporan_jam (
+        jam                      TIMESTAMPTZ PRIMARY KEY,
+        jumlah                   INTEGER NOT NULL DEFAULT 0,
+        ringan                   INTEGER NOT NULL DEFAULT 0,
+        aktif                    INTEGER NOT NULL DEFAULT 0,
+        berat                    INTEGER NOT NULL DEFAULT 0,
+        total_skor               INTEGER NOT NULL DEFAULT 0,
+        total_keparahan          INTEGER NOT NULL DEFAULT 0,
+        gejala_demam             INTEGER NOT NULL DEFAULT 0,
+        gejala_batuk             INTEGER NOT NULL DEFAULT 0,
+        gejala_sakit_tenggorokan INTEGER NOT NULL DEFAULT 0,
+        gejala_pilek             INTEGER NOT NULL DEFAULT 0,
+        gejala_nyeri_otot        INTEGER NOT NULL DEFAULT 0,
+        gejala_sakit_kepala      INTEGER NOT NULL DEFAULT 0,
+        gejala_kelelahan         INTEGER NOT NULL DEFAULT 0,
+        gejala_menggigil         INTEGER NOT NULL DEFAULT 0,
+        gejala_mual_muntah       INTEGER NOT NULL DEFAULT 0,
+        gejala_sesak_napas       INTEGER NOT NULL DEFAULT 0,
+        usia_anak                INTEGER NOT NULL DEFAULT 0,
+        usia_remaja              INTEGER NOT NULL DEFAULT 0,
+        usia_dewasa              INTEGER NOT NULL DEFAULT 0,
+        usia_lansia              INTEGER NOT NULL DEFAULT 0
+    );
+    """,
+
+    # View statistik_harian dibaca dari rekap, bukan scan laporan_influenza
+    """
+    CREATE OR REPLACE VIEW statistik_harian AS
+    SELECT
+        DATE_TRUNC('day', jam)                                      AS tanggal,
+        SUM(jumlah)                                                 AS total_kasus,
+        ROUND(CAST(SUM(total_keparahan) AS NUMERIC) / NULLIF(SUM(jumlah), 0), 1) AS rata_keparahan,
+        SUM(gejala_demam)                                           AS kasus_demam,
+        SUM(gejala_batuk)                                           AS kasus_batuk,
+        SUM(gejala_nyeri_otot)                                      AS kasus_nyeri_otot,
+        SUM(berat)                                                  AS kasus_berat
+    FROM rekap_laporan_jam
+    GROUP BY DATE_TRUNC('day', jam)
+    ORDER BY tanggal DESC;
+    """,
+
+    # Bitmask 10 gejala (bit i = GEJALA_FIELDS[i] di models.py)
+    """
+    ALTER TABLE laporan_influenza
+    ADD COLUMN IF NOT EXISTS gejala_mask SMALLINT NOT NULL DEFAULT 0;
+    """,
+
+    # Backfill gejala_mask dari kolom Boolean; juga memperbaiki baris hasil
+    # backfill lama yang memakai | dan << tanpa kurung (salah urutan operator)
+    f"""
+    UPDATE laporan_influenza
+    SET gejala_mask = {SQL_GEJALA_MASK}
+    WHERE gejala_mask <> {SQL_GEJALA_MASK};
+    """,
+
+    # Sel grid 0.1° untuk query radius (rumus = utils.haversine.sel_grid)
+    """
+    ALTER TABLE laporan_influenza
+    ADD COLUMN IF NOT EXISTS sel_grid INTEGER;
+    """,
+
+    """
+    UPDATE laporan_influenza
+    SET sel_grid = CAST(LEAST(GREATEST(FLOOR((CAST(lat AS DOUBLE PRECISION) + 90) * 10), 0), 1799) * 3600
+                    + MOD(CAST(FLOOR((CAST(lng AS DOUBLE PRECISION) + 180) * 10) AS INTEGER), 3600)) AS INTEGER)
+    WHERE sel_grid IS NULL;
+    """,
+
+    """
+    ALTER TABLE laporan_influenza
+    ALTER COLUMN sel_grid SET NOT NULL;
+    """,
+
+    """
+    CREATE INDEX IF NOT EXISTS idx_laporan_sel_waktu
+    ON laporan_influenza (sel_grid, timestamp);
+    """,
+
+    # High-water mark poll indeks spasial in-memory (utils.indeks_spasial)
+    """
+    CREATE INDEX IF NOT EXISTS idx_laporan_created_at
+    ON laporan_influenza (created_at);
+    """,
+
+    # Versi data untuk ETag/Last-Modified endpoint publik (utils.http_cache)
+    """
+    CREATE TABLE IF NOT EXISTS versi_data (
+        id                SMALLINT PRIMARY KEY DEFAULT 1,
+        jumlah_perubahan  BIGINT NOT NULL DEFAULT 0,
+        diubah_pada       TIMESTAMPTZ
+    );
+    """,
+
+    """
+    INSERT INTO versi_data (id, jumlah_perubahan) VALUES (1, 0)
+    ON CONFLICT (id) DO NOTHING;
+    """,
+
+    # Paginasi kursor (utils.paginasi) — urutan (timestamp, id) / (created_at, id)
+    """
+    CREATE INDEX IF NOT EXISTS idx_laporan_timestamp_id
+    ON laporan_influenza (timestamp, id);
+    """,
+
+    """
+    CREATE INDEX IF NOT EXISTS idx_pengguna_created_id
+    ON pengguna (created_at, id);
+    """,
+
+    # Laporan terakhir per pengguna (aturan 4 hari, utils.status_kirim)
+    """
+    CREATE INDEX IF NOT EXISTS idx_laporan_user_timestamp
+    ON laporan_influenza (user_id, timestamp);
+    """,
+
+    # Pencarian ILIKE '%teks%' di admin (utils.pencarian) — index trigram
+    """
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    """,
+
+    """
+    CREATE INDEX IF NOT EXISTS idx_pengguna_username_trgm
+    ON pengguna USING gin (username gin_trgm_ops);
+    """,
+
+    """
+    CREATE INDEX IF NOT EXISTS idx_pengguna_email_trgm
+    ON pengguna USING gin (email gin_trgm_ops);
+    """,
+
+    """
+    CREATE INDEX IF NOT EXISTS idx_laporan_wilayah_trgm
+    ON laporan_influenza USING gin (nama_wilayah gin_trgm_ops);
+    """,
+
+    # Siaran aktivitas langsung (utils.siaran): NOTIFY 'aktivitas' per INSERT.
+    # id dari sequence bersama → Last-Event-ID berlaku di semua worker
+    """
+    CREATE SEQUENCE IF NOT EXISTS aktivitas_seq;
+    """,
+
+    """
+    CREATE OR REPLACE FUNCTION notify_laporan_baru() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM pg_notify('aktivitas', json_build_object(
+            'id',   nextval('aktivitas_seq'),
+            'tipe', 'laporan',
+            'data', json_build_object(
+                'lat',               NEW.lat,
+                'lng',               NEW.lng,
+                'nama_wilayah',      NEW.nama_wilayah,
+                'skor_influenza',    NEW.skor_influenza,
+                'tingkat_keparahan', NEW.tingkat_keparahan,
+                'gejala_mask',       NEW.gejala_mask,
+                'kelompok_usia',     NEW.kelompok_usia,
+                'timestamp',         NEW.timestamp
+            )
+        )::text);
+        RETURN NULL;
+    END;
+    $$;
+    """,
+
+    """
+    CREATE OR REPLACE FUNCTION notify_pengguna_baru() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM pg_notify('aktivitas', json_build_object(
+            'id',   nextval('aktivitas_seq'),
+            'tipe', 'pengguna',
+            'data', json_build_object(
+                'username',   NEW.username,
+                'created_at', NEW.created_at
+            )
+        )::text);
+        RETURN NULL;
+    END;
+    $$;
+    """,
+
+    """
+    DROP TRIGGER IF EXISTS trg_laporan_notify ON laporan_influenza;
+    CREATE TRIGGER trg_laporan_notify AFTER INSERT ON laporan_influenza
+        FOR EACH ROW EXECUTE FUNCTION notify_laporan_baru();
+    """,
+
+    """
+    DROP TRIGGER IF EXISTS trg_pengguna_notify ON pengguna;
+    CREATE TRIGGER trg_pengguna_notify AFTER INSERT ON pengguna
+        FOR EACH ROW EXECUTE FUNCTION notify_pengguna_baru();
+    """,
 ]
 
 
+def cek_gejala_mask(conn) -> None:
+    """Pastikan SQL_GEJALA_MASK di Postgres = encode_gejala untuk semua kombinasi."""
+    kolom = ", ".join(f"(m & {1 << i}) <> 0 AS {g}" for i, g in enumerate(GEJALA_FIELDS))
+    rows = conn.execute(db.text(
+        f"SELECT m, {SQL_GEJALA_MASK} FROM "
+        f"(SELECT m, {kolom} FROM generate_series(0, {JUMLAH_MASK - 1}) AS m) AS g"
+    )).all()
+    salah = [
+        (m, hasil) for m, hasil in rows
+        if hasil != encode_gejala({g: m >> i & 1 for i, g in enumerate(GEJALA_FIELDS)})
+    ]
+    if len(rows) != JUMLAH_MASK or salah:
+        raise RuntimeError(f"Rumus gejala_mask SQL tidak cocok dengan encode_gejala: {salah[:5]}")
+
+
 def jalankan():
     app = buat_app()
     with app.app_context():
         with db.engine.connect() as conn:
+            cek_gejala_mask(conn)
             for i, sql in enumerate(MIGRASI, start=1):
                 sql_bersih = " ".join(sql.split())
                 print(f"[{i}/{len(MIGRASI)}] {sql_bersih[:60]}...")
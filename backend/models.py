@@ -3,35 +3,82 @@ from datetime import datetime, timezone
 
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import (
-    Boolean, Column, DateTime, ForeignKey, Integer,
-    Numeric, SmallInteger, String, Text, CheckConstraint, Index,
+    BigInteger, Boolean, Column, DateTime, ForeignKey, Integer,
+    Numeric, SmallInteger, String, Text, CheckConstraint, Index, func,
 )
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from utils.haversine import kotak_batas, sel_grid, sel_penutup
+
 db = SQLAlchemy()
 
 
+# ── Gejala: urutan bit gejala_mask (bit i = GEJALA_FIELDS[i]) ────────────────
+GEJALA_FIELDS = [
+    "demam", "batuk", "sakit_tenggorokan", "pilek",
+    "nyeri_otot", "sakit_kepala", "kelelahan",
+    "menggigil", "mual_muntah", "sesak_napas",
+]
+JUMLAH_MASK = 1 << len(GEJALA_FIELDS)   # 1024 kombinasi gejala
+
+# Bobot didasarkan pada kriteria klinis influenza WHO.
+BOBOT_GEJALA = {
+    "demam":             25,  # Gejala utama influenza
+    "menggigil":         15,
+    "nyeri_otot":        15,
+    "kelelahan":         10,
+    "batuk":             10,
+    "sakit_kepala":       8,
+    "sakit_tenggorokan":  7,
+    "pilek":              5,
+    "mual_muntah":        3,
+    "sesak_napas":        2,
+}
+
+# Tabel lookup per mask — dihitung sekali saat import
+GEJALA_PER_MASK = tuple(
+    tuple(g for i, g in enumerate(GEJALA_FIELDS) if mask >> i & 1)
+    for mask in range(JUMLAH_MASK)
+)
+SKOR_PER_MASK = tuple(
+    min(sum(BOBOT_GEJALA[g] for g in gejala), 100)
+    for gejala in GEJALA_PER_MASK
+)
+
+
+def encode_gejala(data: dict) -> int:
+    """Ubah dict {nama_gejala: bool} menjadi bitmask gejala_mask."""
+    mask = 0
+    for i, g in enumerate(GEJALA_FIELDS):
+        if data.get(g):
+            mask |= 1 << i
+    return mask
+
+
+def mask_gejala(*nama: str) -> int:
+    """Bitmask untuk sekumpulan nama gejala, mis. mask_gejala("demam", "menggigil")."""
+    return encode_gejala(dict.fromkeys(nama, True))
+
+
 def _hitung_skor(data: dict) -> int:
     """
     Hitung skor risiko influenza (0–100) berdasarkan gejala.
-    Bobot didasarkan pada kriteria klinis influenza WHO.
+    Bobot didasarkan pada kriteria klinis influenza WHO (BOBOT_GEJALA).
     """
-    bobot = {
-        "demam":             25,  # Gejala utama influenza
-        "menggigil":         15,
-        "nyeri_otot":        15,
-        "kelelahan":         10,
-        "batuk":             10,
-        "sakit_kepala":       8,
-        "sakit_tenggorokan":  7,
-        "pilek":              5,
-        "mual_muntah":        3,
-        "sesak_napas":        2,
-    }
-    total = sum(bobot[g] for g in bobot if data.get(g))
-    return min(total, 100)
+    return SKOR_PER_MASK[encode_gejala(data)]
+
+
+def _mask_dari_konteks(context) -> int:
+    """Default kolom gejala_mask — diturunkan dari kolom Boolean saat INSERT."""
+    return encode_gejala(context.get_current_parameters())
+
+
+def _sel_dari_konteks(context) -> int:
+    """Default kolom sel_grid — diturunkan dari lat/lng saat INSERT."""
+    params = context.get_current_parameters()
+    return sel_grid(params["lat"], params["lng"])
 
 
 class Pengguna(db.Model):
@@ -56,6 +103,7 @@ class Pengguna(db.Model):
         Index("idx_pengguna_email",    "email"),
         Index("idx_pengguna_username", "username"),
         Index("idx_pengguna_google",   "google_id"),
+        Index("idx_pengguna_created_id", "created_at", "id"),
     )
 
     def set_password(self, password: str) -> None:
@@ -86,18 +134,24 @@ class LaporanInfluenza(db.Model):
     lat           = Column(Numeric(10, 8), nullable=False)
     lng           = Column(Numeric(11, 8), nullable=False)
     nama_wilayah  = Column(String(255), nullable=True)
+    # Sel grid 0.1° (utils.haversine.sel_grid) — indeks (sel_grid, timestamp) untuk query radius
+    sel_grid      = Column(Integer, nullable=False, default=_sel_dari_konteks)
 
-    # Gejala (Boolean per gejala untuk query statistik yang mudah)
-    demam               = Column(Boolean, nullable=False, default=False)
-    batuk               = Column(Boolean, nullable=False, default=False)
-    sakit_tenggorokan   = Column(Boolean, nullable=False, default=False)
-    pilek               = Column(Boolean, nullable=False, default=False)
-    nyeri_otot          = Column(Boolean, nullable=False, default=False)
-    sakit_kepala        = Column(Boolean, nullable=False, default=False)
-    kelelahan           = Column(Boolean, nullable=False, default=False)
-    menggigil           = Column(Boolean, nullable=False, default=False)
-    mual_muntah         = Column(Boolean, nullable=False, default=False)
-    sesak_napas         = Column(Boolean, nullable=False, default=False)
+    # Gejala (Boolean per gejala untuk query statistik yang mudah).
+    # Deferred: jalur baca memakai gejala_mask, kolom ini hanya dimuat jika diakses.
+    demam               = deferred(Column(Boolean, nullable=False, default=False), group="gejala")
+    batuk               = deferred(Column(Boolean, nullable=False, default=False), group="gejala")
+    sakit_tenggorokan   = deferred(Column(Boolean, nullable=False, default=False), group="gejala")
+    pilek               = deferred(Column(Boolean, nullable=False, default=False), group="gejala")
+    nyeri_otot          = deferred(Column(Boolean, nullable=False, default=False), group="gejala")
+    sakit_kepala        = deferred(Column(Boolean, nullable=False, default=False), group="gejala")
+    kelelahan           = deferred(Column(Boolean, nullable=False, default=False), group="gejala")
+    menggigil           = deferred(Column(Boolean, nullable=False, default=False), group="gejala")
+    mual_muntah         = deferred(Column(Boolean, nullable=False, default=False), group="gejala")
+    sesak_napas         = deferred(Column(Boolean, nullable=False, default=False), group="gejala")
+
+    # Bitmask 10 gejala (bit i = GEJALA_FIELDS[i]) — diisi otomatis saat INSERT
+    gejala_mask         = Column(SmallInteger, nullable=False, default=_mask_dari_konteks)
 
     # Detail
     durasi_hari         = Column(SmallInteger, nullable=True)
@@ -125,19 +179,126 @@ class LaporanInfluenza(db.Model):
         CheckConstraint("kelompok_usia IN ('anak','remaja','dewasa','lansia')", name="ck_usia"),
         Index("idx_laporan_timestamp", "timestamp"),
         Index("idx_laporan_lokasi", "lat", "lng"),
+        Index("idx_laporan_sel_waktu", "sel_grid", "timestamp"),
         Index("idx_laporan_user_id", "user_id"),
+        Index("idx_laporan_created_at", "created_at"),
+        Index("idx_laporan_timestamp_id", "timestamp", "id"),
+        Index("idx_laporan_user_timestamp", "user_id", "timestamp"),
     )
 
     # ── Daftar gejala untuk iterasi ─────────────────────────
-    GEJALA_FIELDS = [
-        "demam", "batuk", "sakit_tenggorokan", "pilek",
-        "nyeri_otot", "sakit_kepala", "kelelahan",
-        "menggigil", "mual_muntah", "sesak_napas",
-    ]
+    GEJALA_FIELDS = GEJALA_FIELDS
+
+    def mask(self) -> int:
+        """gejala_mask; dihitung dari kolom Boolean jika objek belum di-flush."""
+        if self.gejala_mask is not None:
+            return self.gejala_mask
+        return encode_gejala({g: getattr(self, g) for g in self.GEJALA_FIELDS})
 
     def gejala_aktif(self) -> list[str]:
         """Kembalikan list nama gejala yang bernilai True."""
-        return [g for g in self.GEJALA_FIELDS if getattr(self, g)]
+        return list(GEJALA_PER_MASK[self.mask()])
+
+    @classmethod
+    def kriteria_area(cls, lat: float, lng: float, radius_km: float) -> tuple:
+        """
+        Pre-filter SQL untuk query radius: sel grid yang menutupi lingkaran
+        (memakai idx_laporan_sel_waktu) ditambah bounding box. Hasilnya masih
+        perlu disaring dengan Haversine exact. Radius sangat besar: bounding box saja.
+        """
+        kotak = kotak_batas(lat, lng, radius_km)
+        sel = sel_penutup(lat, lng, radius_km)
+        return (
+            *(() if sel is None else (cls.sel_grid.in_(sel),)),
+            cls.lat >= kotak["min_lat"],
+            cls.lat <= kotak["max_lat"],
+            cls.lng >= kotak["min_lng"],
+            cls.lng <= kotak["max_lng"],
+        )
+
+    @classmethod
+    def filter_gejala(cls, *nama: str, semua: bool = True):
+        """
+        Kriteria SQL berbasis gejala_mask.
+        semua=True  → laporan yang memiliki SEMUA gejala (mis. demam DAN menggigil)
+        semua=False → laporan yang memiliki SALAH SATU gejala
+        """
+        m = mask_gejala(*nama)
+        if semua:
+            return cls.gejala_mask.op("&")(m) == m
+        return cls.gejala_mask.op("&")(m) != 0
+
+    @classmethod
+    def distribusi_mask(cls, *kriteria) -> dict[int, int]:
+        """Jumlah laporan per kombinasi gejala (GROUP BY gejala_mask, maks 1024 baris)."""
+        baris = (
+            db.session.query(cls.gejala_mask, func.count())
+            .filter(*kriteria)
+            .group_by(cls.gejala_mask)
+            .all()
+        )
+        return {mask: jumlah for mask, jumlah in baris}
+
+    @classmethod
+    def ko_okurensi_gejala(cls, *kriteria) -> dict[tuple[str, str], int]:
+        """
+        Matriks ko-okurensi pasangan gejala {(g1, g2): jumlah laporan}.
+        Diagonal (g, g) = jumlah laporan dengan gejala g.
+        """
+        matriks: dict[tuple[str, str], int] = {}
+        for mask, jumlah in cls.distribusi_mask(*kriteria).items():
+            gejala = GEJALA_PER_MASK[mask]
+            for i, g1 in enumerate(gejala):
+                for g2 in gejala[i:]:
+                    matriks[(g1, g2)] = matriks.get((g1, g2), 0) + jumlah
+        return matriks
+
+    # ── Agregasi gejala di sisi server ──────────────────────
+    @classmethod
+    def kolom_frekuensi_gejala(cls, *kondisi) -> list:
+        """
+        Kolom agregat COUNT(*) FILTER (WHERE <gejala> AND kondisi...) per gejala,
+        berlabel "gejala_<nama>". Bisa digabung ke query agregat lain agar
+        tetap satu round-trip.
+        """
+        return [
+            func.count().filter(getattr(cls, g), *kondisi).label(f"gejala_{g}")
+            for g in cls.GEJALA_FIELDS
+        ]
+
+    @classmethod
+    def baca_frekuensi_gejala(cls, baris) -> dict[str, int]:
+        """Ambil hasil kolom_frekuensi_gejala() dari satu baris hasil query."""
+        return {g: getattr(baris, f"gejala_{g}") or 0 for g in cls.GEJALA_FIELDS}
+
+    @classmethod
+    def frekuensi_gejala(cls, *kriteria, mulai=None, sampai=None) -> dict[str, int]:
+        """
+        Jumlah laporan per gejala, dihitung di Postgres (tanpa memuat objek ORM).
+        mulai/sampai membatasi jendela timestamp [mulai, sampai);
+        kriteria = filter SQLAlchemy tambahan (mis. bounding box).
+        """
+        if mulai is not None:
+            kriteria += (cls.timestamp >= mulai,)
+        if sampai is not None:
+            kriteria += (cls.timestamp < sampai,)
+        baris = db.session.query(*cls.kolom_frekuensi_gejala()).filter(*kriteria).one()
+        return cls.baca_frekuensi_gejala(baris)
+
+    @staticmethod
+    def frekuensi_dari_mask(masks) -> dict[str, int]:
+        """Jumlah laporan per gejala dari kumpulan gejala_mask (tanpa query)."""
+        freq = dict.fromkeys(GEJALA_FIELDS, 0)
+        for mask in masks:
+            for g in GEJALA_PER_MASK[mask]:
+                freq[g] += 1
+        return freq
+
+    @staticmethod
+    def gejala_teratas(frekuensi: dict[str, int], n: int = 5) -> list[tuple[str, int]]:
+        """Urutkan gejala dari yang paling sering; gejala dengan 0 laporan dibuang."""
+        ada = [(g, c) for g, c in frekuensi.items() if c]
+        return sorted(ada, key=lambda x: x[1], reverse=True)[:n]
 
     def to_dict(self, jarak_km: float | None = None) -> dict:
         data = {
@@ -158,6 +319,56 @@ class LaporanInfluenza(db.Model):
             data["jarak_km"] = round(jarak_km, 2)
         return data
 
+    @classmethod
+    def kolom_ringkas(cls) -> tuple:
+        """
+        Kolom yang cukup untuk laporan_dari_baris() — query tanpa objek ORM.
+        Urutan ini dipakai laporan_dari_baris() untuk unpack posisional;
+        kolom tambahan hanya boleh ditambahkan di belakang.
+        """
+        return (
+            cls.id, cls.lat, cls.lng, cls.nama_wilayah, cls.gejala_mask,
+            cls.tingkat_keparahan, cls.durasi_hari, cls.sudah_vaksin,
+            cls.kelompok_usia, cls.skor_influenza, cls.timestamp, cls.user_id,
+        )
+
+    @classmethod
+    def query_ringkas(cls):
+        """Query kolom_ringkas() — hasilnya Row tuple ringan, tanpa identity map."""
+        return db.session.query(*cls.kolom_ringkas())
+
+    @staticmethod
+    def laporan_dari_baris(baris, jarak_km: float | None = None) -> dict:
+        """
+        Sama byte-per-byte dengan to_dict() setelah di-JSON-kan, tetapi dari
+        satu baris hasil kolom_ringkas() (nama gejala dari tabel GEJALA_PER_MASK).
+        """
+        (id_, lat, lng, wilayah, mask, keparahan, durasi,
+         vaksin, usia, skor, ts, user_id, *_) = baris
+        data = {
+            "id":                 str(id_),
+            "lat":                float(lat),
+            "lng":                float(lng),
+            "nama_wilayah":       wilayah,
+            "gejala":             GEJALA_PER_MASK[mask],
+            "tingkat_keparahan":  keparahan,
+            "durasi_hari":        durasi,
+            "sudah_vaksin":       vaksin,
+            "kelompok_usia":      usia,
+            "skor_influenza":     skor,
+            "timestamp":          ts.isoformat() if ts else None,
+            "user_id":            str(user_id) if user_id else None,
+        }
+        if jarak_km is not None:
+            data["jarak_km"] = round(jarak_km, 2)
+        return data
+
+    @classmethod
+    def serialisasi(cls, rows) -> list[dict]:
+        """laporan_dari_baris() untuk banyak baris sekaligus."""
+        dari_baris = cls.laporan_dari_baris
+        return [dari_baris(r) for r in rows]
+
     def to_titik_peta(self) -> dict:
         """Payload minimal untuk layer heatmap di frontend."""
         return {
@@ -165,3 +376,62 @@ class LaporanInfluenza(db.Model):
             "lng":    float(self.lng),
             "bobot":  round(self.skor_influenza / 100, 2),   # 0.0 – 1.0
         }
+
+
+class RekapLaporanJam(db.Model):
+    """
+    Rekap agregat laporan per jam (UTC), dipelihara inkremental oleh
+    utils.rekap saat laporan ditambah/dihapus. Endpoint statistik membaca
+    tabel ini alih-alih memindai laporan_influenza.
+    Bangun ulang: python rekap_db.py
+    """
+    __tablename__ = "rekap_laporan_jam"
+
+    jam              = Column(DateTime(timezone=True), primary_key=True)   # awal jam, UTC
+
+    jumlah           = Column(Integer, nullable=False, default=0)
+    ringan           = Column(Integer, nullable=False, default=0)   # keparahan < 5
+    aktif            = Column(Integer, nullable=False, default=0)   # keparahan >= 5
+    berat            = Column(Integer, nullable=False, default=0)   # keparahan >= 7
+    total_skor       = Column(Integer, nullable=False, default=0)
+    total_keparahan  = Column(Integer, nullable=False, default=0)
+
+    # Jumlah laporan per gejala — nama kolom sama dengan label kolom_frekuensi_gejala()
+    gejala_demam             = Column(Integer, nullable=False, default=0)
+    gejala_batuk             = Column(Integer, nullable=False, default=0)
+    gejala_sakit_tenggorokan = Column(Integer, nullable=False, default=0)
+    gejala_pilek             = Column(Integer, nullable=False, default=0)
+    gejala_nyeri_otot        = Column(Integer, nullable=False, default=0)
+    gejala_sakit_kepala      = Column(Integer, nullable=False, default=0)
+    gejala_kelelahan         = Column(Integer, nullable=False, default=0)
+    gejala_menggigil         = Column(Integer, nullable=False, default=0)
+    gejala_mual_muntah       = Column(Integer, nullable=False, default=0)
+    gejala_sesak_napas       = Column(Integer, nullable=False, default=0)
+
+    # Jumlah laporan per kelompok usia
+    usia_anak        = Column(Integer, nullable=False, default=0)
+    usia_remaja      = Column(Integer, nullable=False, default=0)
+    usia_dewasa      = Column(Integer, nullable=False, default=0)
+    usia_lansia      = Column(Integer, nullable=False, default=0)
+
+    KELOMPOK_USIA = ["anak", "remaja", "dewasa", "lansia"]
+
+    METRIK = (
+        ["jumlah", "ringan", "aktif", "berat", "total_skor", "total_keparahan"]
+        + [f"gejala_{g}" for g in LaporanInfluenza.GEJALA_FIELDS]
+        + [f"usia_{u}" for u in KELOMPOK_USIA]
+    )
+
+
+class VersiData(db.Model):
+    """
+    Penanda versi data laporan untuk HTTP caching (utils.http_cache) — satu
+    baris (id=1). Laporan baru sudah menaikkan MAX(created_at); perubahan
+    yang tidak terlihat dari situ (hapus laporan/pengguna) menaikkan
+    jumlah_perubahan.
+    """
+    __tablename__ = "versi_data"
+
+    id                = Column(SmallInteger, primary_key=True, default=1)
+    jumlah_perubahan  = Column(BigInteger, nullable=False, default=0)
+    diubah_pada       = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,36 @@
+"""
+Bangun ulang / backfill tabel rekap_laporan_jam dari laporan_influenza.
+Penggunaan: python rekap_db.py [--sejak-jam N]
+
+Tanpa argumen seluruh rekap dihitung ulang (jalankan sekali setelah
+migrasi.py). --sejak-jam N hanya mengganti rekap N jam terakhir.
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from app import buat_app
+from models import db
+from utils.rekap import bangun_ulang_rekap
+
+
+def jalankan():
+    parser = argparse.ArgumentParser(description="Bangun ulang rekap_laporan_jam")
+    parser.add_argument("--sejak-jam", type=int, default=None,
+                        help="hanya bangun ulang N jam terakhir")
+    args = parser.parse_args()
+
+    sejak = None
+    if args.sejak_jam is not None:
+        sejak = datetime.now(timezone.utc) - timedelta(hours=args.sejak_jam)
+
+    app = buat_app()
+    with app.app_context():
+        cakupan = f"sejak {sejak.isoformat()}" if sejak else "seluruh data"
+        print(f"Membangun ulang rekap laporan per jam ({cakupan})...")
+        jumlah = bangun_ulang_rekap(sejak)
+        db.session.commit()
+        print(f"✅ {jumlah} baris rekap ditulis.")
+
+
+if __name__ == "__main__":
+    jalankan()
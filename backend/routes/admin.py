@@ -1,29 +1,54 @@
 """
+GET    /api/admin/dashboard       — Stats + trend + aktivitas (di-cache singkat)
+GET    /api/admin/aktivitas/stream — Aktivitas langsung (Server-Sent Events)
 GET    /api/admin/pengguna        — Daftar pengguna paginated
 PATCH  /api/admin/pengguna/<id>   — Ubah role / is_active
 DELETE /api/admin/pengguna/<id>   — Hapus pengguna
 GET    /api/admin/laporan         — Daftar laporan paginated
+GET    /api/admin/laporan/ekspor  — Ekspor laporan (NDJSON/CSV/Parquet, streaming)
 DELETE /api/admin/laporan/<id>    — Hapus laporan
 """
 from functools import wraps
 from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import func, select
+
+from config import config
 
 from models import LaporanInfluenza, Pengguna, db
+from utils.cache import CacheTTL
+from utils.ekspor import ALIRAN, FORMAT_EKSPOR, parquet_tersedia
+from utils.http_cache import catat_perubahan
+from utils.identitas import identitas_saat_ini, invalidasi_identitas
+from utils.indeks_spasial import indeks_spasial
+from utils.paginasi import JENIS_TOTAL, cache_total, halaman_kursor, hitung_total
+from utils.pencarian import ESCAPE_LIKE, pola_mengandung
+from utils.rekap import awal_satuan, deret_waktu, perbarui_rekap, ringkasan_jendela
+from utils.siaran import respons_siaran
+from utils.status_kirim import invalidasi_status
+from utils.tile import invalidasi_tile
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 
+cache_dashboard = CacheTTL(config.DASHBOARD_CACHE_DETIK, maks=256)
+
+
+def admin_required(fn=None, *, locations=None):
+    """
+    Decorator: JWT valid + role == 'admin'. locations menimpa JWT_TOKEN_LOCATION,
+    mis. ["headers", "query_string"] untuk EventSource yang tidak bisa mengirim header.
+    """
+    if fn is None:
+        return lambda f: admin_required(f, locations=locations)
 
-def admin_required(fn):
-    """Decorator: JWT valid + role == 'admin'."""
     @wraps(fn)
-    @jwt_required()
+    @jwt_required(locations=locations)
     def wrapper(*args, **kwargs):
-        user_id  = get_jwt_identity()
-        pengguna = db.session.get(Pengguna, user_id)
-        if not pengguna or pengguna.role != "admin":
+        ident = identitas_saat_ini()
+        if not ident or not ident.aktif or ident.role != "admin":
             return jsonify({"pesan": "Akses ditolak. Hanya admin yang diizinkan."}), 403
         return fn(*args, **kwargs)
     return wrapper
@@ -34,23 +59,51 @@ def admin_required(fn):
 @admin_bp.get("/pengguna")
 @admin_required
 def daftar_pengguna():
-    """Daftar pengguna paginated + filter cari."""
+    """
+    Daftar pengguna paginated + filter cari.
+    Paginasi: halaman (OFFSET, default) atau kursor (keyset — kirim kursor=
+    kosong untuk halaman pertama, lalu kursor_berikut). total=otomatis|pasti|perkiraan|lewati.
+    """
     halaman = int(request.args.get("halaman", 1))
     per_hal = min(int(request.args.get("per_halaman", 20)), 100)
     cari    = request.args.get("cari", "").strip()
 
     q = Pengguna.query
     if cari:
-        pola = f"%{cari}%"
-        q = q.filter(
-            db.or_(Pengguna.username.ilike(pola), Pengguna.email.ilike(pola))
-        )
+        pola = pola_mengandung(cari)     # index GIN trigram username/email
+        q = q.filter(db.or_(
+            Pengguna.username.ilike(pola, escape=ESCAPE_LIKE),
+            Pengguna.email.ilike(pola, escape=ESCAPE_LIKE),
+        ))
+    jenis_total = request.args.get("total", "lewati" if "kursor" in request.args else "otomatis")
+    if jenis_total not in JENIS_TOTAL:
+        return jsonify({"pesan": "total harus 'otomatis', 'pasti', 'perkiraan', atau 'lewati'"}), 400
+
+    # ── Mode kursor (keyset) ──────────────────────────────
+    if "kursor" in request.args:
+        try:
+            baris, berikut = halaman_kursor(
+                q, Pengguna.created_at, Pengguna.id, request.args["kursor"], per_hal
+            )
+        except ValueError:
+            return jsonify({"pesan": "Kursor tidak valid"}), 400
+        total, total_jenis = hitung_total(q, jenis_total)
+        return jsonify({
+            "total":          total,
+            "total_jenis":    total_jenis,
+            "per_halaman":    per_hal,
+            "kursor_berikut": berikut,
+            "pengguna":       [p.to_dict() for p in baris],
+        })
+
+    # ── Mode halaman (OFFSET) ─────────────────────────────
+    total, total_jenis = hitung_total(q, jenis_total)
     q      = q.order_by(Pengguna.created_at.desc())
-    total  = q.count()
     baris  = q.offset((halaman - 1) * per_hal).limit(per_hal).all()
 
     return jsonify({
         "total":     total,
+        "total_jenis": total_jenis,
         "halaman":   halaman,
         "per_halaman": per_hal,
         "pengguna":  [p.to_dict() for p in baris],
@@ -78,6 +131,8 @@ def ubah_pengguna(id):
         pengguna.is_active = bool(data["is_active"])
 
     db.session.commit()
+    invalidasi_status(pengguna.id)
+    invalidasi_identitas(pengguna.id)
     return jsonify({"pesan": "Pengguna diperbarui", "pengguna": pengguna.to_dict()}), 200
 
 
@@ -94,7 +149,12 @@ def hapus_pengguna(id):
         return jsonify({"pesan": "Pengguna tidak ditemukan"}), 404
 
     db.session.delete(pengguna)
+    catat_perubahan()      # laporan miliknya berubah (user_id → NULL)
     db.session.commit()
+    invalidasi_status(id)
+    invalidasi_identitas(id)
+    cache_dashboard.kosongkan()
+    cache_total.kosongkan()
     return jsonify({"pesan": "Pengguna berhasil dihapus"}), 200
 
 
@@ -102,40 +162,127 @@ def hapus_pengguna(id):
 
 KELOMPOK_USIA_VALID = {"anak", "remaja", "dewasa", "lansia"}
 
+
+def kriteria_laporan(args) -> list:
+    """
+    Filter SQLAlchemy dari query param jam, user_id, wilayah, kelompok_usia
+    dan gejala — dipakai bersama oleh daftar_laporan dan ekspor_laporan.
+    ValueError jika parameter tidak valid.
+    """
+    jam           = args.get("jam")
+    user_id       = args.get("user_id")
+    wilayah       = args.get("wilayah", "").strip()
+    kelompok_usia = args.get("kelompok_usia", "").strip()
+    gejala        = [g.strip() for g in args.get("gejala", "").split(",") if g.strip()]
+
+    if any(g not in LaporanInfluenza.GEJALA_FIELDS for g in gejala):
+        raise ValueError("Nama gejala tidak dikenal")
+
+    kriteria = []
+    if jam:
+        try:
+            # Dibulatkan ke menit: tanda tangan filter stabil untuk cache total
+            cutoff = (datetime.now(timezone.utc) - timedelta(hours=int(jam))).replace(
+                second=0, microsecond=0)
+        except ValueError:
+            raise ValueError("jam harus berupa angka bulat") from None
+        kriteria.append(LaporanInfluenza.timestamp >= cutoff)
+    if user_id:
+        kriteria.append(LaporanInfluenza.user_id == user_id)
+    if wilayah:
+        kriteria.append(
+            LaporanInfluenza.nama_wilayah.ilike(pola_mengandung(wilayah), escape=ESCAPE_LIKE)
+        )
+    if kelompok_usia and kelompok_usia in KELOMPOK_USIA_VALID:
+        kriteria.append(LaporanInfluenza.kelompok_usia == kelompok_usia)
+    if gejala:
+        kriteria.append(LaporanInfluenza.filter_gejala(*gejala))
+    return kriteria
+
+
 @admin_bp.get("/laporan")
 @admin_required
 def daftar_laporan():
-    """Daftar laporan paginated dengan filter jam, user_id, wilayah, kelompok_usia."""
+    """
+    Daftar laporan paginated dengan filter jam, user_id, wilayah, kelompok_usia,
+    gejala (dipisah koma — laporan yang memiliki SEMUA gejala, mis. "demam,menggigil").
+    Paginasi: halaman (OFFSET, default) atau kursor (keyset — kirim kursor=
+    kosong untuk halaman pertama, lalu kursor_berikut). total=otomatis|pasti|perkiraan|lewati.
+    """
     halaman      = int(request.args.get("halaman", 1))
     per_hal      = min(int(request.args.get("per_halaman", 20)), 100)
-    jam          = request.args.get("jam")
-    user_id      = request.args.get("user_id")
-    wilayah      = request.args.get("wilayah", "").strip()
-    kelompok_usia = request.args.get("kelompok_usia", "").strip()
 
-    q = LaporanInfluenza.query
-    if jam:
-        cutoff = datetime.now(timezone.utc) - timedelta(hours=int(jam))
-        q = q.filter(LaporanInfluenza.timestamp >= cutoff)
-    if user_id:
-        q = q.filter(LaporanInfluenza.user_id == user_id)
-    if wilayah:
-        q = q.filter(LaporanInfluenza.nama_wilayah.ilike(f"%{wilayah}%"))
-    if kelompok_usia and kelompok_usia in KELOMPOK_USIA_VALID:
-        q = q.filter(LaporanInfluenza.kelompok_usia == kelompok_usia)
+    try:
+        kriteria = kriteria_laporan(request.args)
+    except ValueError as e:
+        return jsonify({"pesan": str(e)}), 400
+    q = LaporanInfluenza.query_ringkas().filter(*kriteria)
+
+    jenis_total = request.args.get("total", "lewati" if "kursor" in request.args else "otomatis")
+    if jenis_total not in JENIS_TOTAL:
+        return jsonify({"pesan": "total harus 'otomatis', 'pasti', 'perkiraan', atau 'lewati'"}), 400
+
+    # ── Mode kursor (keyset) ──────────────────────────────
+    if "kursor" in request.args:
+        try:
+            baris, berikut = halaman_kursor(
+                q, LaporanInfluenza.timestamp, LaporanInfluenza.id, request.args["kursor"], per_hal
+            )
+        except ValueError:
+            return jsonify({"pesan": "Kursor tidak valid"}), 400
+        total, total_jenis = hitung_total(q, jenis_total)
+        return jsonify({
+            "total":          total,
+            "total_jenis":    total_jenis,
+            "per_halaman":    per_hal,
+            "kursor_berikut": berikut,
+            "laporan":        LaporanInfluenza.serialisasi(baris),
+        })
 
+    # ── Mode halaman (OFFSET) ─────────────────────────────
+    total, total_jenis = hitung_total(q, jenis_total)
     q     = q.order_by(LaporanInfluenza.timestamp.desc())
-    total = q.count()
     baris = q.offset((halaman - 1) * per_hal).limit(per_hal).all()
 
     return jsonify({
         "total":     total,
+        "total_jenis": total_jenis,
         "halaman":   halaman,
         "per_halaman": per_hal,
-        "laporan":   [r.to_dict() for r in baris],
+        "laporan":   LaporanInfluenza.serialisasi(baris),
     })
 
 
+@admin_bp.get("/laporan/ekspor")
+@admin_required
+def ekspor_laporan():
+    """
+    Ekspor seluruh laporan yang cocok dengan filter daftar_laporan sebagai
+    aliran. Query param format: ndjson (default), csv, parquet.
+    """
+    fmt = request.args.get("format", "ndjson").lower()
+    if fmt not in FORMAT_EKSPOR:
+        return jsonify({"pesan": "format harus 'ndjson', 'csv', atau 'parquet'"}), 400
+    if fmt == "parquet" and not parquet_tersedia():
+        return jsonify({"pesan": "Format parquet membutuhkan paket pyarrow di server"}), 501
+
+    try:
+        kriteria = kriteria_laporan(request.args)
+    except ValueError as e:
+        return jsonify({"pesan": str(e)}), 400
+
+    mimetype, ekstensi = FORMAT_EKSPOR[fmt]
+    nama_file = f"laporan-{datetime.now(timezone.utc):%Y%m%dT%H%M}.{ekstensi}"
+    return Response(
+        stream_with_context(ALIRAN[fmt](kriteria)),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="{nama_file}"',
+            "X-Accel-Buffering":   "no",     # nginx: teruskan tanpa buffer
+        },
+    )
+
+
 @admin_bp.delete("/laporan/<uuid:id>")
 @admin_required
 def hapus_laporan(id):
@@ -145,102 +292,210 @@ def hapus_laporan(id):
         return jsonify({"pesan": "Laporan tidak ditemukan"}), 404
 
     db.session.delete(laporan)
+    perbarui_rekap([laporan], tanda=-1)
+    catat_perubahan()
     db.session.commit()
+    invalidasi_status(laporan.user_id)
+    cache_dashboard.kosongkan()
+    cache_total.kosongkan()
+    indeks_spasial.hapus(laporan.id)
+    invalidasi_tile(float(laporan.lat), float(laporan.lng))
     return jsonify({"pesan": "Laporan berhasil dihapus"}), 200
 
 
 # ── Dashboard Stats ───────────────────────────────────────────────────────────
-
-@admin_bp.get("/stats")
-@admin_required
-def stats_overview():
+# Tiap bagian di-cache per worker selama DASHBOARD_CACHE_DETIK, sehingga
+# /dashboard dan endpoint per bagian yang diulang tidak menyentuh DB.
+# Cache dibuang saat admin menghapus pengguna/laporan (di worker ini).
+
+# Preset mode lama /laporan/trend → (satuan, jumlah ember, format label)
+MODE_TREND = {
+    "mingguan": ("hari",  7, "%a"),
+    "bulanan":  ("bulan", 6, "%b"),
+}
+LABEL_SATUAN = {"jam": "%H:00", "hari": "%d %b", "minggu": "%d %b", "bulan": "%b %Y"}
+
+
+def _dari_cache(kunci, hitung):
+    nilai = cache_dashboard.ambil(kunci)
+    if nilai is None:
+        nilai = hitung()
+        cache_dashboard.simpan(kunci, nilai)
+    return nilai
+
+
+def _waktu_param(args, nama: str, default: datetime) -> datetime:
+    if not args.get(nama):
+        return default
+    try:
+        ts = datetime.fromisoformat(args[nama])
+    except ValueError:
+        raise ValueError(f"{nama} harus berformat ISO 8601") from None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _hitung_stats() -> dict:
+    """Semua angka kartu dashboard dalam satu query."""
     now = datetime.now(timezone.utc)
     bulan_ini_awal   = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     bulan_lalu_awal  = (bulan_ini_awal - timedelta(days=1)).replace(day=1)
     minggu_ini_awal  = now - timedelta(days=7)
     minggu_lalu_awal = now - timedelta(days=14)
 
-    total_users    = Pengguna.query.count()
-    total_laporan  = LaporanInfluenza.query.count()
-    users_bln_ini  = Pengguna.query.filter(Pengguna.created_at >= bulan_ini_awal).count()
-    users_bln_lalu = Pengguna.query.filter(
-        Pengguna.created_at >= bulan_lalu_awal,
-        Pengguna.created_at < bulan_ini_awal
-    ).count()
-    lap_mgg_ini    = LaporanInfluenza.query.filter(LaporanInfluenza.timestamp >= minggu_ini_awal).count()
-    lap_mgg_lalu   = LaporanInfluenza.query.filter(
-        LaporanInfluenza.timestamp >= minggu_lalu_awal,
-        LaporanInfluenza.timestamp < minggu_ini_awal
-    ).count()
+    P = Pengguna
+    rekap = ringkasan_jendela(
+        {
+            "total":    (None,             None),
+            "mgg_ini":  (minggu_ini_awal,  None),
+            "mgg_lalu": (minggu_lalu_awal, minggu_ini_awal),
+        },
+        tambahan={
+            "users_total":    select(func.count()).select_from(P).scalar_subquery(),
+            "users_bln_ini":  select(func.count()).where(
+                                  P.created_at >= bulan_ini_awal).scalar_subquery(),
+            "users_bln_lalu": select(func.count()).where(
+                                  P.created_at >= bulan_lalu_awal,
+                                  P.created_at < bulan_ini_awal).scalar_subquery(),
+        },
+    )
+    gejala_mgg_ini = {g: rekap["mgg_ini"][f"gejala_{g}"] for g in LaporanInfluenza.GEJALA_FIELDS}
 
     def pct(a, b): return round((a - b) / b * 100, 1) if b else (100.0 if a else 0.0)
 
-    return jsonify({
-        "total_users":   total_users,
-        "total_laporan": total_laporan,
-        "pct_users":     pct(users_bln_ini, users_bln_lalu),
-        "pct_laporan":   pct(lap_mgg_ini, lap_mgg_lalu),
-    })
+    return {
+        "total_users":   rekap["users_total"],
+        "total_laporan": rekap["total"]["jumlah"],
+        "pct_users":     pct(rekap["users_bln_ini"], rekap["users_bln_lalu"]),
+        "pct_laporan":   pct(rekap["mgg_ini"]["jumlah"], rekap["mgg_lalu"]["jumlah"]),
+        "gejala_7hari":  [
+            {"gejala": g, "jumlah": c}
+            for g, c in LaporanInfluenza.gejala_teratas(gejala_mgg_ini, len(gejala_mgg_ini))
+        ],
+    }
+
+
+def _data_trend(args) -> dict:
+    """
+    Deret jumlah laporan. Param: satuan (jam|hari|minggu|bulan), mulai, sampai
+    (ISO 8601, default sampai = sekarang) — atau mode lama mingguan/bulanan.
+    ValueError jika parameter tidak valid.
+    """
+    satuan = args.get("satuan")
+    mode   = None if satuan else args.get("mode", "mingguan")
+    if mode is not None:
+        if mode not in MODE_TREND:
+            raise ValueError("mode harus 'mingguan' atau 'bulanan'")
+        satuan, n_ember, fmt = MODE_TREND[mode]
+    elif satuan in LABEL_SATUAN:
+        fmt = LABEL_SATUAN[satuan]
+    else:
+        raise ValueError("satuan harus 'jam', 'hari', 'minggu', atau 'bulan'")
+
+    def hitung():
+        now    = datetime.now(timezone.utc)
+        sampai = _waktu_param(args, "sampai", now)
+        if mode is not None:
+            mulai = awal_satuan(sampai, satuan)
+            for _ in range(n_ember - 1):
+                mulai = awal_satuan(mulai - timedelta(microseconds=1), satuan)
+        else:
+            mulai = _waktu_param(args, "mulai", sampai - timedelta(days=7))
+        deret = deret_waktu(mulai, sampai, satuan)
+        return {
+            "mode":   mode,
+            "satuan": satuan,
+            "data":   [
+                {"label": e.strftime(fmt), "waktu": e.isoformat(), "jumlah": n["jumlah"]}
+                for e, n in deret
+            ],
+        }
+
+    kunci = ("trend", mode, satuan, args.get("mulai"), args.get("sampai"))
+    return _dari_cache(kunci, hitung)
+
+
+def _item_laporan(l) -> dict:
+    return {
+        "tipe":   "laporan",
+        "judul":  f"Laporan baru dari {l.nama_wilayah or 'lokasi tidak diketahui'}",
+        "detail": f"Skor influenza {l.skor_influenza}",
+        "waktu":  l.timestamp.isoformat(),
+    }
+
+
+def _item_pengguna(p) -> dict:
+    return {
+        "tipe":   "pengguna",
+        "judul":  "User baru terdaftar",
+        "detail": p.username,
+        "waktu":  p.created_at.isoformat(),
+    }
+
+
+def _hitung_aktivitas() -> list:
+    lap = LaporanInfluenza.query.order_by(LaporanInfluenza.timestamp.desc()).limit(5).all()
+    usr = Pengguna.query.order_by(Pengguna.created_at.desc()).limit(5).all()
+
+    items = [_item_laporan(l) for l in lap] + [_item_pengguna(p) for p in usr]
+    items.sort(key=lambda x: x["waktu"], reverse=True)
+    return items[:10]
+
+
+def _aktivitas_siaran(event: dict):
+    """Event NOTIFY → (nama event SSE, item berbentuk sama dengan /aktivitas)."""
+    data = dict(event["data"])
+    if event["tipe"] == "laporan":
+        data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+        return "aktivitas", _item_laporan(SimpleNamespace(**data))
+    if event["tipe"] == "pengguna":
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return "aktivitas", _item_pengguna(SimpleNamespace(**data))
+    return None
+
+
+@admin_bp.get("/stats")
+@admin_required
+def stats_overview():
+    return jsonify(_dari_cache(("stats",), _hitung_stats))
 
 
 @admin_bp.get("/laporan/trend")
 @admin_required
 def laporan_trend():
-    from sqlalchemy import func, cast, Date
-    mode = request.args.get("mode", "mingguan")
-    now  = datetime.now(timezone.utc)
-
-    if mode == "mingguan":
-        cutoff = now - timedelta(days=6)
-        rows = (db.session.query(
-                    cast(LaporanInfluenza.timestamp, Date).label("hari"),
-                    func.count().label("jumlah"))
-                .filter(LaporanInfluenza.timestamp >= cutoff)
-                .group_by("hari").order_by("hari").all())
-        hasil = {str(r.hari): r.jumlah for r in rows}
-        data = []
-        for i in range(7):
-            d = (now - timedelta(days=6 - i)).date()
-            data.append({"label": d.strftime("%a"), "jumlah": hasil.get(str(d), 0)})
-    else:  # bulanan — last 6 months
-        data = []
-        for i in range(5, -1, -1):
-            m = (now.month - i - 1) % 12 + 1
-            y = now.year + ((now.month - i - 1) // 12)
-            month_start = datetime(y, m, 1, tzinfo=timezone.utc)
-            if m == 12:
-                month_end = datetime(y + 1, 1, 1, tzinfo=timezone.utc)
-            else:
-                month_end = datetime(y, m + 1, 1, tzinfo=timezone.utc)
-            count = LaporanInfluenza.query.filter(
-                LaporanInfluenza.timestamp >= month_start,
-                LaporanInfluenza.timestamp < month_end
-            ).count()
-            data.append({"label": month_start.strftime("%b"), "jumlah": count})
-
-    return jsonify({"mode": mode, "data": data})
+    try:
+        return jsonify(_data_trend(request.args))
+    except ValueError as e:
+        return jsonify({"pesan": str(e)}), 400
 
 
 @admin_bp.get("/aktivitas")
 @admin_required
 def aktivitas_terkini():
-    lap = LaporanInfluenza.query.order_by(LaporanInfluenza.timestamp.desc()).limit(5).all()
-    usr = Pengguna.query.order_by(Pengguna.created_at.desc()).limit(5).all()
+    return jsonify({"aktivitas": _dari_cache(("aktivitas",), _hitung_aktivitas)})
 
-    items = []
-    for l in lap:
-        items.append({
-            "tipe":   "laporan",
-            "judul":  f"Laporan baru dari {l.nama_wilayah or 'lokasi tidak diketahui'}",
-            "detail": f"Skor influenza {l.skor_influenza}",
-            "waktu":  l.timestamp.isoformat(),
-        })
-    for p in usr:
-        items.append({
-            "tipe":   "pengguna",
-            "judul":  "User baru terdaftar",
-            "detail": p.username,
-            "waktu":  p.created_at.isoformat(),
-        })
-    items.sort(key=lambda x: x["waktu"], reverse=True)
-    return jsonify({"aktivitas": items[:10]})
+
+@admin_bp.get("/aktivitas/stream")
+@admin_required(locations=["headers", "query_string"])
+def aktivitas_stream():
+    """
+    Aktivitas langsung (text/event-stream), item sama dengan /aktivitas.
+    EventSource tidak bisa mengirim header: token boleh lewat ?jwt=<token>.
+    Sambung ulang dengan Last-Event-ID melanjutkan dari buffer; event "reset"
+    berarti ada yang terlewat — muat ulang /aktivitas.
+    """
+    return respons_siaran(_aktivitas_siaran)
+
+
+@admin_bp.get("/dashboard")
+@admin_required
+def dashboard():
+    """stats + trend (param sama dengan /laporan/trend) + aktivitas dalam satu respons."""
+    try:
+        trend = _data_trend(request.args)
+    except ValueError as e:
+        return jsonify({"pesan": str(e)}), 400
+    return jsonify({
+        "stats":     _dari_cache(("stats",), _hitung_stats),
+        "trend":     trend,
+        "aktivitas": _dari_cache(("aktivitas",), _hitung_aktivitas),
+    })
@@ -4,10 +4,12 @@ POST /api/analisis  — AI Agent analisis penyebaran berbasis data lokal
 from datetime import datetime, timedelta, timezone
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
+from sqlalchemy import select
 from extensions import limiter
 from config import config
-from models import LaporanInfluenza
-from utils.haversine import kotak_batas, filter_radius
+from models import LaporanInfluenza, db
+from utils.haversine import saring_radius
+from utils.indeks_spasial import indeks_spasial
 from utils.openrouter import tanya_ai_agent
 
 ai_bp = Blueprint("ai", __name__, url_prefix="/api/analisis")
@@ -67,25 +69,38 @@ def analisis():
     except (ValueError, TypeError):
         jam = config.JAM_DEFAULT
 
-    # ── Langkah 1: Pre-filter bounding box (SQL cepat) ────
-    bbox   = kotak_batas(lat, lng, radius_km)
     cutoff = datetime.now(timezone.utc) - timedelta(hours=jam)
 
-    kandidat = (
-        LaporanInfluenza.query
-        .filter(
-            LaporanInfluenza.lat       >= bbox["min_lat"],
-            LaporanInfluenza.lat       <= bbox["max_lat"],
-            LaporanInfluenza.lng       >= bbox["min_lng"],
-            LaporanInfluenza.lng       <= bbox["max_lng"],
-            LaporanInfluenza.timestamp >= cutoff,
+    # Jalur cepat: indeks spasial in-memory (None jika tidak aktif)
+    hasil_indeks = indeks_spasial.cari(lat, lng, radius_km, mulai=cutoff)
+    if hasil_indeks is None:
+        # ── Langkah 1: Pre-filter sel grid + bounding box (SQL cepat) ────
+        kandidat = db.session.execute(
+            select(*LaporanInfluenza.kolom_ringkas())
+            .where(
+                *LaporanInfluenza.kriteria_area(lat, lng, radius_km),
+                LaporanInfluenza.timestamp >= cutoff,
+            )
+            .order_by(LaporanInfluenza.timestamp.desc())
+        ).all()
+
+        # ── Langkah 2: Filter Haversine akurat (NumPy, satu pass) ───────
+        indeks, jarak = saring_radius(
+            lat, lng,
+            [float(b.lat) for b in kandidat],
+            [float(b.lng) for b in kandidat],
+            radius_km,
         )
-        .order_by(LaporanInfluenza.timestamp.desc())
-        .all()
-    )
+        hasil_indeks = [(float(j), kandidat[i]) for i, j in zip(indeks, jarak)]
 
-    # ── Langkah 2: Filter Haversine akurat (Python) ───────
-    laporan_terdekat = filter_radius(kandidat, lat, lng, radius_km)
+    laporan_terdekat = [
+        LaporanInfluenza.laporan_dari_baris(baris, jarak_km=jarak)
+        for jarak, baris in hasil_indeks
+    ]
+    # Frekuensi gejala dalam radius — dari gejala_mask hasil filter
+    freq_gejala = LaporanInfluenza.frekuensi_dari_mask(
+        baris.gejala_mask for _, baris in hasil_indeks
+    ) if hasil_indeks else None
 
     # ── Langkah 3: Panggil OpenRouter dengan konteks DB ───
     if not config.OPENROUTER_API_KEY:
@@ -99,6 +114,7 @@ def analisis():
             lng=lng,
             radius_km=radius_km,
             jam=jam,
+            freq_gejala=freq_gejala,
         )
     except Exception as e:
         return jsonify({"pesan": f"Kesalahan layanan AI: {str(e)}"}), 502
@@ -21,6 +21,7 @@ from google.auth.transport import requests as google_requests
 from config import config
 from extensions import limiter
 from models import Pengguna, db
+from utils.identitas import identitas, klaim_identitas
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
@@ -90,7 +91,9 @@ def daftar():
     db.session.add(pengguna)
     db.session.commit()
 
-    token = create_access_token(identity=str(pengguna.id))
+    token = create_access_token(
+        identity=str(pengguna.id), additional_claims=klaim_identitas(pengguna)
+    )
     return jsonify({"token": token, "pengguna": pengguna.to_dict()}), 201
 
 
@@ -109,7 +112,9 @@ def masuk():
     if not pengguna.is_active:
         return jsonify({"pesan": "Akun Anda telah dinonaktifkan"}), 403
 
-    token = create_access_token(identity=str(pengguna.id))
+    token = create_access_token(
+        identity=str(pengguna.id), additional_claims=klaim_identitas(pengguna)
+    )
     return jsonify({"token": token, "pengguna": pengguna.to_dict()}), 200
 
 
@@ -117,11 +122,10 @@ def masuk():
 @jwt_required()
 def saya():
     """Kembalikan profil pengguna yang sedang login."""
-    user_id  = get_jwt_identity()
-    pengguna = db.session.get(Pengguna, user_id)
-    if not pengguna:
+    ident = identitas(get_jwt_identity())
+    if not ident:
         return jsonify({"pesan": "Pengguna tidak ditemukan"}), 404
-    return jsonify({"pengguna": pengguna.to_dict()}), 200
+    return jsonify({"pengguna": ident.profil}), 200
 
 
 @auth_bp.post("/google")
@@ -175,7 +179,9 @@ def google_login():
         db.session.add(pengguna)
         db.session.commit()
 
-    token = create_access_token(identity=str(pengguna.id))
+    token = create_access_token(
+        identity=str(pengguna.id), additional_claims=klaim_identitas(pengguna)
+    )
     return jsonify({"token": token, "pengguna": pengguna.to_dict()}), 200
 
 
@@ -1,21 +1,37 @@
 """
 POST /api/laporan  — Kirim laporan gejala baru (JWT required)
+POST /api/laporan/batch — Kirim banyak laporan sekaligus (JWT required)
 GET  /api/laporan  — Ambil laporan terbaru
 GET  /api/laporan/statistik — Statistik agregat untuk dashboard
+GET  /api/laporan/wilayah — Autocomplete nama wilayah
 """
+import math
+import uuid
+from collections import Counter
 from datetime import datetime, timedelta, timezone
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
-from sqlalchemy import func
+from sqlalchemy import distinct, func
+from config import config
 from extensions import limiter
-from models import LaporanInfluenza, Pengguna, _hitung_skor, db
-from utils.haversine import hitung_jarak, kotak_batas
+from models import LaporanInfluenza, db
+from utils.antrean import antrean_laporan, sebagai_dict
+from utils.haversine import jarak_sql
+from utils.http_cache import atur_cache_publik, cache_publik
+from utils.identitas import identitas_saat_ini
+from utils.indeks_spasial import indeks_spasial
+from utils.ingesti import (
+    DITERIMA, DITOLAK, DUPLIKAT, JEDA_LAPORAN, simpan_batch, validasi_laporan,
+)
+from utils.paginasi import halaman_kursor
+from utils.pencarian import saran_wilayah
+from utils.rekap import perbarui_rekap, ringkasan_jendela
 from utils.security import hash_ip
+from utils.status_kirim import catat_laporan, status_kirim, status_kirim_segar
+from utils.tile import invalidasi_tile, invalidasi_tile_banyak
 
 laporan_bp = Blueprint("laporan", __name__, url_prefix="/api/laporan")
 
-USIA_VALID = {"anak", "remaja", "dewasa", "lansia"}
-
 
 @laporan_bp.post("")
 @jwt_required()
@@ -45,64 +61,32 @@ def kirim_laporan():
         "kelompok_usia": "dewasa"
     }
     """
-    # ── Ambil identitas pengguna ──────────────────────────
-    user_id  = get_jwt_identity()
-    pengguna = db.session.get(Pengguna, user_id)
-    if not pengguna or not pengguna.is_active:
+    # ── Status pengguna (cache; penolakan tanpa query DB) ─
+    user_id = get_jwt_identity()
+    status  = status_kirim(user_id)
+    if status is None or not status.aktif:
         return jsonify({"pesan": "Akun tidak valid atau telah dinonaktifkan"}), 403
 
     data = request.get_json(silent=True)
     if not data:
         return jsonify({"pesan": "Body harus JSON yang valid"}), 400
 
-    # ── Validasi koordinat ────────────────────────────────
-    try:
-        lat = float(data["lat"])
-        lng = float(data["lng"])
-    except (KeyError, ValueError, TypeError):
-        return jsonify({"pesan": "lat dan lng wajib diisi dan harus berupa angka"}), 400
-
-    if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
-        return jsonify({"pesan": "Nilai lat/lng di luar jangkauan yang valid"}), 400
-
-    # ── Validasi gejala — minimal 1 harus True ────────────
-    gejala_fields = LaporanInfluenza.GEJALA_FIELDS
-    gejala_data   = {g: bool(data.get(g, False)) for g in gejala_fields}
-    if not any(gejala_data.values()):
-        return jsonify({"pesan": "Pilih minimal satu gejala"}), 400
-
-    # ── Validasi keparahan ────────────────────────────────
+    # ── Validasi (aturan sama dengan /batch) ──────────────
     try:
-        keparahan = int(data.get("tingkat_keparahan", 5))
-        if not (1 <= keparahan <= 10):
-            raise ValueError
-    except (ValueError, TypeError):
-        return jsonify({"pesan": "Tingkat keparahan harus angka 1–10"}), 400
-
-    # ── Validasi durasi ───────────────────────────────────
-    durasi = data.get("durasi_hari")
-    if durasi is not None:
-        try:
-            durasi = int(durasi)
-            if not (1 <= durasi <= 30):
-                durasi = None
-        except (ValueError, TypeError):
-            durasi = None
-
-    # ── Kelompok usia ─────────────────────────────────────
-    usia = data.get("kelompok_usia", "dewasa")
-    if usia not in USIA_VALID:
-        usia = "dewasa"
+        nilai = validasi_laporan(data)
+    except ValueError as e:
+        return jsonify({"pesan": str(e)}), 400
 
     # ── Cek batas 1 laporan per 4 hari ───────────────────
-    batas_waktu = datetime.now(timezone.utc) - timedelta(days=4)
-    laporan_terakhir = LaporanInfluenza.query.filter(
-        LaporanInfluenza.user_id == user_id,
-        LaporanInfluenza.timestamp >= batas_waktu,
-    ).first()
-
-    if laporan_terakhir:
-        waktu_berikutnya = laporan_terakhir.timestamp + timedelta(days=4)
+    # Cache hanya dipercaya untuk menolak; sebelum menyimpan, konfirmasi ke DB.
+    batas_waktu = datetime.now(timezone.utc) - JEDA_LAPORAN
+    if not status.segar and not (status.terakhir and status.terakhir >= batas_waktu):
+        status = status_kirim_segar(user_id)
+        if status is None or not status.aktif:
+            return jsonify({"pesan": "Akun tidak valid atau telah dinonaktifkan"}), 403
+
+    if status.terakhir and status.terakhir >= batas_waktu:
+        waktu_berikutnya = status.terakhir + JEDA_LAPORAN
         sisa_jam = (waktu_berikutnya - datetime.now(timezone.utc)).total_seconds() / 3600
         return jsonify({
             "pesan":           f"Anda sudah melaporkan dalam 4 hari terakhir. Laporan berikutnya bisa dikirim dalam {int(sisa_jam)+1} jam.",
@@ -110,54 +94,123 @@ def kirim_laporan():
             "sisa_jam":        round(sisa_jam, 1),
         }), 429
 
-    # ── Hitung skor risiko influenza ──────────────────────
-    skor = _hitung_skor(gejala_data)
-
-    # ── Simpan ke database ────────────────────────────────
-    laporan = LaporanInfluenza(
-        lat=lat,
-        lng=lng,
-        nama_wilayah=data.get("nama_wilayah"),
-        tingkat_keparahan=keparahan,
-        durasi_hari=durasi,
-        sudah_vaksin=data.get("sudah_vaksin"),
-        kelompok_usia=usia,
-        skor_influenza=skor,
+    nilai.update(
         ip_hash=hash_ip(),              # simpan hash IP (bukan IP asli)
-        user_id=user_id,
+        user_id=uuid.UUID(user_id),
         timestamp=datetime.now(timezone.utc),
-        **gejala_data,
     )
+
+    # ── Mode antrean: simpan lokal, dipindah ke DB oleh thread latar ──
+    if antrean_laporan.aktif:
+        nilai["id"] = uuid.uuid4()
+        antrean_laporan.tambah(nilai)
+        catat_laporan(user_id, nilai["timestamp"])
+        return jsonify({
+            "pesan":   "Laporan diterima dan sedang diproses. Terima kasih telah membantu pemantauan influenza.",
+            "laporan": sebagai_dict(nilai),
+            "skor_influenza": nilai["skor_influenza"],
+        }), 202
+
+    # ── Simpan ke database ────────────────────────────────
+    laporan = LaporanInfluenza(**nilai)
     db.session.add(laporan)
+    perbarui_rekap([laporan])
     db.session.commit()
+    catat_laporan(user_id, nilai["timestamp"])
+    invalidasi_tile(nilai["lat"], nilai["lng"])
 
     return jsonify({
         "pesan":   "Laporan berhasil dikirim. Terima kasih telah membantu pemantauan influenza.",
         "laporan": laporan.to_dict(),
-        "skor_influenza": skor,
+        "skor_influenza": nilai["skor_influenza"],
     }), 201
 
 
+@laporan_bp.post("/batch")
+@jwt_required()
+@limiter.limit("10/minute")
+def kirim_laporan_batch():
+    """
+    Kirim banyak laporan sekaligus (sinkronisasi laporan offline).
+
+    Body JSON: {"laporan": [ {...}, ... ]} — tiap item sama dengan body
+    POST /api/laporan, ditambah opsional:
+      "id"        : UUID buatan klien; pengiriman ulang id yang sama = duplikat
+      "timestamp" : waktu laporan dicatat (ISO 8601, maks BATCH_MAKS_UMUR_HARI lalu)
+
+    Respons berisi status per item (diterima / duplikat / ditolak) sesuai
+    urutan input. Item yang ditolak tidak menggagalkan item lain.
+    """
+    pengguna = identitas_saat_ini()
+    if not pengguna or not pengguna.aktif:
+        return jsonify({"pesan": "Akun tidak valid atau telah dinonaktifkan"}), 403
+
+    data  = request.get_json(silent=True)
+    items = data.get("laporan") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({"pesan": "Body harus berisi list 'laporan' yang tidak kosong"}), 400
+    if len(items) > config.BATCH_MAKS_LAPORAN:
+        return jsonify({"pesan": f"Maksimal {config.BATCH_MAKS_LAPORAN} laporan per batch"}), 413
+
+    # Laporan yang masih di antrean ikut aturan 4 hari (dibaca sebelum DB,
+    # seperti /saya: yang dipindah di antaranya tetap terhitung)
+    tertunda = []
+    if antrean_laporan.aktif:
+        tertunda = [n["timestamp"] for n in antrean_laporan.tertunda_pengguna(pengguna.id)]
+
+    hasil, disimpan = simpan_batch(
+        items, pengguna, hash_ip(), timedelta(days=config.BATCH_MAKS_UMUR_HARI), tertunda,
+    )
+    db.session.commit()
+    if disimpan:
+        catat_laporan(pengguna.id, max(n["timestamp"] for n in disimpan))
+    invalidasi_tile_banyak((n["lat"], n["lng"]) for n in disimpan)
+
+    jumlah = Counter(h["status"] for h in hasil)
+    return jsonify({
+        "pesan":    f"{jumlah[DITERIMA]} dari {len(items)} laporan diterima",
+        "diterima": jumlah[DITERIMA],
+        "duplikat": jumlah[DUPLIKAT],
+        "ditolak":  jumlah[DITOLAK],
+        "hasil":    hasil,
+    }), 201 if disimpan else 200
+
+
 @laporan_bp.get("/saya")
 @jwt_required()
 @limiter.limit("30/minute")
 def laporan_saya():
     """Ambil riwayat laporan milik pengguna yang sedang login. Limit 20 terbaru."""
     user_id = get_jwt_identity()
+    # Antrean dibaca sebelum DB: laporan yang dipindah di antaranya tetap
+    # terlihat (di keduanya, lalu disaring lewat id), tidak hilang dari keduanya.
+    tertunda = []
+    if antrean_laporan.aktif:
+        tertunda = [sebagai_dict(n) for n in antrean_laporan.tertunda_pengguna(user_id)]
+
     rows = (
-        LaporanInfluenza.query
-        .filter_by(user_id=user_id)
+        LaporanInfluenza.query_ringkas()
+        .filter(LaporanInfluenza.user_id == user_id)
         .order_by(LaporanInfluenza.created_at.desc())
         .limit(20)
         .all()
     )
-    return jsonify({"jumlah": len(rows), "laporan": [r.to_dict() for r in rows]})
+    laporan = LaporanInfluenza.serialisasi(rows)
+    if tertunda:
+        id_tertunda = {d["id"] for d in tertunda}
+        laporan = (tertunda + [d for d in laporan if d["id"] not in id_tertunda])[:20]
+    return jsonify({"jumlah": len(laporan), "laporan": laporan})
 
 
 @laporan_bp.get("")
 @limiter.limit("60/minute")
+@cache_publik(max_age=15)
 def ambil_laporan():
-    """Ambil laporan terbaru. Query param: jam (default 48), limit (default 200)."""
+    """
+    Ambil laporan terbaru. Query param: jam (default 48), limit (default 200).
+    Opsional kursor (keyset): kirim kursor= kosong untuk halaman pertama,
+    lalu nilai kursor_berikut dari respons sebelumnya.
+    """
     try:
         jam   = min(int(request.args.get("jam",   48)), 720)
         limit = min(int(request.args.get("limit", 200)), 1000)
@@ -165,24 +218,50 @@ def ambil_laporan():
         return jsonify({"pesan": "Parameter tidak valid"}), 400
 
     cutoff = datetime.now(timezone.utc) - timedelta(hours=jam)
+    q = LaporanInfluenza.query_ringkas().filter(LaporanInfluenza.timestamp >= cutoff)
+
+    if "kursor" in request.args:
+        try:
+            rows, berikut = halaman_kursor(
+                q, LaporanInfluenza.timestamp, LaporanInfluenza.id, request.args["kursor"], limit
+            )
+        except ValueError:
+            return jsonify({"pesan": "Kursor tidak valid"}), 400
+        return jsonify({
+            "jumlah":         len(rows),
+            "laporan":        LaporanInfluenza.serialisasi(rows),
+            "kursor_berikut": berikut,
+        })
+
     rows = (
-        LaporanInfluenza.query
-        .filter(LaporanInfluenza.timestamp >= cutoff)
-        .order_by(LaporanInfluenza.timestamp.desc())
+        q.order_by(LaporanInfluenza.timestamp.desc())
         .limit(limit)
         .all()
     )
-    return jsonify({"jumlah": len(rows), "laporan": [r.to_dict() for r in rows]})
+    return jsonify({"jumlah": len(rows), "laporan": LaporanInfluenza.serialisasi(rows)})
+
+
+@laporan_bp.get("/wilayah")
+@limiter.limit("120/minute")           # dipanggil per ketikan
+def autocomplete_wilayah():
+    """Saran nama wilayah untuk awalan q. Query param: q, batas (default 10, maks 25)."""
+    try:
+        batas = min(max(int(request.args.get("batas", 10)), 1), 25)
+    except ValueError:
+        return jsonify({"pesan": "Parameter tidak valid"}), 400
+    saran = saran_wilayah(request.args.get("q", ""), batas)
+    return atur_cache_publik(jsonify({"saran": saran}), max_age=60, swr=300)
 
 
 @laporan_bp.get("/statistik")
 @limiter.limit("60/minute")
+@cache_publik(max_age=30)
 def statistik():
     """Statistik agregat untuk kartu dashboard.
 
     Query params opsional:
         lat, lng        — koordinat user (float)
-        radius_km       — radius pencarian area (default: 10)
+        radius_km       — radius pencarian area (default: 10, dibatasi 1–50)
     Jika lat & lng diberikan, respons menyertakan kasus_area dan pengguna_area.
     """
     now = datetime.now(timezone.utc)
@@ -195,50 +274,67 @@ def statistik():
     try:
         lat = float(request.args["lat"])
         lng = float(request.args["lng"])
-        radius_km = float(request.args.get("radius_km", 10))
         ada_lokasi = True
     except (KeyError, ValueError, TypeError):
         ada_lokasi = False
+    if ada_lokasi:
+        try:
+            radius_km = float(request.args.get("radius_km", 10))
+        except ValueError:
+            radius_km = math.nan
+        if not all(map(math.isfinite, (lat, lng, radius_km))):
+            return jsonify({"pesan": "lat, lng dan radius_km harus berupa angka terhingga"}), 400
+        radius_km = max(1.0, min(radius_km, 50.0))
 
     # ── Hitung kasus area jika lokasi tersedia ────────────
     if ada_lokasi:
-        kotak = kotak_batas(lat, lng, radius_km)
         cutoff_area = now - timedelta(hours=48)
-
-        # Bounding-box pre-filter
-        q_area = LaporanInfluenza.query.filter(
-            LaporanInfluenza.lat  >= kotak["min_lat"],
-            LaporanInfluenza.lat  <= kotak["max_lat"],
-            LaporanInfluenza.lng  >= kotak["min_lng"],
-            LaporanInfluenza.lng  <= kotak["max_lng"],
+        L = LaporanInfluenza
+        dalam_radius = (
+            *L.kriteria_area(lat, lng, radius_km),
+            jarak_sql(lat, lng, L.lat, L.lng) <= radius_km,
         )
-        q_area_48j = q_area.filter(LaporanInfluenza.timestamp >= cutoff_area)
-
-        rows_area    = q_area.all()
-        rows_area48j = q_area_48j.all()
 
-        kasus_area     = sum(1 for r in rows_area    if hitung_jarak(lat, lng, float(r.lat), float(r.lng)) <= radius_km)
-        kasus_area_48j = sum(1 for r in rows_area48j if hitung_jarak(lat, lng, float(r.lat), float(r.lng)) <= radius_km)
+        # 48 jam terakhir dari indeks spasial in-memory jika aktif
+        hasil_indeks = indeks_spasial.cari(lat, lng, radius_km, mulai=cutoff_area)
+        if hasil_indeks is not None:
+            kasus_area = db.session.query(func.count()).filter(*dalam_radius).scalar()
+            kasus_area_48j = len(hasil_indeks)
+            # Jumlah pengguna unik yang melapor di area (48 jam)
+            pengguna_area = len({b.user_id for _, b in hasil_indeks if b.user_id})
+        else:
+            # Pre-filter sel grid + bounding box, Haversine di Postgres
+            baru = L.timestamp >= cutoff_area
+            kasus_area, kasus_area_48j, pengguna_area = db.session.query(
+                func.count(),
+                func.count().filter(baru),
+                func.count(distinct(L.user_id)).filter(baru),
+            ).filter(*dalam_radius).one()
+
+    # ── Semua angka kartu dalam satu query agregat ───────
+    # Jam penuh dibaca dari rekap_laporan_jam, tepi jendela dari laporan
+    cutoff_24  = now - timedelta(hours=24)
+    cutoff_48  = now - timedelta(hours=48)
+    cutoff_168 = now - timedelta(hours=168)
+
+    rekap = ringkasan_jendela({
+        "24j":   (cutoff_24,  None),
+        "48j":   (cutoff_48,  None),
+        "7h":    (cutoff_168, None),
+        "semua": (None,       None),
+        # Kasus periode sebelumnya (24–48 jam lalu) untuk trend
+        "lalu":  (cutoff_48,  cutoff_24),
+    })
+
+    total_24j      = rekap["24j"]["jumlah"]
+    total_48j      = rekap["48j"]["jumlah"]
+    total_7h       = rekap["7h"]["jumlah"]
+    total_semua    = rekap["semua"]["jumlah"]
+    kasus_24j_lalu = rekap["lalu"]["jumlah"]
 
-        # Jumlah pengguna unik yang melapor di area (48 jam)
-        pengguna_area = len({r.user_id for r in rows_area48j
-                             if hitung_jarak(lat, lng, float(r.lat), float(r.lng)) <= radius_km and r.user_id})
-
-    def hitung(jam):
-        return LaporanInfluenza.query.filter(
-            LaporanInfluenza.timestamp >= now - timedelta(hours=jam)
-        ).count()
-
-    total_24j   = hitung(24)
-    total_48j   = hitung(48)
-    total_7h    = hitung(168)
-    total_semua = LaporanInfluenza.query.count()
-
-    # Kasus periode sebelumnya (24–48 jam lalu) untuk trend
-    kasus_24j_lalu = LaporanInfluenza.query.filter(
-        LaporanInfluenza.timestamp >= now - timedelta(hours=48),
-        LaporanInfluenza.timestamp <  now - timedelta(hours=24),
-    ).count()
+    # Kasus aktif (severity >= 5, 48 jam) vs kasus ringan (severity < 5)
+    kasus_aktif    = rekap["48j"]["aktif"]
+    kasus_ringan   = rekap["48j"]["ringan"]
 
     # Trend persentase perubahan
     if kasus_24j_lalu > 0:
@@ -246,36 +342,19 @@ def statistik():
     else:
         trend_persen = 0
 
-    # Kasus aktif (severity >= 5, 48 jam) vs kasus ringan (severity < 5)
-    cutoff_48 = now - timedelta(hours=48)
-    kasus_aktif = LaporanInfluenza.query.filter(
-        LaporanInfluenza.timestamp >= cutoff_48,
-        LaporanInfluenza.tingkat_keparahan >= 5,
-    ).count()
-    kasus_ringan = LaporanInfluenza.query.filter(
-        LaporanInfluenza.timestamp >= cutoff_48,
-        LaporanInfluenza.tingkat_keparahan < 5,
-    ).count()
-
     # Laju gejala per jam
     laju_per_jam = round(total_24j / 24, 1)
 
     # Rata-rata skor
-    rata_skor = db.session.query(func.avg(LaporanInfluenza.skor_influenza)).filter(
-        LaporanInfluenza.timestamp >= cutoff_48
-    ).scalar()
-    rata_skor_val = round(float(rata_skor), 1) if rata_skor else 0
+    total_skor    = rekap["48j"]["total_skor"]
+    rata_skor_val = round(total_skor / total_48j, 1) if total_skor else 0
 
     # Indeks risiko 0–10
     indeks_risiko = round(min(rata_skor_val / 10, 10), 1)
 
     # Gejala dominan (48 jam)
-    baris = LaporanInfluenza.query.filter(LaporanInfluenza.timestamp >= cutoff_48).all()
-    freq_gejala = {}
-    for r in baris:
-        for g in r.gejala_aktif():
-            freq_gejala[g] = freq_gejala.get(g, 0) + 1
-    top5 = sorted(freq_gejala.items(), key=lambda x: x[1], reverse=True)[:5]
+    freq_gejala = {g: rekap["48j"][f"gejala_{g}"] for g in LaporanInfluenza.GEJALA_FIELDS}
+    top5 = LaporanInfluenza.gejala_teratas(freq_gejala, 5)
 
     # Persentase tiap gejala dari total kasus
     gejala_persen = []
@@ -296,7 +375,7 @@ def statistik():
             "wilayah":   r.nama_wilayah or "Area Tidak Diketahui",
             "gejala":    r.gejala_aktif()[:2],
             "keparahan": r.tingkat_keparahan,
-            "timestamp": r.timestamp.isoformat(),
+            "timestamp": r.timestamp,
         })
 
     resp = {
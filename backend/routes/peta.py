@@ -1,16 +1,50 @@
 """
-GET /api/peta  — Data titik heatmap + marker individual untuk Leaflet
+GET /api/peta                     — Data titik heatmap + marker individual untuk Leaflet
+GET /api/peta/tiles/<z>/<x>/<y>   — Bobot heatmap satu tile slippy-map (cache + ETag)
+GET /api/peta/stream              — Laporan baru secara langsung (Server-Sent Events)
 """
 from datetime import datetime, timedelta, timezone
-from flask import Blueprint, jsonify, request
+from types import SimpleNamespace
+from flask import Blueprint, Response, jsonify, request
+from sqlalchemy import select
 from extensions import limiter
-from models import LaporanInfluenza
+from models import GEJALA_PER_MASK, LaporanInfluenza, db
+from utils.biner import MIME_PETA_BINER, kode_peta_biner
+from utils.http_cache import atur_cache_publik, cache_publik
+from utils.klaster import (
+    BATAS_KLASTER, BATAS_MARKER, ZOOM_MARKER, ZOOM_MAX, ZOOM_MIN,
+    klaster_laporan, kriteria_peta, parse_bbox,
+)
+from utils.kompresi import kompresi
+from utils.siaran import respons_siaran
+from utils.tile import cache_tile, isi_tile, tile_valid
 
 peta_bp = Blueprint("peta", __name__, url_prefix="/api/peta")
 
 
+# Decimal/datetime dibiarkan apa adanya — diserialisasi oleh app.json (utils.json_provider)
+def _titik(r) -> dict:
+    return {"lat": r.lat, "lng": r.lng, "bobot": round(r.skor_influenza / 100, 2)}
+
+
+def _marker(r, batas_baru) -> dict:
+    return {
+        "lat":       r.lat,
+        "lng":       r.lng,
+        "keparahan": r.tingkat_keparahan,
+        "skor":      r.skor_influenza,
+        "gejala":    list(GEJALA_PER_MASK[r.gejala_mask]),
+        "wilayah":   r.nama_wilayah or "Area Tidak Diketahui",
+        "usia":      r.kelompok_usia,
+        "timestamp": r.timestamp,
+        "baru":      r.timestamp >= batas_baru,
+    }
+
+
 @peta_bp.get("")
+@kompresi("maks")                      # di-cache publik: kompresi sekali, dipakai ulang
 @limiter.limit("60/minute")
+@cache_publik(max_age=30)
 def data_peta():
     """
     Kembalikan:
@@ -18,6 +52,16 @@ def data_peta():
       - marker : array detail untuk CircleMarker  {lat, lng, keparahan, skor,
                                                    gejala, wilayah, timestamp,
                                                    baru}   ← baru=True jika < 2 jam
+
+    Query params opsional:
+        zoom  — level zoom Leaflet; jika diisi, respons di-klaster di server
+        bbox  — viewport "barat,selatan,timur,utara"
+    Dengan zoom < ZOOM_MARKER respons berisi klaster {lat, lng, jumlah,
+    skor_rata, keparahan_maks, baru} dan markers kosong; zoom >= ZOOM_MARKER
+    mengirim marker individual di dalam bbox. Tanpa zoom: 500 laporan terbaru.
+
+    Mode marker juga tersedia dalam format biner (utils/biner.py) jika
+    header Accept memilih application/vnd.fluwatch.peta.
     """
     try:
         jam = int(request.args.get("jam", 48))
@@ -25,43 +69,127 @@ def data_peta():
     except ValueError:
         return jsonify({"pesan": "jam harus berupa angka bulat"}), 400
 
+    try:
+        zoom = request.args.get("zoom", type=int)
+        if zoom is not None:
+            zoom = max(ZOOM_MIN, min(zoom, ZOOM_MAX))
+        kotak = parse_bbox(request.args.get("bbox"))
+    except ValueError:
+        return jsonify({"pesan": "bbox harus berupa 'barat,selatan,timur,utara'"}), 400
+
     now    = datetime.now(timezone.utc)
     cutoff = now - timedelta(hours=jam)
     batas_baru = now - timedelta(hours=2)
 
-    rows = (
-        LaporanInfluenza.query
-        .filter(LaporanInfluenza.timestamp >= cutoff)
-        .order_by(LaporanInfluenza.timestamp.desc())
-        .limit(500)
-        .all()
-    )
-
-    titik   = []
-    markers = []
-
-    for r in rows:
-        lat = float(r.lat)
-        lng = float(r.lng)
-        bobot = round(r.skor_influenza / 100, 2)
-
-        titik.append({"lat": lat, "lng": lng, "bobot": bobot})
-
-        markers.append({
-            "lat":       lat,
-            "lng":       lng,
-            "keparahan": r.tingkat_keparahan,
-            "skor":      r.skor_influenza,
-            "gejala":    r.gejala_aktif(),
-            "wilayah":   r.nama_wilayah or "Area Tidak Diketahui",
-            "usia":      r.kelompok_usia,
-            "timestamp": r.timestamp.isoformat(),
-            "baru":      r.timestamp >= batas_baru,
+    # ── Mode klaster (zoom rendah–menengah) ───────────────
+    if zoom is not None and zoom < ZOOM_MARKER:
+        klaster = klaster_laporan(cutoff, kotak, zoom, batas_baru)
+        terpotong = len(klaster) > BATAS_KLASTER
+        klaster = klaster[:BATAS_KLASTER]
+        return jsonify({
+            "jumlah":  sum(k["jumlah"] for k in klaster),
+            "jam":     jam,
+            "zoom":    zoom,
+            "mode":    "klaster",
+            "klaster": klaster,
+            "titik":   [
+                {"lat": k["lat"], "lng": k["lng"], "bobot": round(k["skor_rata"] / 100, 2)}
+                for k in klaster
+            ],
+            "markers": [],
+            "terpotong": terpotong,
         })
 
-    return jsonify({
-        "jumlah":  len(titik),
-        "jam":     jam,
-        "titik":   titik,
-        "markers": markers,
-    })
+    # ── Marker individual (query kolom, tanpa objek ORM) ───
+    L = LaporanInfluenza
+    q = select(
+        L.lat, L.lng, L.skor_influenza, L.tingkat_keparahan,
+        L.kelompok_usia, L.nama_wilayah, L.gejala_mask, L.timestamp,
+    ).order_by(L.timestamp.desc())
+    if zoom is None:
+        batas = 500
+        q = q.where(L.timestamp >= cutoff).limit(batas)
+    else:
+        batas = BATAS_MARKER
+        q = q.where(*kriteria_peta(cutoff, kotak)).limit(batas + 1)
+    rows = db.session.execute(q).all()
+    terpotong = len(rows) > batas
+    rows = rows[:batas]
+
+    # ── Format biner opt-in (Accept: application/vnd.fluwatch.peta) ───
+    if request.accept_mimetypes.best_match(["application/json", MIME_PETA_BINER]) == MIME_PETA_BINER:
+        respons = Response(
+            kode_peta_biner(rows, jam, now, batas_baru, terpotong),
+            mimetype=MIME_PETA_BINER,
+        )
+    else:
+        isi = {
+            "jumlah":  len(rows),
+            "jam":     jam,
+            "titik":   [_titik(r) for r in rows],
+            "markers": [_marker(r, batas_baru) for r in rows],
+        }
+        if zoom is not None:
+            isi.update(zoom=zoom, mode="marker", terpotong=terpotong)
+        respons = jsonify(isi)
+    respons.vary.add("Accept")
+    return respons
+
+
+@peta_bp.get("/tiles/<int:z>/<int:x>/<int:y>")
+@kompresi("cepat")
+@limiter.limit("600/minute")          # satu viewport = belasan tile
+def tile_peta(z, x, y):
+    """
+    Bobot heatmap untuk satu tile XYZ, diagregasi per piksel:
+      {"tile": [z, x, y], "ekstensi": 256, "jumlah": N,
+       "titik": [px, py, skor, jumlah, px, py, skor, jumlah, ...]}
+    px/py = posisi piksel dalam tile (0..ekstensi-1), skor = rata-rata
+    skor_influenza (bobot = skor / 100). Query param: jam (default 48).
+    """
+    if not tile_valid(z, x, y):
+        return jsonify({"pesan": "Tile tidak ditemukan"}), 404
+    try:
+        jam = int(request.args.get("jam", 48))
+        jam = max(1, min(jam, 720))
+    except ValueError:
+        return jsonify({"pesan": "jam harus berupa angka bulat"}), 400
+
+    kunci = (z, x, y, jam)
+    tile  = cache_tile.ambil(kunci)
+    if tile is None:
+        tile = isi_tile(z, x, y, datetime.now(timezone.utc) - timedelta(hours=jam))
+        cache_tile.simpan(kunci, tile)
+
+    # Perbandingan lemah (RFC 9110): ETag dilemahkan saat respons dikompresi
+    if request.if_none_match.contains_weak(tile["etag"]):
+        respons = Response(status=304)
+    else:
+        respons = jsonify(tile["isi"])
+    respons.set_etag(tile["etag"])
+    return atur_cache_publik(respons, max_age=30, swr=60)
+
+
+def _marker_siaran(event: dict):
+    """Event NOTIFY laporan → marker (+ bobot heatmap), tanpa id/pengguna."""
+    if event["tipe"] != "laporan":
+        return None
+    data = event["data"]
+    r = SimpleNamespace(**{**data, "timestamp": datetime.fromisoformat(data["timestamp"])})
+    batas_baru = datetime.now(timezone.utc) - timedelta(hours=2)
+    return "laporan", {
+        **_marker(r, batas_baru),
+        "bobot":     _titik(r)["bobot"],
+        "timestamp": data["timestamp"],
+    }
+
+
+@peta_bp.get("/stream")
+@limiter.limit("30/minute")           # termasuk sambung ulang otomatis EventSource
+def stream_peta():
+    """
+    Laporan baru sebagai Server-Sent Events (event "laporan", bentuk sama dengan
+    marker GET /api/peta + bobot). Kirim ulang Last-Event-ID untuk melanjutkan;
+    event "reset" berarti ada laporan terlewat — muat ulang GET /api/peta.
+    """
+    return respons_siaran(_marker_siaran)
@@ -1,12 +1,26 @@
 """
 Jalankan sekali untuk inisialisasi tabel dan opsional isi data contoh.
-Penggunaan: python setup_db.py [--seed]
+Penggunaan: python setup_db.py [--seed] [--massal N ...]
+
+--seed      : ~180 laporan contoh (ORM, untuk pengembangan UI)
+--massal N  : N laporan sintetis untuk uji beban (lihat utils/sintetis.py),
+              dimuat lewat COPY oleh --proses proses paralel per --potongan
+              baris. Index sekunder laporan_influenza di-drop selama pemuatan
+              lalu dibangun ulang (kecuali --pertahankan-index).
 """
-import sys
-from datetime import datetime, timezone, timedelta
+import argparse
+import io
+import multiprocessing
+import os
 import random
-from app import buat_app
+import time
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import text
+
 from models import db, LaporanInfluenza, _hitung_skor
+from utils.rekap import bangun_ulang_rekap
+from utils import sintetis
 
 KLUSTER = [
     (-6.2615, 106.8106, "Kebayoran Baru"),
@@ -98,86 +112,209 @@ def buat_laporan(lat, lng, nama_wilayah, gejala, keparahan, usia, vaksin, jam_la
     )
 
 
+def isi_contoh():
+    total = 0
+
+    # ── 100 laporan tersebar acak dalam 30 hari ──────────────────────
+    print("Mengisi 100 laporan acak (30 hari terakhir)...")
+    for _ in range(100):
+        lat, lng, nama = random.choice(KLUSTER)
+        gejala, keparahan, usia, vaksin = random.choice(TEMPLATE)
+        laporan = buat_laporan(
+            lat, lng, nama,
+            gejala, keparahan, usia, vaksin,
+            jam_lalu=random.uniform(0.5, 720)   # 0.5 jam – 30 hari
+        )
+        db.session.add(laporan)
+        total += 1
+
+    # ── 40 laporan dalam 7 hari (aktivitas mingguan) ─────────────────
+    print("Mengisi 40 laporan mingguan...")
+    for _ in range(40):
+        lat, lng, nama = random.choice(KLUSTER)
+        gejala, keparahan, usia, vaksin = random.choice(TEMPLATE)
+        laporan = buat_laporan(
+            lat, lng, nama,
+            gejala, keparahan, usia, vaksin,
+            jam_lalu=random.uniform(0.5, 167)   # dalam 7 hari
+        )
+        db.session.add(laporan)
+        total += 1
+
+    # ── 20 laporan sangat baru (< 6 jam) untuk uji heatmap aktif ─────
+    print("Mengisi 20 laporan aktif (< 6 jam)...")
+    KLUSTER_AKTIF = [
+        (-6.2615, 106.8106, "Kebayoran Baru"),
+        (-6.1862, 106.8340, "Menteng"),
+        (-6.4025, 106.7942, "Depok Timur"),
+        (-6.2349, 106.9921, "Bekasi Utara"),
+        (-6.9175, 107.6191, "Bandung Tengah"),
+        (-7.2575, 112.7521, "Surabaya Pusat"),
+        (-6.9800, 110.4200, "Semarang Tengah"),
+        (-7.7972, 110.3688, "Yogyakarta Kota"),
+        (-6.2800, 106.8600, "Tebet"),
+        (-6.1600, 106.9200, "Pulo Gadung"),
+    ]
+    for lat, lng, nama in KLUSTER_AKTIF:
+        for _ in range(2):
+            gejala, keparahan, usia, vaksin = random.choice(TEMPLATE)
+            laporan = buat_laporan(
+                lat, lng, nama,
+                gejala, keparahan, usia, vaksin,
+                jam_lalu=random.uniform(0.1, 5.9)
+            )
+            db.session.add(laporan)
+            total += 1
+
+    # ── 20 laporan severity tinggi (skor ≥ 8) ────────────────────────
+    print("Mengisi 20 laporan severity tinggi...")
+    TEMPLATE_BERAT = [t for t in TEMPLATE if t[1] >= 8]
+    for _ in range(20):
+        lat, lng, nama = random.choice(KLUSTER)
+        gejala, keparahan, usia, vaksin = random.choice(TEMPLATE_BERAT)
+        laporan = buat_laporan(
+            lat, lng, nama,
+            gejala, keparahan, usia, vaksin,
+            jam_lalu=random.uniform(1, 336)     # dalam 14 hari
+        )
+        db.session.add(laporan)
+        total += 1
+
+    db.session.commit()
+    print(f"✅ {total} laporan berhasil ditambahkan.")
+
+    print("Membangun rekap laporan per jam...")
+    bangun_ulang_rekap()
+    db.session.commit()
+    print("✅ Rekap berhasil dibangun.")
+
+
+# ── Mode massal (uji beban) ──────────────────────────────────────────────────
+
+def _indeks_sekunder(tabel: str) -> list[tuple[str, str]]:
+    """(nama, definisi) index yang bukan milik constraint (PK/unique)."""
+    return db.session.execute(text("""
+        SELECT i.relname, pg_get_indexdef(x.indexrelid)
+        FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = CAST(:tabel AS regclass)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+    """), {"tabel": tabel}).all()
+
+
+def _muat_pengguna(r: dict) -> int:
+    """COPY pengguna sintetis lewat tabel sementara; yang sudah ada dilewati."""
+    kolom = ", ".join(sintetis.KOLOM_PENGGUNA)
+    conn = db.engine.raw_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("CREATE TEMP TABLE pengguna_sintetis "
+                        "(LIKE pengguna INCLUDING DEFAULTS) ON COMMIT DROP")
+            cur.copy_expert(f"COPY pengguna_sintetis ({kolom}) FROM STDIN",
+                            io.StringIO(sintetis.teks_pengguna(r)))
+            # Tanpa NOTIFY per baris (siaran aktivitas); ALTER TABLE ikut transaksi ini
+            cur.execute("ALTER TABLE pengguna DISABLE TRIGGER USER")
+            cur.execute(f"INSERT INTO pengguna ({kolom}) SELECT {kolom} "
+                        "FROM pengguna_sintetis ON CONFLICT DO NOTHING")
+            jumlah = cur.rowcount
+            cur.execute("ALTER TABLE pengguna ENABLE TRIGGER USER")
+        conn.commit()
+    finally:
+        conn.close()
+    return jumlah
+
+
+def isi_massal(args):
+    r = sintetis.rencana(KLUSTER, TEMPLATE, args.pengguna, args.hari, args.benih)
+
+    if args.kosongkan:
+        print("Mengosongkan laporan, rekap, dan pengguna sintetis...")
+        db.session.execute(text("TRUNCATE laporan_influenza, rekap_laporan_jam"))
+        db.session.execute(text(r"DELETE FROM pengguna WHERE username LIKE 'sintetis\_%'"))
+        db.session.commit()
+
+    if r["pengguna"]:
+        print(f"Memuat {r['pengguna']} pengguna sintetis...")
+        print(f"✅ {_muat_pengguna(r)} pengguna baru.")
+
+    indeks = [] if args.pertahankan_index else _indeks_sekunder("laporan_influenza")
+    for nama, _ in indeks:
+        db.session.execute(text(f'DROP INDEX IF EXISTS "{nama}"'))
+    # Trigger NOTIFY siaran aktivitas dimatikan: jutaan event tidak berguna bagi dashboard
+    db.session.execute(text("ALTER TABLE laporan_influenza DISABLE TRIGGER USER"))
+    db.session.commit()
+    if indeks:
+        print(f"{len(indeks)} index sekunder di-drop selama pemuatan.")
+
+    dsn = db.engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    tugas = [
+        (dsn, r, nomor, min(args.potongan, args.massal - awal))
+        for nomor, awal in enumerate(range(0, args.massal, args.potongan))
+    ]
+    print(f"Memuat {args.massal} laporan ({len(tugas)} potongan, {args.proses} proses)...")
+    mulai = time.perf_counter()
+    selesai = 0
+    try:
+        # spawn: proses anak tidak mewarisi koneksi/engine proses utama
+        with multiprocessing.get_context("spawn").Pool(args.proses) as pool:
+            for n in pool.imap_unordered(sintetis.muat_potongan, tugas):
+                selesai += n
+                durasi = time.perf_counter() - mulai
+                print(f"  {selesai:>12,} / {args.massal:,}  ({selesai / durasi:,.0f} baris/detik)")
+    finally:
+        db.session.execute(text("ALTER TABLE laporan_influenza ENABLE TRIGGER USER"))
+        db.session.commit()
+        for nama, definisi in indeks:
+            print(f"Membangun ulang index {nama}...")
+            db.session.execute(text(definisi))
+            db.session.commit()
+
+    print("Membangun rekap laporan per jam...")
+    bangun_ulang_rekap()
+    db.session.commit()
+
+    # VACUUM/ANALYZE tidak boleh di dalam transaksi
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE laporan_influenza, rekap_laporan_jam, pengguna"))
+    print(f"✅ {selesai} laporan sintetis dimuat dalam {time.perf_counter() - mulai:.0f} detik.")
+
+
 def setup():
+    parser = argparse.ArgumentParser(description="Inisialisasi tabel dan data contoh")
+    parser.add_argument("--seed", action="store_true", help="isi ~180 laporan contoh")
+    parser.add_argument("--massal", type=int, default=0, metavar="N",
+                        help="isi N laporan sintetis (uji beban)")
+    parser.add_argument("--pengguna", type=int, default=None,
+                        help="jumlah pengguna sintetis (default N/20)")
+    parser.add_argument("--hari", type=int, default=90, help="rentang waktu laporan (hari)")
+    parser.add_argument("--proses", type=int, default=os.cpu_count() or 1,
+                        help="jumlah proses COPY paralel")
+    parser.add_argument("--potongan", type=int, default=100_000,
+                        help="laporan per potongan COPY")
+    parser.add_argument("--benih", type=int, default=42, help="benih acak (hasil dapat diulang)")
+    parser.add_argument("--kosongkan", action="store_true",
+                        help="TRUNCATE laporan & rekap sebelum memuat")
+    parser.add_argument("--pertahankan-index", action="store_true",
+                        help="jangan drop index sekunder selama pemuatan")
+    args = parser.parse_args()
+    if args.pengguna is None:
+        args.pengguna = args.massal // 20
+
+    # Diimpor di sini agar proses anak (spawn) tidak ikut membuat app
+    from app import buat_app
+
     app = buat_app()
     with app.app_context():
         print("Membuat tabel...")
         db.create_all()
         print("✅ Tabel berhasil dibuat.")
 
-        if "--seed" in sys.argv:
-            total = 0
-
-            # ── 100 laporan tersebar acak dalam 30 hari ──────────────────────
-            print("Mengisi 100 laporan acak (30 hari terakhir)...")
-            for _ in range(100):
-                lat, lng, nama = random.choice(KLUSTER)
-                gejala, keparahan, usia, vaksin = random.choice(TEMPLATE)
-                laporan = buat_laporan(
-                    lat, lng, nama,
-                    gejala, keparahan, usia, vaksin,
-                    jam_lalu=random.uniform(0.5, 720)   # 0.5 jam – 30 hari
-                )
-                db.session.add(laporan)
-                total += 1
-
-            # ── 40 laporan dalam 7 hari (aktivitas mingguan) ─────────────────
-            print("Mengisi 40 laporan mingguan...")
-            for _ in range(40):
-                lat, lng, nama = random.choice(KLUSTER)
-                gejala, keparahan, usia, vaksin = random.choice(TEMPLATE)
-                laporan = buat_laporan(
-                    lat, lng, nama,
-                    gejala, keparahan, usia, vaksin,
-                    jam_lalu=random.uniform(0.5, 167)   # dalam 7 hari
-                )
-                db.session.add(laporan)
-                total += 1
-
-            # ── 20 laporan sangat baru (< 6 jam) untuk uji heatmap aktif ─────
-            print("Mengisi 20 laporan aktif (< 6 jam)...")
-            KLUSTER_AKTIF = [
-                (-6.2615, 106.8106, "Kebayoran Baru"),
-                (-6.1862, 106.8340, "Menteng"),
-                (-6.4025, 106.7942, "Depok Timur"),
-                (-6.2349, 106.9921, "Bekasi Utara"),
-                (-6.9175, 107.6191, "Bandung Tengah"),
-                (-7.2575, 112.7521, "Surabaya Pusat"),
-                (-6.9800, 110.4200, "Semarang Tengah"),
-                (-7.7972, 110.3688, "Yogyakarta Kota"),
-                (-6.2800, 106.8600, "Tebet"),
-                (-6.1600, 106.9200, "Pulo Gadung"),
-            ]
-            for lat, lng, nama in KLUSTER_AKTIF:
-                for _ in range(2):
-                    gejala, keparahan, usia, vaksin = random.choice(TEMPLATE)
-                    laporan = buat_laporan(
-                        lat, lng, nama,
-                        gejala, keparahan, usia, vaksin,
-                        jam_lalu=random.uniform(0.1, 5.9)
-                    )
-                    db.session.add(laporan)
-                    total += 1
-
-            # ── 20 laporan severity tinggi (skor ≥ 8) ────────────────────────
-            print("Mengisi 20 laporan severity tinggi...")
-            TEMPLATE_BERAT = [t for t in TEMPLATE if t[1] >= 8]
-            for _ in range(20):
-                lat, lng, nama = random.choice(KLUSTER)
-                gejala, keparahan, usia, vaksin = random.choice(TEMPLATE_BERAT)
-                laporan = buat_laporan(
-                    lat, lng, nama,
-                    gejala, keparahan, usia, vaksin,
-                    jam_lalu=random.uniform(1, 336)     # dalam 14 hari
-                )
-                db.session.add(laporan)
-                total += 1
-
-            db.session.commit()
-            print(f"✅ {total} laporan berhasil ditambahkan.")
+        if args.seed:
+            isi_contoh()
+        if args.massal > 0:
+            isi_massal(args)
 
         print("Selesai!")
 
 
 if __name__ == "__main__":
-    setup()
\ No newline at end of file
+    setup()
@@ -0,0 +1,275 @@
+"""
+Antrean write-behind untuk POST /api/laporan (opsional, ANTREAN_AKTIF=true).
+
+Laporan yang lolos validasi ditulis ke file SQLite lokal (WAL, synchronous
+FULL — sudah tahan crash saat respons 202 dikirim), lalu thread latar di
+tiap worker memindahkannya ke Postgres per batch dengan
+ingesti.sisipkan_laporan() dalam satu transaksi. Request tidak lagi
+menunggu commit Postgres, sehingga lonjakan laporan tidak berebut pool
+koneksi dengan pembacaan dashboard.
+
+- tambah()            : simpan satu laporan ke antrean (durable)
+- tertunda_pengguna() : laporan pengguna yang belum dipindah (read-your-writes)
+- kuras()             : pindahkan satu batch ke Postgres; dipanggil thread latar
+
+Beberapa worker di host yang sama berbagi file antrean. Tiap batch diklaim
+dulu (kolom diklaim); klaim yang tidak selesai dalam KLAIM_KEDALUWARSA detik
+(worker mati) diambil ulang. INSERT memakai ON CONFLICT (id) DO NOTHING
+sehingga pemindahan ulang tidak menggandakan laporan maupun rekap.
+
+Jika batch gagal karena data (bukan koneksi), baris dipindah satu per satu
+agar satu baris buruk tidak menahan seluruh antrean. Pengguna yang sudah
+dihapus admin → laporan disimpan tanpa user_id (sama seperti ON DELETE SET
+NULL). Baris yang tetap gagal MAKS_PERCOBAAN kali dipindah ke tabel
+antrean_gagal untuk diperiksa manual.
+File antrean harus berada di disk lokal yang persisten (volume), satu per host.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError
+
+from config import config
+from models import LaporanInfluenza, db
+from utils.ingesti import sisipkan_laporan
+from utils.tile import invalidasi_tile_banyak
+
+KLAIM_KEDALUWARSA = 60      # detik
+MAKS_PERCOBAAN    = 5       # kegagalan data per baris sebelum masuk antrean_gagal
+PG_FK_VIOLATION   = "23503"
+
+_SKEMA = """
+CREATE TABLE IF NOT EXISTS antrean (
+    id       TEXT PRIMARY KEY,
+    user_id  TEXT,
+    data     TEXT NOT NULL,
+    dibuat   REAL NOT NULL,
+    diklaim  REAL,
+    percobaan INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_antrean_user ON antrean (user_id);
+CREATE INDEX IF NOT EXISTS idx_antrean_dibuat ON antrean (dibuat);
+CREATE TABLE IF NOT EXISTS antrean_gagal (
+    id       TEXT PRIMARY KEY,
+    user_id  TEXT,
+    data     TEXT NOT NULL,
+    dibuat   REAL NOT NULL,
+    pesan    TEXT,
+    waktu    REAL NOT NULL
+);
+"""
+
+
+def _sementara(e: Exception) -> bool:
+    """Kegagalan koneksi/server, bukan isi baris — cukup diulang nanti."""
+    return isinstance(e, DBAPIError) and not isinstance(e, (IntegrityError, DataError))
+
+
+def _pelanggaran_fk(e: Exception) -> bool:
+    return isinstance(e, IntegrityError) and getattr(e.orig, "pgcode", None) == PG_FK_VIOLATION
+
+
+def _ke_json(nilai: dict) -> str:
+    return json.dumps({
+        **nilai,
+        "id":        str(nilai["id"]),
+        "user_id":   str(nilai["user_id"]) if nilai["user_id"] else None,
+        "timestamp": nilai["timestamp"].isoformat(),
+    })
+
+
+def _dari_json(teks: str) -> dict:
+    nilai = json.loads(teks)
+    nilai["id"]        = uuid.UUID(nilai["id"])
+    nilai["user_id"]   = uuid.UUID(nilai["user_id"]) if nilai["user_id"] else None
+    nilai["timestamp"] = datetime.fromisoformat(nilai["timestamp"])
+    return nilai
+
+
+def sebagai_dict(nilai: dict) -> dict:
+    """Bentuk respons sama dengan LaporanInfluenza.to_dict()."""
+    return LaporanInfluenza.laporan_dari_baris(
+        tuple(nilai[k.key] for k in LaporanInfluenza.kolom_ringkas())
+    )
+
+
+class AntreanLaporan:
+    def __init__(self, aktif: bool, path: str, interval_detik: float, ukuran_batch: int):
+        self.aktif          = aktif
+        self.path           = path
+        self.interval_detik = interval_detik
+        self.ukuran_batch   = ukuran_batch
+
+        self._lokal = threading.local()       # satu koneksi SQLite per thread
+        self._app   = None
+        self._pid   = None                    # proses pemilik thread latar
+        self._kunci = threading.Lock()
+
+    # ── SQLite lokal ─────────────────────────────────────────
+    def _koneksi(self) -> sqlite3.Connection:
+        conn = getattr(self._lokal, "conn", None)
+        if conn is None or getattr(self._lokal, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.executescript(_SKEMA)
+            kolom = {r[1] for r in conn.execute("PRAGMA table_info(antrean)")}
+            if "percobaan" not in kolom:          # file antrean dari versi sebelumnya
+                conn.execute("ALTER TABLE antrean ADD COLUMN percobaan INTEGER NOT NULL DEFAULT 0")
+            self._lokal.conn, self._lokal.pid = conn, os.getpid()
+        return conn
+
+    def tambah(self, nilai: dict) -> None:
+        """Simpan laporan (nilai kolom lengkap, termasuk id/timestamp/user_id)."""
+        self._koneksi().execute(
+            "INSERT INTO antrean (id, user_id, data, dibuat) VALUES (?, ?, ?, ?)",
+            (str(nilai["id"]), str(nilai["user_id"]) if nilai["user_id"] else None,
+             _ke_json(nilai), time.time()),
+        )
+        self._pastikan_thread()
+
+    def tertunda_pengguna(self, user_id) -> list[dict]:
+        """Laporan pengguna yang masih di antrean, terbaru dulu."""
+        rows = self._koneksi().execute(
+            "SELECT data FROM antrean WHERE user_id = ? ORDER BY dibuat DESC",
+            (str(user_id),),
+        ).fetchall()
+        return [_dari_json(r[0]) for r in rows]
+
+    def jumlah(self) -> int:
+        return self._koneksi().execute("SELECT COUNT(*) FROM antrean").fetchone()[0]
+
+    def jumlah_gagal(self) -> int:
+        return self._koneksi().execute("SELECT COUNT(*) FROM antrean_gagal").fetchone()[0]
+
+    def _klaim(self) -> list[tuple[str, str]]:
+        conn = self._koneksi()
+        sekarang = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, data FROM antrean WHERE diklaim IS NULL OR diklaim < ? "
+                "ORDER BY dibuat LIMIT ?",
+                (sekarang - KLAIM_KEDALUWARSA, self.ukuran_batch),
+            ).fetchall()
+            conn.executemany("UPDATE antrean SET diklaim = ? WHERE id = ?",
+                             [(sekarang, r[0]) for r in rows])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    # ── Pemindahan ke Postgres ───────────────────────────────
+    def kuras(self) -> int:
+        """Pindahkan satu batch ke Postgres (butuh app context). Kembalikan jumlah baris."""
+        rows = self._klaim()
+        if not rows:
+            return 0
+        ids = [(r[0],) for r in rows]
+        try:
+            disimpan = sisipkan_laporan([_dari_json(r[1]) for r in rows])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if _sementara(e):
+                self._koneksi().executemany("UPDATE antrean SET diklaim = NULL WHERE id = ?", ids)
+                raise
+            disimpan = self._kuras_per_baris(rows)
+        else:
+            self._koneksi().executemany("DELETE FROM antrean WHERE id = ?", ids)
+        invalidasi_tile_banyak((n["lat"], n["lng"]) for n in disimpan)
+        return len(rows)
+
+    def _sisipkan_satu(self, nilai: dict) -> list[dict]:
+        try:
+            disimpan = sisipkan_laporan([nilai])
+            db.session.commit()
+            return disimpan
+        except Exception as e:
+            db.session.rollback()
+            if not _pelanggaran_fk(e) or nilai["user_id"] is None:
+                raise
+        # Pengguna dihapus selagi laporannya di antrean: simpan tanpa pemilik
+        nilai["user_id"] = None
+        disimpan = sisipkan_laporan([nilai])
+        db.session.commit()
+        return disimpan
+
+    def _kuras_per_baris(self, rows: list[tuple[str, str]]) -> list[dict]:
+        """Batch ditolak karena isi baris: pindahkan satu per satu, sisihkan yang rusak."""
+        conn = self._koneksi()
+        disimpan = []
+        for i, (id_, data) in enumerate(rows):
+            try:
+                disimpan += self._sisipkan_satu(_dari_json(data))
+            except Exception as e:
+                if _sementara(e):
+                    conn.executemany("UPDATE antrean SET diklaim = NULL WHERE id = ?",
+                                     [(r[0],) for r in rows[i:]])
+                    raise
+                self._catat_gagal(id_, repr(e))
+                continue
+            conn.execute("DELETE FROM antrean WHERE id = ?", (id_,))
+        return disimpan
+
+    def _catat_gagal(self, id_: str, pesan: str) -> None:
+        """Tambah hitungan percobaan; setelah MAKS_PERCOBAAN pindah ke antrean_gagal."""
+        conn = self._koneksi()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE antrean SET diklaim = NULL, percobaan = percobaan + 1 "
+                         "WHERE id = ?", (id_,))
+            conn.execute(
+                "INSERT OR REPLACE INTO antrean_gagal (id, user_id, data, dibuat, pesan, waktu) "
+                "SELECT id, user_id, data, dibuat, ?, ? FROM antrean WHERE id = ? AND percobaan >= ?",
+                (pesan, time.time(), id_, MAKS_PERCOBAAN),
+            )
+            conn.execute("DELETE FROM antrean WHERE id = ? AND percobaan >= ?", (id_, MAKS_PERCOBAAN))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._app.logger.warning("Laporan antrean %s gagal dipindahkan: %s", id_, pesan)
+
+    def _jalan(self) -> None:
+        # Tidak dibangunkan per laporan: saat lonjakan, laporan menumpuk selama
+        # interval lalu dipindah sekaligus per ukuran_batch.
+        while True:
+            time.sleep(self.interval_detik)
+            with self._app.app_context():
+                try:
+                    while self.kuras() == self.ukuran_batch:
+                        pass
+                except Exception:
+                    self._app.logger.exception("Gagal memindahkan antrean laporan")
+                finally:
+                    db.session.remove()
+
+    def _pastikan_thread(self) -> None:
+        """Mulai thread latar di proses ini (sekali per worker, aman setelah fork)."""
+        if self._pid == os.getpid() or self._app is None:
+            return
+        with self._kunci:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._jalan, name="antrean-laporan", daemon=True).start()
+
+    def init_app(self, app) -> None:
+        """Daftarkan app untuk thread latar; sisa antrean dari run sebelumnya ikut dipindah."""
+        self._app = app
+        self._pastikan_thread()
+
+
+antrean_laporan = AntreanLaporan(
+    aktif=config.ANTREAN_AKTIF,
+    path=config.ANTREAN_PATH,
+    interval_detik=config.ANTREAN_INTERVAL_DETIK,
+    ukuran_batch=config.ANTREAN_UKURAN_BATCH,
+)
@@ -0,0 +1,81 @@
+"""
+Format biner ringkas untuk titik/marker peta (opt-in via header Accept).
+
+Tata letak (little-endian; tiap array sejajar dengan ukuran elemennya dari
+awal buffer — f32/u32 ke 4 byte, u16 ke 2 byte — agar bisa dibaca langsung
+dengan TypedArray di browser):
+
+    header  (16 byte)
+        magic       4s   b"FWPT"
+        versi       u8   1
+        flag        u8   bit0 = terpotong
+        jam         u16
+        jumlah      u32  N titik
+        dibuat      u32  epoch detik saat respons dibuat
+    lat         f32[N]
+    lng         f32[N]
+    timestamp   u32[N]   epoch detik
+    gejala      u16[N]   gejala_mask (bit i = string[i], i < 10)
+    wilayah     u16[N]   indeks ke tabel string
+    bobot       u8[N]    round(skor_influenza / 100 * 255)
+    keparahan   u8[N]
+    usia        u8[N]    indeks ke tabel string
+    baru        u8[N]    1 jika < 2 jam
+    (padding ke kelipatan 4)
+    string      u16 jumlah, lalu per string: u16 panjang + UTF-8
+
+Tabel string selalu diawali nama gejala (urutan bit) lalu kelompok usia,
+kemudian nama wilayah unik.
+"""
+import struct
+
+import numpy as np
+
+from models import GEJALA_FIELDS, RekapLaporanJam
+
+MIME_PETA_BINER = "application/vnd.fluwatch.peta"
+VERSI = 1
+WILAYAH_DEFAULT = "Area Tidak Diketahui"
+
+_HEADER = struct.Struct("<4sBBHII")
+
+
+def _pad4(buf: bytearray) -> None:
+    buf.extend(b"\0" * (-len(buf) % 4))
+
+
+def kode_peta_biner(rows, jam: int, dibuat, batas_baru, terpotong: bool = False) -> bytes:
+    """
+    Kodekan baris hasil query (lat, lng, skor_influenza, tingkat_keparahan,
+    kelompok_usia, nama_wilayah, gejala_mask, timestamp) ke format biner.
+    """
+    string = [*GEJALA_FIELDS, *RekapLaporanJam.KELOMPOK_USIA]
+    indeks_string = {s: i for i, s in enumerate(string)}
+
+    def idx(s: str) -> int:
+        if s not in indeks_string:
+            indeks_string[s] = len(string)
+            string.append(s)
+        return indeks_string[s]
+
+    n = len(rows)
+    buf = bytearray(_HEADER.pack(b"FWPT", VERSI, int(terpotong), jam, n, int(dibuat.timestamp())))
+    for nilai, dtype in (
+        ([float(r.lat) for r in rows],                     "<f4"),
+        ([float(r.lng) for r in rows],                     "<f4"),
+        ([int(r.timestamp.timestamp()) for r in rows],     "<u4"),
+        ([r.gejala_mask for r in rows],                    "<u2"),
+        ([idx(r.nama_wilayah or WILAYAH_DEFAULT) for r in rows], "<u2"),
+        ([round(r.skor_influenza / 100 * 255) for r in rows],    "u1"),
+        ([r.tingkat_keparahan for r in rows],              "u1"),
+        ([idx(r.kelompok_usia) for r in rows],             "u1"),
+        ([r.timestamp >= batas_baru for r in rows],        "u1"),
+    ):
+        buf += np.asarray(nilai, dtype=dtype).tobytes()
+    _pad4(buf)
+
+    buf += struct.pack("<H", len(string))
+    for s in string:
+        b = s.encode()
+        buf += struct.pack("<H", len(b)) + b
+    return bytes(buf)
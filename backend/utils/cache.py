@@ -0,0 +1,57 @@
+"""
+Cache in-memory per worker dengan TTL dan batas ukuran (LRU).
+Aman dipakai dari beberapa thread sekaligus.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_KOSONG = object()
+
+
+class CacheTTL:
+    def __init__(self, ttl_detik: float, maks: int = 1024):
+        self.ttl_detik = ttl_detik
+        self.maks      = maks
+        self._data: OrderedDict = OrderedDict()   # kunci -> (kedaluwarsa, nilai)
+        self._kunci = threading.Lock()
+
+    def ambil(self, kunci, default=None):
+        """Nilai untuk kunci, atau default jika tidak ada / kedaluwarsa."""
+        with self._kunci:
+            entri = self._data.get(kunci, _KOSONG)
+            if entri is _KOSONG:
+                return default
+            kedaluwarsa, nilai = entri
+            if kedaluwarsa <= time.monotonic():
+                del self._data[kunci]
+                return default
+            self._data.move_to_end(kunci)
+            return nilai
+
+    def simpan(self, kunci, nilai, ttl_detik: float | None = None) -> None:
+        ttl = self.ttl_detik if ttl_detik is None else ttl_detik
+        with self._kunci:
+            self._data[kunci] = (time.monotonic() + ttl, nilai)
+            self._data.move_to_end(kunci)
+            while len(self._data) > self.maks:
+                self._data.popitem(last=False)
+
+    def hapus(self, kunci) -> None:
+        with self._kunci:
+            self._data.pop(kunci, None)
+
+    def hapus_jika(self, syarat) -> int:
+        """Hapus semua entri yang kuncinya memenuhi syarat(kunci). Kembalikan jumlahnya."""
+        with self._kunci:
+            kena = [k for k in self._data if syarat(k)]
+            for k in kena:
+                del self._data[k]
+            return len(kena)
+
+    def kosongkan(self) -> None:
+        with self._kunci:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
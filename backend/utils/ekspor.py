@@ -0,0 +1,161 @@
+"""
+Ekspor laporan dalam bentuk aliran (streaming) — NDJSON, CSV, atau Parquet.
+
+Baris dibaca dengan server-side cursor (yield_per) per potongan UKURAN_POTONGAN
+dan langsung ditulis ke respons, sehingga memori worker tetap datar berapa pun
+jumlah barisnya. Parquet memerlukan paket opsional `pyarrow`; tiap potongan
+ditulis sebagai satu row group.
+"""
+import csv
+import io
+
+from flask import current_app
+from sqlalchemy import select
+
+from models import GEJALA_FIELDS, LaporanInfluenza, db
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:            # pragma: no cover — pyarrow opsional
+    pa = pq = None
+
+UKURAN_POTONGAN = 5000
+
+FORMAT_EKSPOR = {
+    "ndjson":  ("application/x-ndjson", "ndjson"),
+    "csv":     ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Kolom tabular (CSV/Parquet): gejala dipecah menjadi satu kolom per gejala
+KOLOM_TABEL = [
+    "id", "timestamp", "lat", "lng", "nama_wilayah",
+    *GEJALA_FIELDS,
+    "tingkat_keparahan", "durasi_hari", "sudah_vaksin",
+    "kelompok_usia", "skor_influenza", "user_id",
+]
+
+# Sel teks berawalan ini dibaca Excel/Sheets sebagai formula (CSV injection)
+AWALAN_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+
+def parquet_tersedia() -> bool:
+    return pq is not None
+
+
+def _potongan(kriteria):
+    """Iterasi list baris ringkas per potongan, memakai server-side cursor."""
+    L = LaporanInfluenza
+    hasil = db.session.execute(
+        select(*L.kolom_ringkas())
+        .where(*kriteria)
+        .order_by(L.timestamp.desc(), L.id.desc())
+        .execution_options(yield_per=UKURAN_POTONGAN)
+    )
+    try:
+        yield from hasil.partitions()
+    finally:
+        hasil.close()
+
+
+def _baris_tabel(r) -> list:
+    mask = r.gejala_mask
+    return [
+        str(r.id), r.timestamp.isoformat(), float(r.lat), float(r.lng), r.nama_wilayah,
+        *[bool(mask >> i & 1) for i in range(len(GEJALA_FIELDS))],
+        r.tingkat_keparahan, r.durasi_hari, r.sudah_vaksin,
+        r.kelompok_usia, r.skor_influenza, str(r.user_id) if r.user_id else None,
+    ]
+
+
+def _sel_csv(nilai):
+    """Teks bebas yang bisa dibaca sebagai formula diberi awalan ' (tetap teks)."""
+    if isinstance(nilai, str) and nilai.startswith(AWALAN_FORMULA):
+        return "'" + nilai
+    return nilai
+
+
+def aliran_ndjson(kriteria):
+    """Satu objek JSON per baris — bentuknya sama dengan LaporanInfluenza.to_dict()."""
+    dumps = current_app.json.dumps
+    for potongan in _potongan(kriteria):
+        yield "".join(
+            dumps(LaporanInfluenza.laporan_dari_baris(r), ensure_ascii=False) + "\n"
+            for r in potongan
+        ).encode()
+
+
+def aliran_csv(kriteria):
+    buf = io.StringIO()
+    tulis = csv.writer(buf)
+    tulis.writerow(KOLOM_TABEL)
+    for potongan in _potongan(kriteria):
+        tulis.writerows(map(_sel_csv, _baris_tabel(r)) for r in potongan)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+class _PenampungAliran(io.RawIOBase):
+    """File tujuan ParquetWriter yang isinya dikuras setelah tiap row group."""
+
+    def __init__(self):
+        self._potongan: list[bytes] = []
+        self._posisi = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._potongan.append(data)
+        self._posisi += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._posisi
+
+    def kuras(self) -> bytes:
+        isi, self._potongan = b"".join(self._potongan), []
+        return isi
+
+
+def _skema_parquet():
+    return pa.schema([
+        ("id", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("lat", pa.float64()),
+        ("lng", pa.float64()),
+        ("nama_wilayah", pa.string()),
+        *[(g, pa.bool_()) for g in GEJALA_FIELDS],
+        ("tingkat_keparahan", pa.int16()),
+        ("durasi_hari", pa.int16()),
+        ("sudah_vaksin", pa.bool_()),
+        ("kelompok_usia", pa.string()),
+        ("skor_influenza", pa.int16()),
+        ("user_id", pa.string()),
+    ])
+
+
+def aliran_parquet(kriteria):
+    skema = _skema_parquet()
+    keluaran = _PenampungAliran()
+    penulis = pq.ParquetWriter(keluaran, skema, compression="zstd")
+    try:
+        for potongan in _potongan(kriteria):
+            kolom = list(zip(*(_baris_tabel(r) for r in potongan)))
+            kolom[1] = [r.timestamp for r in potongan]
+            penulis.write_table(pa.Table.from_arrays(
+                [pa.array(nilai, type=f.type) for nilai, f in zip(kolom, skema)],
+                schema=skema,
+            ))
+            yield keluaran.kuras()
+    finally:
+        penulis.close()
+    yield keluaran.kuras()
+
+
+ALIRAN = {"ndjson": aliran_ndjson, "csv": aliran_csv, "parquet": aliran_parquet}
@@ -1,35 +1,84 @@
 """
 Perhitungan jarak Haversine dan filter laporan berdasarkan radius.
+Jarak dihitung batch dengan NumPy (jarak_banyak / saring_radius);
+hitung_jarak dan filter_radius adalah pembungkus di atasnya.
 """
 import math
 
+import numpy as np
+from sqlalchemy import Float, cast, func
+
 RADIUS_BUMI_KM = 6371.0
 
+# Grid sel spasial untuk kolom laporan_influenza.sel_grid: 0.1° × 0.1° (~11 km).
+# Dihitung dengan float (IEEE) di Python dan SQL agar hasilnya identik.
+SEL_PER_DERAJAT = 10
+_JUMLAH_BARIS_SEL = 180 * SEL_PER_DERAJAT
+_JUMLAH_KOLOM_SEL = 360 * SEL_PER_DERAJAT
+# Di atas ini daftar sel tidak lagi membantu (IN (...) raksasa) — pakai bounding box saja
+MAKS_SEL_PENUTUP = 2500
+
+
+def jarak_banyak(lat: float, lng: float, lats, lngs) -> np.ndarray:
+    """
+    Jarak Haversine (km) dari satu titik ke banyak koordinat sekaligus.
+    lats/lngs = array-like float; kembalikan np.ndarray dengan panjang sama.
+    """
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lngs = np.radians(np.asarray(lngs, dtype=np.float64))
+    lat0, lng0 = math.radians(lat), math.radians(lng)
+    a = (
+        np.sin((lats - lat0) / 2) ** 2
+        + math.cos(lat0) * np.cos(lats) * np.sin((lngs - lng0) / 2) ** 2
+    )
+    return RADIUS_BUMI_KM * 2 * np.arcsin(np.sqrt(a))
+
+
+def saring_radius(
+    lat: float, lng: float, lats, lngs, radius_km: float, urut: bool = True,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Filter radius batch dalam satu pass vektor. Kembalikan (indeks, jarak):
+    indeks posisi koordinat yang berada dalam radius_km beserta jaraknya,
+    diurutkan dari yang terdekat jika urut=True (stabil untuk jarak sama).
+    """
+    jarak  = jarak_banyak(lat, lng, lats, lngs)
+    indeks = np.flatnonzero(jarak <= radius_km)
+    if urut:
+        indeks = indeks[np.argsort(jarak[indeks], kind="stable")]
+    return indeks, jarak[indeks]
+
 
 def hitung_jarak(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Kembalikan jarak dalam kilometer antara dua koordinat GPS
     menggunakan rumus Haversine.
     """
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    d_lat = lat2 - lat1
-    d_lon = lon2 - lon1
-    a = math.sin(d_lat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(d_lon / 2) ** 2
-    return RADIUS_BUMI_KM * 2 * math.asin(math.sqrt(a))
+    return float(jarak_banyak(lat1, lon1, (lat2,), (lon2,))[0])
+
+
+def _ke_dict_orm(lap, jarak_km: float) -> dict:
+    return lap.to_dict(jarak_km=jarak_km)
 
 
-def filter_radius(laporan_list, lat_pusat: float, lng_pusat: float, radius_km: float = 10.0) -> list[dict]:
+def filter_radius(
+    laporan_list, lat_pusat: float, lng_pusat: float, radius_km: float = 10.0, ke_dict=None,
+) -> list[dict]:
     """
-    Filter list ORM LaporanInfluenza berdasarkan radius dari titik pusat.
+    Filter list laporan (objek ORM atau baris kolom_ringkas) berdasarkan
+    radius dari titik pusat. ke_dict(laporan, jarak_km) membentuk payload —
+    default to_dict(); untuk baris ringkas pakai LaporanInfluenza.laporan_dari_baris.
     Kembalikan list dict diurutkan dari yang terdekat.
     """
-    hasil = []
-    for lap in laporan_list:
-        jarak = hitung_jarak(lat_pusat, lng_pusat, float(lap.lat), float(lap.lng))
-        if jarak <= radius_km:
-            hasil.append(lap.to_dict(jarak_km=jarak))
-    hasil.sort(key=lambda x: x["jarak_km"])
-    return hasil
+    if ke_dict is None:
+        ke_dict = _ke_dict_orm
+    indeks, jarak = saring_radius(
+        lat_pusat, lng_pusat,
+        [float(lap.lat) for lap in laporan_list],
+        [float(lap.lng) for lap in laporan_list],
+        radius_km,
+    )
+    return [ke_dict(laporan_list[i], float(j)) for i, j in zip(indeks, jarak)]
 
 
 def kotak_batas(lat: float, lng: float, radius_km: float) -> dict:
@@ -45,3 +94,67 @@ def kotak_batas(lat: float, lng: float, radius_km: float) -> dict:
         "min_lat": lat - d_lat, "max_lat": lat + d_lat,
         "min_lng": lng - d_lng, "max_lng": lng + d_lng,
     }
+
+
+def jarak_sql(lat: float, lng: float, kolom_lat, kolom_lng):
+    """
+    Ekspresi SQL Haversine (km) dari titik (lat, lng) ke kolom koordinat.
+    Rumus sama dengan hitung_jarak(), untuk filter radius di sisi Postgres.
+    """
+    kolom_lat = cast(kolom_lat, Float)
+    kolom_lng = cast(kolom_lng, Float)
+    d_lat = func.radians(kolom_lat - lat)
+    d_lng = func.radians(kolom_lng - lng)
+    a = (
+        func.power(func.sin(d_lat / 2), 2)
+        + math.cos(math.radians(lat)) * func.cos(func.radians(kolom_lat))
+        * func.power(func.sin(d_lng / 2), 2)
+    )
+    return RADIUS_BUMI_KM * 2 * func.asin(func.sqrt(a))
+
+
+def _baris_sel(lat: float) -> int:
+    return min(max(math.floor((lat + 90) * SEL_PER_DERAJAT), 0), _JUMLAH_BARIS_SEL - 1)
+
+
+def _kolom_sel(lng: float) -> int:
+    return math.floor((lng + 180) * SEL_PER_DERAJAT) % _JUMLAH_KOLOM_SEL
+
+
+def sel_grid(lat: float, lng: float) -> int:
+    """ID sel grid (baris × jumlah_kolom + kolom) tempat koordinat berada."""
+    return _baris_sel(float(lat)) * _JUMLAH_KOLOM_SEL + _kolom_sel(float(lng))
+
+
+def sel_grid_banyak(lats, lngs) -> np.ndarray:
+    """sel_grid() untuk array koordinat sekaligus (NumPy)."""
+    baris = np.clip(np.floor((np.asarray(lats, dtype=float) + 90) * SEL_PER_DERAJAT),
+                    0, _JUMLAH_BARIS_SEL - 1)
+    kolom = np.floor((np.asarray(lngs, dtype=float) + 180) * SEL_PER_DERAJAT) % _JUMLAH_KOLOM_SEL
+    return (baris * _JUMLAH_KOLOM_SEL + kolom).astype(np.int64)
+
+
+def sel_penutup(lat: float, lng: float, radius_km: float) -> list[int] | None:
+    """
+    Daftar sel grid yang menutupi lingkaran radius_km di sekitar (lat, lng).
+    Dipakai sebagai filter `sel_grid IN (...)` sebelum Haversine exact.
+    None jika lebih dari MAKS_SEL_PENUTUP sel: pemanggil cukup memakai bounding box.
+    """
+    kotak = kotak_batas(lat, lng, radius_km)
+    baris_awal = _baris_sel(kotak["min_lat"])
+    baris_akhir = _baris_sel(kotak["max_lat"])
+
+    kolom_awal = _kolom_sel(kotak["min_lng"])
+    lebar = math.floor((kotak["max_lng"] + 180) * SEL_PER_DERAJAT) \
+        - math.floor((kotak["min_lng"] + 180) * SEL_PER_DERAJAT)
+    lebar = min(lebar, _JUMLAH_KOLOM_SEL - 1)
+    if (baris_akhir - baris_awal + 1) * (lebar + 1) > MAKS_SEL_PENUTUP:
+        return None
+    kolom = [(kolom_awal + i) % _JUMLAH_KOLOM_SEL for i in range(lebar + 1)]
+
+    return [
+        b * _JUMLAH_KOLOM_SEL + k
+        for b in range(baris_awal, baris_akhir + 1)
+        for k in kolom
+    ]
+
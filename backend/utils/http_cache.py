@@ -0,0 +1,100 @@
+"""
+HTTP caching untuk endpoint baca publik.
+
+Token versi data = MAX(laporan_influenza.created_at) + versi_data.jumlah_perubahan
+(dinaikkan saat laporan/pengguna dihapus), ditambah ember waktu JENDELA_DETIK
+karena jendela "N jam terakhir" ikut bergeser walau tidak ada laporan baru.
+
+- cache_publik()       : decorator route GET — ETag/Last-Modified, 304 sebelum
+                         handler dijalankan, Cache-Control public + s-w-r
+- catat_perubahan()    : naikkan versi (panggil sebelum commit penghapusan)
+- atur_cache_publik()  : pasang Cache-Control publik pada respons yang ada
+
+Request dengan header Authorization tidak di-cache (tetap no-store dari
+app.tambah_header_keamanan).
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from models import LaporanInfluenza, VersiData, db
+
+JENDELA_DETIK = 60
+
+
+def versi_data() -> tuple[datetime | None, int, datetime | None]:
+    """(created_at terbaru, jumlah_perubahan, waktu perubahan terakhir) — satu query."""
+    terbaru = select(func.max(LaporanInfluenza.created_at)).scalar_subquery()
+    jumlah  = select(VersiData.jumlah_perubahan).where(VersiData.id == 1).scalar_subquery()
+    diubah  = select(VersiData.diubah_pada).where(VersiData.id == 1).scalar_subquery()
+    baris = db.session.execute(select(terbaru, jumlah, diubah)).one()
+    return baris[0], baris[1] or 0, baris[2]
+
+
+def catat_perubahan() -> None:
+    """Naikkan versi data di transaksi pemanggil (tanpa commit)."""
+    tabel = VersiData.__table__
+    sekarang = datetime.now(timezone.utc)
+    stmt = insert(tabel).values(id=1, jumlah_perubahan=1, diubah_pada=sekarang)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[tabel.c.id],
+        set_={"jumlah_perubahan": tabel.c.jumlah_perubahan + 1, "diubah_pada": sekarang},
+    ))
+
+
+def atur_cache_publik(respons, max_age: int, swr: int):
+    respons.headers["Cache-Control"] = (
+        f"public, max-age={max_age}, stale-while-revalidate={swr}"
+    )
+    respons.vary.add("Accept")
+    respons.vary.add("Authorization")
+    return respons
+
+
+def cache_publik(max_age: int = 30, swr: int = 60):
+    """
+    Decorator untuk GET publik. If-None-Match / If-Modified-Since yang masih
+    cocok dijawab 304 tanpa menjalankan query handler.
+    """
+    def dekorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET" or "Authorization" in request.headers:
+                return fn(*args, **kwargs)
+
+            terbaru, jumlah, diubah = versi_data()
+            sekarang = datetime.now(timezone.utc)
+            ember = int(sekarang.timestamp()) // JENDELA_DETIK
+            awal_ember = datetime.fromtimestamp(ember * JENDELA_DETIK, timezone.utc)
+            terakhir = max(t for t in (terbaru, diubah, awal_ember) if t is not None)
+
+            token = "|".join([
+                request.full_path,
+                request.headers.get("Accept", ""),
+                terbaru.isoformat() if terbaru else "-",
+                str(jumlah),
+                str(ember),
+            ])
+            etag = hashlib.sha1(token.encode()).hexdigest()[:20]
+
+            if request.if_none_match:
+                tidak_berubah = request.if_none_match.contains_weak(etag)
+            else:
+                ims = request.if_modified_since
+                tidak_berubah = ims is not None and terakhir.replace(microsecond=0) <= ims
+
+            if tidak_berubah:
+                respons = make_response("", 304)
+            else:
+                respons = make_response(fn(*args, **kwargs))
+                if respons.status_code != 200:
+                    return respons
+            respons.set_etag(etag, weak=True)
+            respons.last_modified = terakhir
+            return atur_cache_publik(respons, max_age, swr)
+        return wrapper
+    return dekorator
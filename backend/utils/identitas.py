@@ -0,0 +1,75 @@
+"""
+Resolusi identitas untuk route ber-JWT: (is_active, role, profil) per user id.
+
+Cache per worker dengan TTL pendek (IDENTITAS_CACHE_DETIK), sehingga request
+terautentikasi tidak lagi membayar query primary key pengguna tiap kali.
+Admin yang mengubah/menghapus pengguna memanggil invalidasi_identitas();
+worker lain menyusul setelah TTL.
+
+Opsional (IDENTITAS_KLAIM_DETIK > 0): token membawa klaim "role" dan "aktif"
+(klaim_identitas() saat token dibuat). Selama umur token di bawah jendela
+itu klaim dipercaya tanpa cache/DB; setelahnya identitas divalidasi ulang
+seperti biasa. Perubahan role/status baru berlaku untuk token tersebut
+setelah jendela lewat — jaga jendela tetap pendek.
+"""
+import time
+import uuid
+from typing import NamedTuple
+
+from flask_jwt_extended import get_jwt, get_jwt_identity
+
+from config import config
+from models import Pengguna, db
+from utils.cache import CacheTTL
+
+cache_identitas = CacheTTL(config.IDENTITAS_CACHE_DETIK, maks=10000)
+
+
+class Identitas(NamedTuple):
+    id: uuid.UUID
+    aktif: bool
+    role: str
+    profil: dict | None     # Pengguna.to_dict(); None jika dari klaim JWT
+
+
+def _kunci(user_id) -> uuid.UUID:
+    return user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+
+
+def klaim_identitas(pengguna: Pengguna) -> dict:
+    """additional_claims untuk create_access_token()."""
+    if config.IDENTITAS_KLAIM_DETIK <= 0:
+        return {}
+    return {"role": pengguna.role, "aktif": pengguna.is_active}
+
+
+def identitas(user_id) -> Identitas | None:
+    """Dari cache, atau DB jika belum ada. None jika pengguna tidak ada."""
+    kunci = _kunci(user_id)
+    entri = cache_identitas.ambil(kunci)
+    if entri is not None:
+        return entri
+    pengguna = db.session.get(Pengguna, kunci)
+    if pengguna is None:
+        return None
+    entri = Identitas(kunci, pengguna.is_active, pengguna.role, pengguna.to_dict())
+    cache_identitas.simpan(kunci, entri)
+    return entri
+
+
+def identitas_saat_ini() -> Identitas | None:
+    """Identitas pemilik JWT request ini (panggil di dalam route @jwt_required)."""
+    user_id = get_jwt_identity()
+    klaim   = get_jwt()
+    if (
+        config.IDENTITAS_KLAIM_DETIK > 0
+        and "role" in klaim
+        and time.time() - klaim.get("iat", 0) < config.IDENTITAS_KLAIM_DETIK
+    ):
+        return Identitas(_kunci(user_id), klaim["aktif"], klaim["role"], None)
+    return identitas(user_id)
+
+
+def invalidasi_identitas(user_id) -> None:
+    if user_id is not None:
+        cache_identitas.hapus(_kunci(user_id))
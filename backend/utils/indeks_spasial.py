@@ -0,0 +1,195 @@
+"""
+Indeks spasial in-memory untuk laporan terbaru (satu salinan per worker).
+
+Grid seragam dengan sel yang sama seperti kolom laporan_influenza.sel_grid
+(0.1°), berisi baris ringkas laporan yang timestamp-nya masih dalam
+INDEKS_SPASIAL_JAM terakhir. Query radius dijawab dari memori dengan
+Haversine exact, tanpa round-trip ke Postgres.
+
+- muat()      : isi ulang penuh dari DB (saat start dan sinkron periodik)
+- segarkan()  : ambil laporan baru via high-water mark created_at + eviksi
+- cari()      : laporan dalam radius & jendela waktu, terdekat lebih dulu
+- hapus()     : buang satu laporan (admin menghapus di worker ini)
+
+Penghapusan di worker lain baru terlihat setelah sinkron penuh berikutnya
+(INDEKS_SPASIAL_SINKRON_DETIK).
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from config import config
+from models import LaporanInfluenza, db
+from utils.haversine import saring_radius, sel_penutup
+
+# Poll mengambil ulang sedikit di belakang high-water mark agar laporan dari
+# transaksi yang commit terlambat tetap masuk; duplikat disaring lewat id.
+TUMPANG_TINDIH = timedelta(seconds=30)
+INTERVAL_EVIKSI_DETIK = 60
+
+
+class IndeksSpasial:
+    def __init__(self, aktif: bool, jam: int, poll_detik: float, sinkron_detik: float):
+        self.aktif         = aktif
+        self.jendela       = timedelta(hours=jam)
+        self.poll_detik    = poll_detik
+        self.sinkron_detik = sinkron_detik
+
+        self._kunci      = threading.Lock()   # melindungi struktur data
+        self._kunci_muat = threading.Lock()   # satu thread saja yang menyegarkan
+        self._sel: dict[int, dict] = {}       # sel_grid -> {id: (lat, lng, baris)}
+        self._sel_per_id: dict = {}           # id -> sel_grid
+        self._terhapus: set = set()           # id dihapus sejak sinkron terakhir
+        self._hwm: datetime | None = None     # created_at terbesar yang sudah dimuat
+        self._siap = False
+        self._poll_terakhir = self._sinkron_terakhir = self._eviksi_terakhir = 0.0
+
+    @staticmethod
+    def _kolom() -> tuple:
+        L = LaporanInfluenza
+        return (*L.kolom_ringkas(), L.sel_grid, L.created_at)
+
+    @staticmethod
+    def _simpan(sel: dict, sel_per_id: dict, baris) -> None:
+        sel.setdefault(baris.sel_grid, {})[baris.id] = (float(baris.lat), float(baris.lng), baris)
+        sel_per_id[baris.id] = baris.sel_grid
+
+    def jumlah(self) -> int:
+        return len(self._sel_per_id)
+
+    # ── Sinkronisasi dengan database ─────────────────────────
+    def muat(self) -> None:
+        """Bangun ulang seluruh indeks dari laporan dalam jendela."""
+        mulai_muat = time.monotonic()
+        with self._kunci:
+            terhapus_awal = set(self._terhapus)
+        batas = datetime.now(timezone.utc) - self.jendela
+        rows  = db.session.execute(
+            select(*self._kolom()).where(LaporanInfluenza.timestamp >= batas)
+        ).all()
+
+        sel, sel_per_id = {}, {}
+        for baris in rows:
+            self._simpan(sel, sel_per_id, baris)
+        hwm = max((b.created_at for b in rows), default=batas)
+
+        with self._kunci:
+            # hapus() selama query berjalan: baris itu mungkin ada di snapshot
+            for laporan_id in self._terhapus - terhapus_awal:
+                sel_id = sel_per_id.pop(laporan_id, None)
+                if sel_id is not None:
+                    del sel[sel_id][laporan_id]
+                    if not sel[sel_id]:
+                        del sel[sel_id]
+            self._sel, self._sel_per_id = sel, sel_per_id
+            self._terhapus = set()
+            self._hwm  = hwm
+            self._siap = True
+        self._poll_terakhir = self._sinkron_terakhir = self._eviksi_terakhir = mulai_muat
+
+    def _poll(self) -> None:
+        """Tambahkan laporan dengan created_at setelah high-water mark."""
+        L = LaporanInfluenza
+        batas = datetime.now(timezone.utc) - self.jendela
+        rows  = db.session.execute(
+            select(*self._kolom()).where(
+                L.created_at > self._hwm - TUMPANG_TINDIH,
+                L.timestamp >= batas,
+            )
+        ).all()
+
+        with self._kunci:
+            for baris in rows:
+                if baris.id not in self._sel_per_id and baris.id not in self._terhapus:
+                    self._simpan(self._sel, self._sel_per_id, baris)
+                if baris.created_at > self._hwm:
+                    self._hwm = baris.created_at
+
+    def _eviksi(self) -> None:
+        """Buang laporan yang timestamp-nya sudah keluar dari jendela."""
+        batas = datetime.now(timezone.utc) - self.jendela
+        with self._kunci:
+            for sel_id in list(self._sel):
+                isi = self._sel[sel_id]
+                kedaluwarsa = [i for i, (_, _, b) in isi.items() if b.timestamp < batas]
+                for i in kedaluwarsa:
+                    del isi[i]
+                    del self._sel_per_id[i]
+                if not isi:
+                    del self._sel[sel_id]
+
+    def segarkan(self) -> None:
+        """
+        Sinkron penuh jika belum siap atau sudah lewat INDEKS_SPASIAL_SINKRON_DETIK;
+        selain itu poll laporan baru dan eviksi, masing-masing dibatasi intervalnya.
+        Jika thread lain sedang menyegarkan, pakai data yang ada.
+        """
+        if not self._kunci_muat.acquire(blocking=not self._siap):
+            return
+        try:
+            sekarang = time.monotonic()
+            if not self._siap or sekarang - self._sinkron_terakhir >= self.sinkron_detik:
+                self.muat()
+                return
+            if sekarang - self._poll_terakhir >= self.poll_detik:
+                self._poll()
+                self._poll_terakhir = sekarang
+            if sekarang - self._eviksi_terakhir >= INTERVAL_EVIKSI_DETIK:
+                self._eviksi()
+                self._eviksi_terakhir = sekarang
+        finally:
+            self._kunci_muat.release()
+
+    def hapus(self, laporan_id) -> None:
+        """Buang laporan dari indeks (mis. setelah dihapus admin)."""
+        if not self.aktif:
+            return
+        with self._kunci:
+            self._terhapus.add(laporan_id)
+            sel_id = self._sel_per_id.pop(laporan_id, None)
+            if sel_id is not None:
+                isi = self._sel.get(sel_id, {})
+                isi.pop(laporan_id, None)
+                if not isi:
+                    self._sel.pop(sel_id, None)
+
+    # ── Query ────────────────────────────────────────────────
+    def cari(self, lat: float, lng: float, radius_km: float, mulai: datetime) -> list[tuple] | None:
+        """
+        Laporan dengan timestamp >= mulai dalam radius_km dari (lat, lng),
+        sebagai list (jarak_km, baris) terurut dari yang terdekat (seri:
+        terbaru lebih dulu). Kembalikan None jika indeks tidak aktif atau
+        jendela yang diminta lebih panjang dari isi indeks — pemanggil
+        harus fallback ke query database.
+        """
+        if not self.aktif or mulai < datetime.now(timezone.utc) - self.jendela:
+            return None
+        self.segarkan()
+
+        sel = sel_penutup(lat, lng, radius_km)
+        with self._kunci:
+            isi_sel = self._sel.values() if sel is None else (self._sel.get(s, {}) for s in sel)
+            kandidat = [
+                entri
+                for isi in isi_sel
+                for entri in isi.values()
+                if entri[2].timestamp >= mulai
+            ]
+        if not kandidat:
+            return []
+
+        kandidat.sort(key=lambda e: e[2].timestamp, reverse=True)
+        indeks, jarak = saring_radius(
+            lat, lng, [e[0] for e in kandidat], [e[1] for e in kandidat], radius_km,
+        )
+        return [(float(j), kandidat[i][2]) for i, j in zip(indeks, jarak)]
+
+
+indeks_spasial = IndeksSpasial(
+    aktif=config.INDEKS_SPASIAL_AKTIF,
+    jam=config.INDEKS_SPASIAL_JAM,
+    poll_detik=config.INDEKS_SPASIAL_POLL_DETIK,
+    sinkron_detik=config.INDEKS_SPASIAL_SINKRON_DETIK,
+)
@@ -0,0 +1,227 @@
+"""
+Validasi dan penyimpanan laporan gejala — dipakai POST /api/laporan (satu
+laporan) dan POST /api/laporan/batch (ribuan laporan sekaligus).
+
+- validasi_laporan() : aturan validasi bersama, ValueError berisi pesan
+- simpan_batch()     : validasi + cek duplikat berbasis himpunan (satu query)
+                       + INSERT multi-baris, status per item
+- sisipkan_laporan() : INSERT multi-baris idempoten + rekap (dipakai juga
+                       oleh antrean write-behind, utils.antrean)
+"""
+import uuid
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from models import GEJALA_FIELDS, SKOR_PER_MASK, LaporanInfluenza, db, encode_gejala
+from utils.haversine import sel_grid
+from utils.rekap import perbarui_rekap
+
+USIA_VALID = {"anak", "remaja", "dewasa", "lansia"}
+JEDA_LAPORAN = timedelta(days=4)           # 1 laporan per 4 hari per pengguna
+TOLERANSI_JAM_KLIEN = timedelta(minutes=5)
+UKURAN_INSERT = 1000                       # baris per pernyataan INSERT multi-baris
+PANJANG_WILAYAH = LaporanInfluenza.nama_wilayah.type.length
+
+# Status per item batch
+DITERIMA, DUPLIKAT, DITOLAK = "diterima", "duplikat", "ditolak"
+
+
+def validasi_laporan(data) -> dict:
+    """
+    Validasi body satu laporan. Kembalikan nilai kolom LaporanInfluenza
+    (tanpa id/user/waktu). ValueError berisi pesan untuk pengguna.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Laporan harus berupa objek JSON")
+
+    # ── Koordinat ─────────────────────────────────────────
+    try:
+        lat = float(data["lat"])
+        lng = float(data["lng"])
+    except (KeyError, ValueError, TypeError):
+        raise ValueError("lat dan lng wajib diisi dan harus berupa angka") from None
+    if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
+        raise ValueError("Nilai lat/lng di luar jangkauan yang valid")
+
+    # ── Gejala — minimal 1 harus True ─────────────────────
+    gejala_data = {g: bool(data.get(g, False)) for g in GEJALA_FIELDS}
+    if not any(gejala_data.values()):
+        raise ValueError("Pilih minimal satu gejala")
+
+    # ── Keparahan ─────────────────────────────────────────
+    try:
+        keparahan = int(data.get("tingkat_keparahan", 5))
+        if not (1 <= keparahan <= 10):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValueError("Tingkat keparahan harus angka 1–10") from None
+
+    # ── Durasi (tidak valid → dikosongkan) ────────────────
+    durasi = data.get("durasi_hari")
+    if durasi is not None:
+        try:
+            durasi = int(durasi)
+            if not (1 <= durasi <= 30):
+                durasi = None
+        except (ValueError, TypeError):
+            durasi = None
+
+    # ── Kelompok usia (tidak valid → dewasa) ──────────────
+    usia = data.get("kelompok_usia", "dewasa")
+    if usia not in USIA_VALID:
+        usia = "dewasa"
+
+    wilayah = data.get("nama_wilayah")
+    if wilayah is not None and (not isinstance(wilayah, str) or len(wilayah) > PANJANG_WILAYAH):
+        raise ValueError(f"nama_wilayah harus teks maksimal {PANJANG_WILAYAH} karakter")
+
+    vaksin = data.get("sudah_vaksin")
+    mask   = encode_gejala(gejala_data)
+    return {
+        "lat":               lat,
+        "lng":               lng,
+        "nama_wilayah":      wilayah,
+        "tingkat_keparahan": keparahan,
+        "durasi_hari":       durasi,
+        "sudah_vaksin":      None if vaksin is None else bool(vaksin),
+        "kelompok_usia":     usia,
+        "skor_influenza":    SKOR_PER_MASK[mask],
+        "gejala_mask":       mask,
+        **gejala_data,
+    }
+
+
+def _waktu_laporan(nilai, sekarang: datetime, maks_umur: timedelta) -> datetime:
+    """Waktu laporan dari klien offline (ISO 8601); kosong = sekarang."""
+    if nilai is None:
+        return sekarang
+    try:
+        ts = datetime.fromisoformat(nilai)
+    except (TypeError, ValueError):
+        raise ValueError("timestamp harus berformat ISO 8601") from None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    if ts > sekarang + TOLERANSI_JAM_KLIEN:
+        raise ValueError("timestamp tidak boleh di masa depan")
+    if ts < sekarang - maks_umur:
+        raise ValueError(f"timestamp lebih lama dari {maks_umur.days} hari")
+    return ts
+
+
+def _id_laporan(nilai) -> uuid.UUID:
+    """id dari klien (UUID) agar pengiriman ulang idempoten; kosong = dibuat server."""
+    if nilai is None:
+        return uuid.uuid4()
+    try:
+        return uuid.UUID(str(nilai))
+    except ValueError:
+        raise ValueError("id harus berupa UUID") from None
+
+
+def _terlalu_dekat(waktu_terurut: list[datetime], ts: datetime) -> bool:
+    """True jika ada waktu dalam daftar terurut yang berjarak < JEDA_LAPORAN dari ts."""
+    i = bisect_left(waktu_terurut, ts - JEDA_LAPORAN)
+    return i < len(waktu_terurut) and waktu_terurut[i] < ts + JEDA_LAPORAN
+
+
+def simpan_batch(items: list, pengguna, ip_hash: str, maks_umur: timedelta,
+                 waktu_tertunda: list[datetime] | None = None):
+    """
+    Validasi dan simpan banyak laporan milik pengguna dalam satu transaksi
+    (tanpa commit). Kembalikan (hasil per item, baris yang disimpan).
+
+    Duplikat = id yang sudah ada di database atau muncul dua kali di batch.
+    Aturan 1 laporan per 4 hari berlaku seperti POST /api/laporan, dihitung
+    dari laporan tersimpan, waktu_tertunda (laporan pengguna yang masih di
+    antrean write-behind) + laporan lain di batch yang sama.
+    """
+    L = LaporanInfluenza
+    sekarang = datetime.now(timezone.utc)
+    hasil: list[dict] = []
+    calon: list[tuple[int, dict]] = []
+
+    for i, data in enumerate(items):
+        try:
+            nilai = validasi_laporan(data)
+            nilai["id"]        = _id_laporan(data.get("id"))
+            nilai["timestamp"] = _waktu_laporan(data.get("timestamp"), sekarang, maks_umur)
+        except ValueError as e:
+            hasil.append({"indeks": i, "status": DITOLAK, "pesan": str(e)})
+            continue
+        hasil.append({"indeks": i, "status": DITERIMA, "id": str(nilai["id"])})
+        calon.append((i, nilai))
+
+    def tandai(i: int, status: str, pesan: str) -> None:
+        hasil[i]["status"], hasil[i]["pesan"] = status, pesan
+
+    # ── Duplikat: satu query untuk seluruh id batch ───────
+    ada = set(db.session.scalars(select(L.id).where(L.id.in_([n["id"] for _, n in calon]))))
+    terlihat: set[uuid.UUID] = set()
+    unik = []
+    for i, nilai in calon:
+        if nilai["id"] in ada or nilai["id"] in terlihat:
+            tandai(i, DUPLIKAT, "Laporan sudah pernah diterima")
+            continue
+        terlihat.add(nilai["id"])
+        unik.append((i, nilai))
+
+    # ── Batas 4 hari: satu query untuk rentang waktu batch ─
+    if unik:
+        semua_ts = [n["timestamp"] for _, n in unik]
+        waktu = sorted([*db.session.scalars(select(L.timestamp).where(
+            L.user_id == pengguna.id,
+            L.timestamp > min(semua_ts) - JEDA_LAPORAN,
+            L.timestamp < max(semua_ts) + JEDA_LAPORAN,
+        )), *(waktu_tertunda or ())])
+        lolos = []
+        for i, nilai in sorted(unik, key=lambda x: x[1]["timestamp"]):
+            if _terlalu_dekat(waktu, nilai["timestamp"]):
+                tandai(i, DITOLAK, "Sudah ada laporan dalam 4 hari dari waktu laporan ini")
+                continue
+            waktu.insert(bisect_left(waktu, nilai["timestamp"]), nilai["timestamp"])
+            lolos.append((i, nilai))
+        unik = sorted(lolos, key=lambda x: x[0])
+
+    # ── INSERT multi-baris; konflik id (balapan antar request) = duplikat ──
+    for nilai in (n for _, n in unik):
+        nilai.update(ip_hash=ip_hash, user_id=pengguna.id)
+    masuk = {n["id"] for n in sisipkan_laporan([n for _, n in unik])}
+    disimpan = []
+    for i, nilai in unik:
+        if nilai["id"] in masuk:
+            disimpan.append(nilai)
+        else:
+            tandai(i, DUPLIKAT, "Laporan sudah pernah diterima")
+    return hasil, disimpan
+
+
+def sisipkan_laporan(baris: list[dict]) -> list[dict]:
+    """
+    INSERT banyak laporan (nilai validasi_laporan + id, timestamp, user_id,
+    ip_hash) dan perbarui rekap, tanpa commit. id yang sudah ada dilewati
+    (ON CONFLICT DO NOTHING) sehingga aman diulang. Kembalikan baris yang
+    benar-benar tersimpan.
+
+    executemany + RETURNING → SQLAlchemy "insertmanyvalues": satu pernyataan
+    INSERT … VALUES (…), (…) per UKURAN_INSERT baris, SQL dikompilasi sekali.
+    """
+    if not baris:
+        return []
+    sekarang = datetime.now(timezone.utc)
+    for nilai in baris:
+        nilai.update(sel_grid=sel_grid(nilai["lat"], nilai["lng"]), created_at=sekarang)
+
+    tabel = LaporanInfluenza.__table__
+    stmt = (
+        insert(tabel)
+        .on_conflict_do_nothing(index_elements=[tabel.c.id])
+        .returning(tabel.c.id)
+        .execution_options(insertmanyvalues_page_size=UKURAN_INSERT)
+    )
+    masuk = set(db.session.execute(stmt, baris).scalars())
+    disimpan = [n for n in baris if n["id"] in masuk]
+    perbarui_rekap([LaporanInfluenza(**n) for n in disimpan])
+    return disimpan
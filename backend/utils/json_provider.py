@@ -0,0 +1,84 @@
+"""
+JSON provider Flask yang bisa dipilih lewat config JSON_PROVIDER:
+
+- "orjson" : encoder orjson (jauh lebih cepat untuk payload besar)
+- "stdlib" : json bawaan Python
+- "auto"   : orjson jika paketnya terpasang, selain itu stdlib (default)
+
+Keduanya menangani tipe yang keluar dari model secara langsung:
+UUID → string, Decimal → float, datetime/date → ISO 8601 (sama dengan
+isoformat()). Kunci diurutkan seperti DefaultJSONProvider Flask.
+orjson sengaja tidak dimasukkan ke requirements.txt (wheel Rust) — pasang
+manual jika tersedia untuk platform target.
+"""
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:            # pragma: no cover — orjson opsional
+    orjson = None
+
+
+def _ubah_tipe(o):
+    """Konversi tipe non-JSON yang dipakai model FluWatch."""
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    raise TypeError(f"Objek bertipe {type(o).__name__} tidak bisa diubah ke JSON")
+
+
+class JSONProviderStdlib(DefaultJSONProvider):
+    """DefaultJSONProvider + UUID/Decimal/datetime (ISO 8601, bukan HTTP date)."""
+
+    @staticmethod
+    def default(o):
+        try:
+            return _ubah_tipe(o)
+        except TypeError:
+            return DefaultJSONProvider.default(o)
+
+
+class JSONProviderOrjson(JSONProvider):
+    """JSON provider berbasis orjson; UUID dan datetime ditangani native oleh orjson."""
+
+    sort_keys = True
+
+    def _opsi(self) -> int:
+        opsi = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opsi |= orjson.OPT_SORT_KEYS
+        return opsi
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_ubah_tipe, option=self._opsi()).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_ubah_tipe, option=self._opsi()),
+            mimetype="application/json",
+        )
+
+
+def pilih_json_provider(nama: str) -> type[JSONProvider]:
+    """Kelas provider untuk nilai config JSON_PROVIDER."""
+    nama = (nama or "auto").lower()
+    if nama == "stdlib":
+        return JSONProviderStdlib
+    if nama == "orjson":
+        if orjson is None:
+            raise RuntimeError("JSON_PROVIDER=orjson, tetapi paket orjson tidak terpasang")
+        return JSONProviderOrjson
+    if nama == "auto":
+        return JSONProviderOrjson if orjson is not None else JSONProviderStdlib
+    raise ValueError(f"JSON_PROVIDER tidak dikenal: {nama!r} (auto, orjson, stdlib)")
@@ -0,0 +1,94 @@
+"""
+Klaster peta sisi server: laporan dikelompokkan ke sel grid yang ukurannya
+mengikuti level zoom Leaflet, lalu diagregasi di Postgres (GROUP BY).
+Jumlah klaster dibatasi oleh ukuran viewport, bukan oleh jumlah laporan;
+tanpa bbox (atau bbox sangat lebar) dipotong di BATAS_KLASTER, terpadat dulu.
+"""
+from sqlalchemy import Float, cast, func, select
+
+from models import LaporanInfluenza, db
+
+ZOOM_MIN, ZOOM_MAX = 0, 20
+# Mulai zoom ini viewport cukup sempit untuk mengirim marker individual
+ZOOM_MARKER = 14
+BATAS_MARKER = 2000
+BATAS_KLASTER = 2000
+
+# Satu sel klaster ≈ 64 piksel layar (satu tile 256 px = 360° / 2^zoom)
+PIKSEL_PER_SEL = 64
+
+
+def ukuran_sel(zoom: int) -> float:
+    """Lebar sel klaster dalam derajat untuk level zoom tertentu."""
+    return 360.0 / (2 ** zoom) * PIKSEL_PER_SEL / 256
+
+
+def parse_bbox(teks: str | None) -> dict | None:
+    """
+    Parse query param bbox "barat,selatan,timur,utara" (format
+    L.LatLngBounds.toBBoxString()). None jika kosong; ValueError jika tidak valid.
+    """
+    if not teks:
+        return None
+    bagian = [float(x) for x in teks.split(",")]
+    if len(bagian) != 4:
+        raise ValueError("bbox harus berisi 4 angka")
+    barat, selatan, timur, utara = bagian
+    barat, timur   = max(barat, -180.0), min(timur, 180.0)
+    selatan, utara = max(selatan, -90.0), min(utara, 90.0)
+    if barat >= timur or selatan >= utara:
+        raise ValueError("bbox tidak valid")
+    return {"min_lat": selatan, "max_lat": utara, "min_lng": barat, "max_lng": timur}
+
+
+def kriteria_peta(mulai, kotak: dict | None) -> tuple:
+    """Filter jendela waktu + viewport (memakai idx_laporan_lokasi)."""
+    L = LaporanInfluenza
+    kriteria = (L.timestamp >= mulai,)
+    if kotak:
+        kriteria += (
+            L.lat >= kotak["min_lat"], L.lat <= kotak["max_lat"],
+            L.lng >= kotak["min_lng"], L.lng <= kotak["max_lng"],
+        )
+    return kriteria
+
+
+def klaster_laporan(mulai, kotak: dict | None, zoom: int, batas_baru,
+                    batas: int = BATAS_KLASTER) -> list[dict]:
+    """
+    Agregat per sel klaster: jumlah, rata-rata skor, keparahan maksimum,
+    centroid (rata-rata koordinat) dan jumlah laporan baru (< 2 jam).
+    Maksimal batas + 1 klaster terpadat (baris ekstra = penanda terpotong).
+    """
+    L = LaporanInfluenza
+    d = ukuran_sel(zoom)
+    lat_f, lng_f = cast(L.lat, Float), cast(L.lng, Float)
+    baris_sel = func.floor(lat_f / d).label("baris_sel")
+    kolom_sel = func.floor(lng_f / d).label("kolom_sel")
+
+    rows = db.session.execute(
+        select(
+            func.count().label("jumlah"),
+            func.avg(L.skor_influenza).label("skor_rata"),
+            func.max(L.tingkat_keparahan).label("keparahan_maks"),
+            func.avg(lat_f).label("lat"),
+            func.avg(lng_f).label("lng"),
+            func.count().filter(L.timestamp >= batas_baru).label("baru"),
+        )
+        .where(*kriteria_peta(mulai, kotak))
+        .group_by(baris_sel, kolom_sel)
+        .order_by(func.count().desc())
+        .limit(batas + 1)
+    ).all()
+
+    return [
+        {
+            "lat":            round(float(r.lat), 6),
+            "lng":            round(float(r.lng), 6),
+            "jumlah":         r.jumlah,
+            "skor_rata":      round(float(r.skor_rata), 1),
+            "keparahan_maks": r.keparahan_maks,
+            "baru":           r.baru,
+        }
+        for r in rows
+    ]
@@ -0,0 +1,190 @@
+"""
+Kompresi respons (gzip / br / zstd) berdasarkan header Accept-Encoding.
+
+- pasang_kompresi(app) : daftarkan hook after_request
+- kompresi(...)        : decorator route — atur tingkat kompresi atau matikan
+
+Hanya tipe konten teks/JSON (dan format biner peta) yang dikompresi, dan
+hanya jika ukurannya di atas ambang per tipe konten. Respons streaming
+(ekspor) dikompresi per potongan dengan flush sinkron sehingga klien tetap
+menerima data secara bertahap. ETag kuat diubah menjadi lemah karena isi
+byte berbeda per encoding; Vary: Accept-Encoding selalu dipasang.
+
+gzip memakai zlib bawaan. zstd memakai modul `compression.zstd` (Python
+3.14+) atau paket `zstandard`; br memakai paket `brotli`. Keduanya opsional
+— jika tidak tersedia, encoding tersebut tidak pernah dipilih.
+"""
+import zlib
+
+from flask import current_app, request
+
+from utils.biner import MIME_PETA_BINER
+
+try:
+    from compression import zstd as _zstd_std       # Python 3.14+
+except ImportError:            # pragma: no cover
+    _zstd_std = None
+try:
+    import zstandard as _zstd_pkg
+except ImportError:            # pragma: no cover — zstandard opsional
+    _zstd_pkg = None
+try:
+    import brotli
+except ImportError:            # pragma: no cover — brotli opsional
+    brotli = None
+
+# Level per encoding untuk tiap tingkat
+TINGKAT = {
+    "cepat":    {"zstd": 1,  "br": 1,  "gzip": 1},
+    "seimbang": {"zstd": 3,  "br": 4,  "gzip": 6},
+    "maks":     {"zstd": 12, "br": 9,  "gzip": 9},
+}
+TINGKAT_DEFAULT = "seimbang"
+TINGKAT_STREAMING = "cepat"
+
+# Pengali ambang minimum per tipe konten: float/int biner peta kurang bisa
+# dikompresi dibanding JSON/CSV, jadi baru sepadan pada ukuran lebih besar.
+JENIS_KONTEN = {
+    "application/json":     1,
+    "application/x-ndjson": 1,
+    "text/csv":             1,
+    "text/plain":           1,
+    "text/html":            1,
+    MIME_PETA_BINER:        4,
+}
+
+
+# ── Pemampat per encoding ───────────────────────────────────────────────────
+# Tiap pemampat: tekan(data) → bytes (sudah di-flush), selesai() → bytes sisa.
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def tekan(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def selesai(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def tekan(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def selesai(self) -> bytes:
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        if _zstd_std is not None:
+            self._obj = _zstd_std.ZstdCompressor(level=level)
+        else:
+            self._obj = _zstd_pkg.ZstdCompressor(level=level).compressobj()
+
+    def tekan(self, data: bytes) -> bytes:
+        if _zstd_std is not None:
+            return self._obj.compress(data, mode=_zstd_std.ZstdCompressor.FLUSH_BLOCK)
+        return self._obj.compress(data) + self._obj.flush(_zstd_pkg.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def selesai(self) -> bytes:
+        if _zstd_std is not None:
+            return self._obj.flush(mode=_zstd_std.ZstdCompressor.FLUSH_FRAME)
+        return self._obj.flush()
+
+
+# Urutan = preferensi server jika klien memberi q yang sama
+PEMAMPAT = {"gzip": _Gzip}
+if brotli is not None:
+    PEMAMPAT = {"br": _Brotli, **PEMAMPAT}
+if _zstd_std is not None or _zstd_pkg is not None:
+    PEMAMPAT = {"zstd": _Zstd, **PEMAMPAT}
+
+
+def pilih_encoding(accept_encodings) -> str | None:
+    """Encoding terbaik yang didukung kedua pihak (q tertinggi, lalu preferensi server)."""
+    terbaik, q_terbaik = None, 0
+    for enc in PEMAMPAT:
+        q = accept_encodings.quality(enc)
+        if q > q_terbaik:
+            terbaik, q_terbaik = enc, q
+    return terbaik
+
+
+def kompresi(tingkat: str | None = TINGKAT_DEFAULT):
+    """Decorator route: tingkat "cepat" | "seimbang" | "maks", atau None = tanpa kompresi."""
+    if tingkat is not None and tingkat not in TINGKAT:
+        raise ValueError(f"Tingkat kompresi tidak dikenal: {tingkat!r}")
+
+    def dekorator(fn):
+        fn.tingkat_kompresi = tingkat
+        return fn
+    return dekorator
+
+
+def _tekan_aliran(iterable, pemampat):
+    try:
+        for potongan in iterable:
+            if isinstance(potongan, str):
+                potongan = potongan.encode()
+            hasil = pemampat.tekan(potongan)
+            if hasil:
+                yield hasil
+        yield pemampat.selesai()
+    finally:
+        if hasattr(iterable, "close"):
+            iterable.close()
+
+
+def kompres_respons(response):
+    """Hook after_request — kompresi respons jika klien dan isinya memenuhi syarat."""
+    pengali = JENIS_KONTEN.get(response.mimetype)
+    if pengali is None or response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    response.vary.add("Accept-Encoding")
+
+    if (
+        request.method == "HEAD"
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or "no-transform" in response.headers.get("Cache-Control", "")
+    ):
+        return response
+
+    fungsi = current_app.view_functions.get(request.endpoint)
+    streaming = response.is_streamed
+    tingkat = getattr(fungsi, "tingkat_kompresi",
+                      TINGKAT_STREAMING if streaming else TINGKAT_DEFAULT)
+    if tingkat is None:
+        return response
+
+    encoding = pilih_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    pemampat = PEMAMPAT[encoding](TINGKAT[tingkat][encoding])
+
+    if streaming:
+        response.response = _tekan_aliran(response.response, pemampat)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config["KOMPRESI_MIN_BYTE"] * pengali:
+            return response
+        hasil = pemampat.tekan(data) + pemampat.selesai()
+        if len(hasil) >= len(data):
+            return response
+        response.set_data(hasil)
+
+    response.headers["Content-Encoding"] = encoding
+    etag, lemah = response.get_etag()
+    if etag and not lemah:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def pasang_kompresi(app) -> None:
+    app.after_request(kompres_respons)
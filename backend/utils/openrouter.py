@@ -139,8 +139,20 @@ def _dalam_jam(timestamp_iso: str, jam: int) -> bool:
         return False
 
 
-def _format_konteks(laporan: list[dict], lat: float, lng: float, radius_km: float, jam: int) -> str:
-    """Ubah data database menjadi blok teks terstruktur untuk LLM."""
+def _format_konteks(
+    laporan: list[dict],
+    lat: float,
+    lng: float,
+    radius_km: float,
+    jam: int,
+    freq_gejala: dict[str, int] | None = None,
+) -> str:
+    """
+    Ubah data database menjadi blok teks terstruktur untuk LLM.
+    freq_gejala: frekuensi gejala dalam radius dari ai.analisis, yaitu
+    LaporanInfluenza.frekuensi_dari_mask() atas gejala_mask baris hasil filter
+    radius (di Python); jika None, dihitung dari list laporan.
+    """
     if not laporan:
         return (
             f"HASIL DATABASE: Tidak ada laporan influenza dalam radius {radius_km} km "
@@ -152,11 +164,15 @@ def _format_konteks(laporan: list[dict], lat: float, lng: float, radius_km: floa
     kasus_24jam    = sum(1 for l in laporan if _dalam_jam(l["timestamp"], 24))
 
     # Frekuensi gejala
-    freq: dict[str, int] = {}
-    for lap in laporan:
-        for g in (lap.get("gejala") or []):
-            freq[g] = freq.get(g, 0) + 1
-    top_gejala = sorted(freq.items(), key=lambda x: x[1], reverse=True)[:5]
+    if freq_gejala is None:
+        freq_gejala = {}
+        for lap in laporan:
+            for g in (lap.get("gejala") or []):
+                freq_gejala[g] = freq_gejala.get(g, 0) + 1
+    top_gejala = sorted(
+        ((g, c) for g, c in freq_gejala.items() if c),
+        key=lambda x: x[1], reverse=True,
+    )[:5]
 
     rata_keparahan = sum(l.get("tingkat_keparahan", 5) for l in laporan) / total
     rata_skor      = sum(l.get("skor_influenza", 0) for l in laporan) / total
@@ -238,11 +254,12 @@ def tanya_ai_agent(
     radius_km: float = 10.0,
     jam: int = 48,
     riwayat_chat: list[dict] = [],
+    freq_gejala: dict[str, int] | None = None,
 ) -> str:
     messages = [{"role": "system", "content": SYSTEM_PROMPT}]
 
     if laporan_terdekat:
-        konteks = _format_konteks(laporan_terdekat, lat, lng, radius_km, jam)
+        konteks = _format_konteks(laporan_terdekat, lat, lng, radius_km, jam, freq_gejala)
         user_content = (
             f"{konteks}\n\n"
             f"PERTANYAAN PENGGUNA: {pertanyaan}\n\n"
@@ -0,0 +1,124 @@
+"""
+Paginasi keyset (kursor) dan total baris untuk daftar laporan/pengguna.
+
+Kursor = base64url dari [nilai_urut (ISO 8601), id] baris terakhir halaman.
+Halaman berikutnya difilter dengan (kolom_urut, id) < (nilai, id) sehingga
+biaya tiap halaman sama — tidak bergantung pada kedalaman halaman seperti
+OFFSET. Urutan selalu menurun (terbaru dulu).
+
+Total (hitung_total) jenis "otomatis": COUNT dibatasi TOTAL_PASTI_AMBANG + 1
+baris — di bawah ambang hasilnya pasti, di atasnya dipakai perkiraan planner
+(pg_class.reltuples tanpa filter, EXPLAIN dengan filter) sehingga biayanya
+tidak tumbuh dengan ukuran tabel. Total pasti di-cache per tanda tangan
+filter (SQL + parameter) selama TOTAL_CACHE_DETIK.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Table, func, select, text, tuple_
+
+from config import config
+from models import db
+from utils.cache import CacheTTL
+
+JENIS_TOTAL = ("otomatis", "pasti", "perkiraan", "lewati")
+
+cache_total = CacheTTL(config.TOTAL_CACHE_DETIK, maks=1000)
+
+
+def kode_kursor(nilai: datetime, id_) -> str:
+    mentah = json.dumps([nilai.isoformat(), str(id_)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(mentah.encode()).decode().rstrip("=")
+
+
+def baca_kursor(kursor: str) -> tuple[datetime, uuid.UUID]:
+    """Kebalikan kode_kursor(). ValueError jika kursor rusak."""
+    try:
+        mentah = base64.urlsafe_b64decode(kursor + "=" * (-len(kursor) % 4))
+        nilai, id_ = json.loads(mentah)
+        return datetime.fromisoformat(nilai), uuid.UUID(id_)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Kursor tidak valid") from e
+
+
+def halaman_kursor(q, kolom_urut, kolom_id, kursor: str | None, per_hal: int):
+    """
+    Ambil satu halaman dari query ORM q (filter sudah dipasang, tanpa order_by).
+    Kembalikan (baris, kursor_berikut) — kursor_berikut None di halaman terakhir.
+    """
+    if kursor:
+        nilai, id_ = baca_kursor(kursor)
+        q = q.filter(tuple_(kolom_urut, kolom_id) < tuple_(nilai, id_))
+    baris = q.order_by(kolom_urut.desc(), kolom_id.desc()).limit(per_hal + 1).all()
+
+    if len(baris) <= per_hal:
+        return baris, None
+    baris = baris[:per_hal]
+    akhir = baris[-1]
+    return baris, kode_kursor(getattr(akhir, kolom_urut.key), getattr(akhir, kolom_id.key))
+
+
+def _tabel_tanpa_filter(q) -> Table | None:
+    """Tabel sumber jika q membaca satu tabel tanpa WHERE, selain itu None."""
+    froms = q.statement.get_final_froms()
+    if q.whereclause is None and len(froms) == 1 and isinstance(froms[0], Table):
+        return froms[0]
+    return None
+
+
+def perkiraan_jumlah(q) -> int:
+    """Perkiraan jumlah baris dari statistik Postgres, tanpa memindai tabel."""
+    tabel = _tabel_tanpa_filter(q)
+    if tabel is not None:
+        reltuples = db.session.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = CAST(:t AS regclass)"),
+            {"t": tabel.name},
+        ).scalar()
+        if reltuples is not None and reltuples >= 0:     # -1 = belum pernah di-ANALYZE
+            return int(reltuples)
+
+    compiled = q.order_by(None).statement.compile(dialect=db.engine.dialect)
+    hasil = db.session.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    if isinstance(hasil, str):
+        hasil = json.loads(hasil)
+    return int(hasil[0]["Plan"]["Plan Rows"])
+
+
+def _kunci_total(q) -> tuple[str, str]:
+    compiled = q.order_by(None).statement.compile(dialect=db.engine.dialect)
+    return str(compiled), repr(sorted(compiled.params.items()))
+
+
+def hitung_total(q, jenis: str) -> tuple[int | None, str | None]:
+    """
+    Total baris dan jenisnya ("pasti" / "perkiraan"). jenis:
+    "otomatis" — pasti di bawah TOTAL_PASTI_AMBANG, di atasnya perkiraan;
+    "pasti" — selalu COUNT penuh; "perkiraan" — statistik planner;
+    "lewati" — (None, None). Total pasti dari cache dipakai jika ada.
+    """
+    if jenis == "lewati":
+        return None, None
+    if jenis == "perkiraan":
+        return perkiraan_jumlah(q), "perkiraan"
+
+    kunci = _kunci_total(q)
+    pasti = cache_total.ambil(kunci)
+    if pasti is not None:
+        return pasti, "pasti"
+
+    if jenis == "otomatis":
+        ambang = config.TOTAL_PASTI_AMBANG
+        terbatas = q.order_by(None).limit(ambang + 1).subquery()
+        pasti = db.session.execute(select(func.count()).select_from(terbatas)).scalar()
+        if pasti > ambang:
+            # Statistik bisa basi — perkiraan tidak boleh di bawah yang sudah terhitung
+            return max(perkiraan_jumlah(q), ambang + 1), "perkiraan"
+    else:
+        pasti = q.order_by(None).count()
+
+    cache_total.simpan(kunci, pasti)
+    return pasti, "pasti"
@@ -0,0 +1,98 @@
+"""
+Pencarian teks: filter admin (pengguna, wilayah) dan autocomplete wilayah.
+
+- pola_mengandung() : pola ILIKE '%teks%' dengan %, _ dan \ dari pengguna di-escape
+- saran_wilayah()   : saran nama wilayah berperingkat untuk awalan yang diketik
+
+ILIKE '%teks%' tidak bisa memakai index btree (wildcard di depan); migrasi.py
+membuat index GIN pg_trgm untuk pengguna.username, pengguna.email dan
+laporan_influenza.nama_wilayah. Trigram efektif mulai 3 karakter — pola lebih
+pendek tetap benar, hanya planner bisa memilih sequential scan.
+
+Autocomplete tidak menyentuh DB per ketikan: daftar nama wilayah beserta
+jumlah laporannya dimuat sekali per WILAYAH_CACHE_DETIK per worker, lalu
+dicocokkan di memori. Sumbernya dibatasi: hanya laporan WILAYAH_JENDELA_HARI
+terakhir (idx_laporan_timestamp) dan WILAYAH_MAKS nama terpopuler, sehingga
+biaya query dan memori tidak tumbuh dengan umur tabel. Saat daftar basi,
+satu thread memuat ulang sementara thread lain tetap memakai daftar lama.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from config import config
+from models import LaporanInfluenza, db
+
+ESCAPE_LIKE = "\\"
+
+_kunci_muat = threading.Lock()
+_wilayah: tuple[float, list] | None = None       # (kedaluwarsa monotonic, daftar)
+
+
+def pola_mengandung(teks: str) -> str:
+    """Pola ILIKE substring; pakai bersama escape=ESCAPE_LIKE."""
+    for c in (ESCAPE_LIKE, "%", "_"):
+        teks = teks.replace(c, ESCAPE_LIKE + c)
+    return f"%{teks}%"
+
+
+def _normal(teks: str) -> str:
+    return " ".join(teks.casefold().split())
+
+
+def _muat_wilayah() -> list[tuple[str, str, int]]:
+    L = LaporanInfluenza
+    mulai = datetime.now(timezone.utc) - timedelta(days=config.WILAYAH_JENDELA_HARI)
+    jumlah = func.count()
+    rows = db.session.execute(
+        select(L.nama_wilayah, jumlah)
+        .where(L.timestamp >= mulai, L.nama_wilayah.isnot(None))
+        .group_by(L.nama_wilayah)
+        .order_by(jumlah.desc())
+        .limit(config.WILAYAH_MAKS)
+    ).all()
+    return sorted(
+        ((_normal(nama), nama, n) for nama, n in rows if nama.strip()),
+        key=lambda x: (-x[2], x[0]),
+    )
+
+
+def daftar_wilayah() -> list[tuple[str, str, int]]:
+    """[(nama ternormalisasi, nama, jumlah laporan)], terpopuler dulu."""
+    global _wilayah
+    entri = _wilayah
+    if entri is not None:
+        kedaluwarsa, daftar = entri
+        # Basi: thread yang mendapat kunci memuat ulang, sisanya pakai daftar lama
+        if kedaluwarsa > time.monotonic() or not _kunci_muat.acquire(blocking=False):
+            return daftar
+    else:
+        _kunci_muat.acquire()       # dingin: tunggu satu pemuatan saja
+    try:
+        if _wilayah is None or _wilayah is entri:
+            _wilayah = (time.monotonic() + config.WILAYAH_CACHE_DETIK, _muat_wilayah())
+        return _wilayah[1]
+    finally:
+        _kunci_muat.release()
+
+
+def saran_wilayah(awalan: str, batas: int = 10) -> list[dict]:
+    """
+    Nama wilayah yang cocok dengan awalan (tanpa beda huruf besar/kecil).
+    Peringkat: awalan nama utuh ("Beka" → "Bekasi Utara"), lalu awalan salah
+    satu kata ("Utara" → "Bekasi Utara"); di tiap kelompok terpopuler dulu.
+    """
+    q = _normal(awalan)
+    if not q:
+        return []
+    depan, kata = [], []
+    for kunci, nama, jumlah in daftar_wilayah():
+        if kunci.startswith(q):
+            depan.append({"nama": nama, "jumlah": jumlah})
+            if len(depan) == batas:
+                break
+        elif len(kata) < batas and f" {q}" in f" {kunci}":
+            kata.append({"nama": nama, "jumlah": jumlah})
+    return (depan + kata)[:batas]
@@ -0,0 +1,259 @@
+"""
+Pemeliharaan dan pembacaan tabel rekap_laporan_jam.
+
+- perbarui_rekap()      : tambah/kurangi rekap di dalam transaksi pemanggil
+- bangun_ulang_rekap()  : hitung ulang rekap dari laporan_influenza (backfill)
+- ringkasan_jendela()   : agregat eksak untuk jendela waktu bebas — jam penuh
+                          dibaca dari rekap, potongan jam di tepi jendela
+                          dihitung langsung dari laporan_influenza.
+- deret_waktu()         : deret per jam/hari/minggu/bulan (UTC) dari rekap,
+                          satu query GROUP BY date_trunc, ember kosong = 0.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, func, or_, select, true
+from sqlalchemy.dialects.postgresql import insert
+
+from models import LaporanInfluenza, RekapLaporanJam, db
+
+SATU_JAM = timedelta(hours=1)
+METRIK   = RekapLaporanJam.METRIK
+
+# Satuan deret waktu → unit date_trunc Postgres
+SATUAN_WAKTU = {"jam": "hour", "hari": "day", "minggu": "week", "bulan": "month"}
+MAKS_TITIK_DERET = 2000
+
+# Syarat tambahan per metrik hitungan (None = semua baris dalam jendela)
+_SYARAT_HITUNG = {
+    "jumlah": None,
+    "ringan": LaporanInfluenza.tingkat_keparahan < 5,
+    "aktif":  LaporanInfluenza.tingkat_keparahan >= 5,
+    "berat":  LaporanInfluenza.tingkat_keparahan >= 7,
+    **{f"gejala_{g}": getattr(LaporanInfluenza, g) for g in LaporanInfluenza.GEJALA_FIELDS},
+    **{f"usia_{u}": LaporanInfluenza.kelompok_usia == u for u in RekapLaporanJam.KELOMPOK_USIA},
+}
+_KOLOM_JUMLAH = {
+    "total_skor":      LaporanInfluenza.skor_influenza,
+    "total_keparahan": LaporanInfluenza.tingkat_keparahan,
+}
+
+
+def awal_jam(ts: datetime) -> datetime:
+    """Bulatkan ke bawah ke awal jam (UTC)."""
+    return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _awal_jam_berikut(ts: datetime) -> datetime:
+    """Bulatkan ke atas ke awal jam (UTC)."""
+    jam = awal_jam(ts)
+    return jam if jam == ts else jam + SATU_JAM
+
+
+def _agregat_mentah(metrik: str, *kondisi):
+    """Ekspresi agregat di laporan_influenza yang setara dengan satu kolom rekap."""
+    if metrik in _KOLOM_JUMLAH:
+        ekspresi = func.sum(_KOLOM_JUMLAH[metrik])
+        if kondisi:
+            ekspresi = ekspresi.filter(*kondisi)
+        return func.coalesce(ekspresi, 0)
+    syarat = [k for k in (*kondisi, _SYARAT_HITUNG[metrik]) if k is not None]
+    return func.count().filter(*syarat) if syarat else func.count()
+
+
+def _delta_laporan(lap) -> dict:
+    """Kontribusi satu laporan ke tiap metrik rekap."""
+    keparahan = lap.tingkat_keparahan
+    mask      = lap.mask()
+    delta = {
+        "jumlah":          1,
+        "ringan":          int(keparahan < 5),
+        "aktif":           int(keparahan >= 5),
+        "berat":           int(keparahan >= 7),
+        "total_skor":      lap.skor_influenza or 0,
+        "total_keparahan": keparahan,
+    }
+    for i, g in enumerate(LaporanInfluenza.GEJALA_FIELDS):
+        delta[f"gejala_{g}"] = mask >> i & 1
+    for u in RekapLaporanJam.KELOMPOK_USIA:
+        delta[f"usia_{u}"] = int(lap.kelompok_usia == u)
+    return delta
+
+
+def perbarui_rekap(laporan_list, tanda: int = 1) -> None:
+    """
+    Tambahkan (tanda=1) atau kurangkan (tanda=-1) kontribusi laporan ke rekap.
+    Dieksekusi di session aktif tanpa commit — ikut transaksi pemanggil,
+    sehingga rekap dan laporan selalu tersimpan/dibatalkan bersama.
+    """
+    per_jam: dict[datetime, dict] = {}
+    for lap in laporan_list:
+        akum = per_jam.setdefault(awal_jam(lap.timestamp), dict.fromkeys(METRIK, 0))
+        for m, nilai in _delta_laporan(lap).items():
+            akum[m] += nilai * tanda
+    if not per_jam:
+        return
+
+    tabel = RekapLaporanJam.__table__
+    stmt  = insert(tabel).values([{"jam": jam, **nilai} for jam, nilai in per_jam.items()])
+    stmt  = stmt.on_conflict_do_update(
+        index_elements=[tabel.c.jam],
+        set_={m: tabel.c[m] + stmt.excluded[m] for m in METRIK},
+    )
+    db.session.execute(stmt)
+
+
+def bangun_ulang_rekap(sejak: datetime | None = None) -> int:
+    """
+    Hitung ulang rekap dari laporan_influenza. sejak=None membangun ulang
+    seluruh tabel; jika diisi, hanya jam >= awal_jam(sejak) yang diganti.
+    Tidak melakukan commit. Kembalikan jumlah baris rekap yang ditulis.
+    """
+    L = LaporanInfluenza
+    jam_utc = func.timezone("UTC", func.date_trunc("hour", func.timezone("UTC", L.timestamp)))
+
+    sumber = select(jam_utc.label("jam"), *[_agregat_mentah(m) for m in METRIK]).group_by("jam")
+    hapus  = delete(RekapLaporanJam)
+    if sejak is not None:
+        sejak  = awal_jam(sejak)
+        sumber = sumber.where(L.timestamp >= sejak)
+        hapus  = hapus.where(RekapLaporanJam.jam >= sejak)
+
+    db.session.execute(hapus)
+    hasil = db.session.execute(
+        insert(RekapLaporanJam).from_select(["jam", *METRIK], sumber)
+    )
+    return hasil.rowcount
+
+
+def ringkasan_jendela(
+    jendela: dict[str, tuple[datetime | None, datetime | None]],
+    metrik: list[str] = METRIK,
+    tambahan: dict | None = None,
+) -> dict[str, dict[str, int]]:
+    """
+    Agregat eksak untuk beberapa jendela waktu [mulai, sampai) sekaligus,
+    dalam satu round-trip. mulai=None berarti sejak awal, sampai=None berarti
+    sampai sekarang. Kembalikan {nama_jendela: {metrik: nilai}}.
+
+    tambahan = {nama: scalar subquery} ikut dihitung di query yang sama
+    (mis. hitungan tabel lain); hasilnya di hasil[nama] sebagai int.
+    """
+    R = RekapLaporanJam
+    ts = LaporanInfluenza.timestamp
+
+    kolom_rekap, kolom_mentah, semua_tepi = [], [], []
+    for nama, (mulai, sampai) in jendela.items():
+        h0 = _awal_jam_berikut(mulai) if mulai is not None else None
+        h1 = awal_jam(sampai) if sampai is not None else None
+
+        if h0 is not None and h1 is not None and h0 > h1:
+            # Jendela lebih pendek dari satu jam penuh — hitung langsung
+            tepi = [(mulai, sampai)]
+        else:
+            syarat = [k for k in (
+                R.jam >= h0 if h0 is not None else None,
+                R.jam <  h1 if h1 is not None else None,
+            ) if k is not None]
+            for m in metrik:
+                ekspresi = func.sum(getattr(R, m))
+                if syarat:
+                    ekspresi = ekspresi.filter(*syarat)
+                kolom_rekap.append(func.coalesce(ekspresi, 0).label(f"{nama}__{m}"))
+
+            tepi = []
+            if mulai is not None and mulai < h0:
+                tepi.append((mulai, h0))
+            if sampai is not None and h1 < sampai:
+                tepi.append((h1, sampai))
+
+        if tepi:
+            kondisi = or_(*[and_(ts >= a, ts < b) for a, b in tepi])
+            semua_tepi.append(kondisi)
+            for m in metrik:
+                kolom_mentah.append(_agregat_mentah(m, kondisi).label(f"{nama}__{m}"))
+
+    # Gabungkan kedua agregat (masing-masing satu baris) dalam satu query
+    bagian = []
+    if kolom_rekap:
+        bagian.append(select(*kolom_rekap).subquery())
+    if kolom_mentah:
+        bagian.append(select(*kolom_mentah).where(or_(*semua_tepi)).subquery())
+
+    hasil = {nama: dict.fromkeys(metrik, 0) for nama in jendela}
+    tambahan = tambahan or {}
+    if not bagian and not tambahan:
+        return hasil
+
+    # Baca posisional: label "<jendela>__<metrik>" bisa muncul di kedua subquery
+    kolom = [k for sub in bagian for k in sub.c]
+    stmt  = select(*kolom, *[e.label(n) for n, e in tambahan.items()])
+    if bagian:
+        sumber = bagian[0] if len(bagian) == 1 else bagian[0].join(bagian[1], true())
+        stmt   = stmt.select_from(sumber)
+    baris = db.session.execute(stmt).one()
+    for k, nilai in zip(kolom, baris):
+        nama, m = k.name.split("__", 1)
+        hasil[nama][m] += int(nilai or 0)
+    for nama, nilai in zip(tambahan, baris[len(kolom):]):
+        hasil[nama] = int(nilai or 0)
+    return hasil
+
+
+def awal_satuan(ts: datetime, satuan: str) -> datetime:
+    """Bulatkan ke bawah ke awal jam/hari/minggu (Senin)/bulan, UTC — sama dengan date_trunc."""
+    jam = awal_jam(ts)
+    if satuan == "jam":
+        return jam
+    hari = jam.replace(hour=0)
+    if satuan == "hari":
+        return hari
+    if satuan == "minggu":
+        return hari - timedelta(days=hari.weekday())
+    return hari.replace(day=1)
+
+
+def satuan_berikut(ts: datetime, satuan: str) -> datetime:
+    """Awal ember berikutnya dari awal ember ts."""
+    if satuan == "bulan":
+        return ts.replace(year=ts.year + ts.month // 12, month=ts.month % 12 + 1)
+    langkah = {"jam": SATU_JAM, "hari": timedelta(days=1), "minggu": timedelta(days=7)}
+    return ts + langkah[satuan]
+
+
+def deret_waktu(
+    mulai: datetime,
+    sampai: datetime,
+    satuan: str,
+    metrik: list[str] = ("jumlah",),
+) -> list[tuple[datetime, dict[str, int]]]:
+    """
+    Agregat per ember waktu dari mulai sampai sampai (diperluas ke batas
+    ember). Batas ember selalu di awal jam sehingga seluruh nilai dibaca dari
+    rekap — tetap eksak, termasuk jam berjalan. Kembalikan [(awal_ember,
+    {metrik: nilai})] terurut, ember tanpa laporan bernilai 0.
+    ValueError jika satuan tidak dikenal atau ember melebihi MAKS_TITIK_DERET.
+    """
+    if satuan not in SATUAN_WAKTU:
+        raise ValueError(f"satuan harus salah satu dari: {', '.join(SATUAN_WAKTU)}")
+    if sampai < mulai:
+        raise ValueError("mulai harus sebelum sampai")
+
+    ember = [awal_satuan(mulai, satuan)]
+    while satuan_berikut(ember[-1], satuan) < sampai:
+        ember.append(satuan_berikut(ember[-1], satuan))
+        if len(ember) > MAKS_TITIK_DERET:
+            raise ValueError(f"Rentang terlalu panjang (maksimal {MAKS_TITIK_DERET} titik)")
+    akhir = satuan_berikut(ember[-1], satuan)
+
+    R = RekapLaporanJam
+    kolom_ember = func.timezone(
+        "UTC", func.date_trunc(SATUAN_WAKTU[satuan], func.timezone("UTC", R.jam))
+    ).label("ember")
+    baris = db.session.execute(
+        select(kolom_ember, *[func.sum(getattr(R, m)).label(m) for m in metrik])
+        .where(R.jam >= ember[0], R.jam < akhir)
+        .group_by(kolom_ember)
+    ).all()
+
+    per_ember = {b.ember: {m: int(getattr(b, m) or 0) for m in metrik} for b in baris}
+    return [(e, per_ember.get(e, dict.fromkeys(metrik, 0))) for e in ember]
@@ -0,0 +1,234 @@
+"""
+Siaran aktivitas langsung (Server-Sent Events): laporan & pengguna baru.
+
+Trigger Postgres (migrasi.py) memanggil pg_notify('aktivitas', …) pada tiap
+INSERT ke laporan_influenza / pengguna, dengan id dari sequence aktivitas_seq.
+Tiap worker menjalankan SATU thread pendengar (koneksi psycopg2 khusus di
+luar pool, LISTEN aktivitas) yang meneruskan event ke semua pelanggan SSE
+di worker tersebut — dashboard yang diam tidak menjalankan query apa pun.
+
+- langganan()      : generator SSE untuk satu klien (None jika worker penuh)
+- respons_siaran() : Response text/event-stream untuk route
+- Backpressure     : tiap pelanggan punya antrean terbatas (SSE_ANTREAN). Klien
+                     yang terlalu lambat sampai antreannya penuh diputus; browser
+                     tersambung ulang dengan Last-Event-ID dan mengejar dari buffer.
+- Resume           : SSE_BUFFER event terakhir disimpan di ring buffer. Id berasal
+                     dari sequence global sehingga resume di worker lain pun benar
+                     selama id itu masih di buffernya; jika tidak, klien menerima
+                     event "reset" dan harus memuat ulang snapshot lewat REST.
+- Kapasitas        : tiap stream memakai satu thread gunicorn (gthread), jumlah
+                     pelanggan per worker dibatasi SSE_MAKS_KLIEN.
+"""
+import json
+import os
+import queue
+import select
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from flask import Response, jsonify, request
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from config import config
+from models import db
+
+KANAL = "aktivitas"
+RETRY_MS = 3000             # jeda sambung ulang EventSource
+_RESET = object()           # penanda di antrean pelanggan: kirim event "reset"
+
+
+def _sse(nama: str, data, event_id=None) -> str:
+    baris = [] if event_id is None else [f"id: {event_id}"]
+    baris.append(f"event: {nama}")
+    baris.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return "\n".join(baris) + "\n\n"
+
+
+class _Pelanggan:
+    __slots__ = ("antrean", "putus")
+
+    def __init__(self, ukuran: int):
+        self.antrean = queue.Queue(ukuran)
+        self.putus   = False        # True = tertinggal, stream diakhiri
+
+    def kirim(self, item) -> None:
+        try:
+            self.antrean.put_nowait(item)
+        except queue.Full:
+            self.putus = True
+
+
+class SiaranAktivitas:
+    def __init__(self, aktif: bool, maks_klien: int, ukuran_antrean: int,
+                 ukuran_buffer: int, heartbeat_detik: float):
+        self.aktif           = aktif
+        self.maks_klien      = maks_klien
+        self.ukuran_antrean  = ukuran_antrean
+        self.heartbeat_detik = heartbeat_detik
+
+        self._kunci     = threading.Lock()
+        self._pelanggan: set[_Pelanggan] = set()
+        self._buffer: deque = deque(maxlen=ukuran_buffer)   # event {"id", "tipe", "data"}
+        self._app = None
+        self._dsn = None
+        self._pid = None
+
+    # ── Pendengar LISTEN/NOTIFY ─────────────────────────────
+    def _kirim_semua(self, item) -> None:
+        with self._kunci:
+            pelanggan = list(self._pelanggan)
+        for p in pelanggan:
+            p.kirim(item)
+        # Pelanggan tertinggal langsung dilepas: slotnya tidak menunggu stream berakhir
+        putus = [p for p in pelanggan if p.putus]
+        if putus:
+            with self._kunci:
+                self._pelanggan.difference_update(putus)
+
+    def _terbit(self, event: dict) -> None:
+        with self._kunci:
+            self._buffer.append(event)
+        self._kirim_semua(event)
+
+    def _reset_semua(self) -> None:
+        """Koneksi pendengar sempat putus: event di antaranya hilang."""
+        with self._kunci:
+            self._buffer.clear()
+        self._kirim_semua(_RESET)
+
+    def _dengar(self) -> None:
+        jeda, pernah_terhubung = 1, False
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(self._dsn)
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {KANAL}")
+                if pernah_terhubung:
+                    self._reset_semua()
+                pernah_terhubung, jeda = True, 1
+
+                while True:
+                    if select.select([conn], [], [], self.heartbeat_detik) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._terbit(json.loads(conn.notifies.pop(0).payload))
+            except Exception:
+                self._app.logger.exception("Pendengar siaran aktivitas terputus")
+            finally:
+                if conn is not None:
+                    conn.close()
+            time.sleep(jeda)
+            jeda = min(jeda * 2, 30)
+
+    def _pastikan_thread(self) -> None:
+        """Mulai thread pendengar di proses ini (sekali per worker, aman setelah fork)."""
+        with self._kunci:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._dengar, name="siaran-aktivitas", daemon=True).start()
+
+    def init_app(self, app) -> None:
+        """Simpan DSN untuk koneksi LISTEN; thread dimulai saat pelanggan pertama datang."""
+        self._app = app
+        with app.app_context():
+            self._dsn = db.engine.url.set(drivername="postgresql").render_as_string(
+                hide_password=False
+            )
+
+    # ── Pelanggan ───────────────────────────────────────────
+    def _susulan(self, last_event_id: str | None) -> list[dict] | None:
+        """Event setelah last_event_id dari buffer; None jika sudah tidak ada (reset)."""
+        if not last_event_id:
+            return []
+        for i, event in enumerate(self._buffer):
+            if str(event["id"]) == last_event_id:
+                return list(self._buffer)[i + 1:]
+        return None
+
+    def jumlah_pelanggan(self) -> int:
+        return len(self._pelanggan)
+
+    def langganan(self, bentuk, last_event_id: str | None = None):
+        """
+        Generator teks SSE untuk satu klien. bentuk(event) -> (nama_event, data)
+        atau None untuk melewati event. None jika pelanggan worker sudah penuh.
+        """
+        if len(self._pelanggan) >= self.maks_klien:
+            return None
+        self._pastikan_thread()
+        return self._alirkan(bentuk, last_event_id)
+
+    def _alirkan(self, bentuk, last_event_id: str | None):
+        def teks(event) -> str | None:
+            # Diformat sekali per event per bentuk, dipakai bersama semua pelanggan
+            hasil = event.setdefault("_teks", {})
+            if bentuk not in hasil:
+                isi = bentuk(event)
+                hasil[bentuk] = None if isi is None else _sse(*isi, event_id=event["id"])
+            return hasil[bentuk]
+
+        yield f"retry: {RETRY_MS}\n\n"
+
+        # Didaftarkan baru saat body benar-benar dialirkan: respons yang tidak
+        # pernah diiterasi (HEAD, klien putus sebelum header) tidak memakan slot.
+        # Susulan & pendaftaran di bawah satu kunci agar tidak ada event terlewat.
+        p = _Pelanggan(self.ukuran_antrean)
+        with self._kunci:
+            if len(self._pelanggan) >= self.maks_klien:
+                return          # kalah balapan slot: EventSource mencoba lagi setelah retry
+            susulan = self._susulan(last_event_id)
+            terbaru = self._buffer[-1]["id"] if self._buffer else None
+            self._pelanggan.add(p)
+
+        reset = _sse("reset", {"pesan": "Muat ulang data"}, event_id=terbaru)
+        try:
+            if susulan is None:
+                yield reset
+            else:
+                for event in susulan:
+                    if (t := teks(event)) is not None:
+                        yield t
+
+            while not p.putus:
+                try:
+                    event = p.antrean.get(timeout=self.heartbeat_detik)
+                except queue.Empty:
+                    yield ": ping\n\n"     # jaga koneksi proxy & deteksi klien yang pergi
+                    continue
+                if event is _RESET:
+                    yield reset
+                elif (t := teks(event)) is not None:
+                    yield t
+        finally:
+            with self._kunci:
+                self._pelanggan.discard(p)
+
+
+siaran_aktivitas = SiaranAktivitas(
+    aktif=config.SSE_AKTIF,
+    maks_klien=config.SSE_MAKS_KLIEN,
+    ukuran_antrean=config.SSE_ANTREAN,
+    ukuran_buffer=config.SSE_BUFFER,
+    heartbeat_detik=config.SSE_HEARTBEAT_DETIK,
+)
+
+
+def respons_siaran(bentuk):
+    """Response SSE (tanpa stream_with_context: koneksi DB tidak ditahan selama stream)."""
+    if not siaran_aktivitas.aktif:
+        return jsonify({"pesan": "Siaran aktivitas tidak aktif"}), 503
+    aliran = siaran_aktivitas.langganan(bentuk, request.headers.get("Last-Event-ID"))
+    if aliran is None:
+        respons = jsonify({"pesan": "Terlalu banyak koneksi siaran. Coba lagi nanti."})
+        respons.headers["Retry-After"] = "30"
+        return respons, 503
+    return Response(aliran, mimetype="text/event-stream", headers={
+        "Cache-Control":     "no-cache",
+        "X-Accel-Buffering": "no",          # nginx: jangan tahan event di buffer
+    })
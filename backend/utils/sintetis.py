@@ -0,0 +1,220 @@
+"""
+Generator data sintetis bervolume besar untuk uji beban (setup_db.py --massal).
+
+Distribusi yang dimodelkan:
+- Spasial  : titik Gaussian di sekitar kluster (bobot populasi Zipf, sebaran
+             per kluster berbeda) + sebagian kecil titik latar acak
+- Waktu    : profil harian (pagi & malam WIB ramai, dini hari sepi) di atas
+             laju endemik rata, ditambah gelombang wabah — lonjakan Gaussian
+             di kluster tertentu dengan gejala yang lebih berat
+- Pengguna : populasi pengguna dengan aktivitas condong (sedikit pengguna
+             sangat aktif), sebagian laporan anonim (user_id NULL)
+
+Data dibangkitkan per potongan dengan NumPy (vektor, benih per potongan →
+hasil dapat diulang) dan dimuat lewat COPY oleh proses paralel. Aturan
+1 laporan per 4 hari sengaja tidak diterapkan pada data sintetis.
+"""
+import io
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import psycopg2
+
+from models import GEJALA_FIELDS, SKOR_PER_MASK, RekapLaporanJam, mask_gejala
+from utils.haversine import sel_grid_banyak
+
+KOLOM_LAPORAN = [
+    "id", "lat", "lng", "nama_wilayah", "sel_grid", *GEJALA_FIELDS, "gejala_mask",
+    "durasi_hari", "tingkat_keparahan", "sudah_vaksin", "kelompok_usia",
+    "skor_influenza", "user_id", "timestamp", "created_at",
+]
+KOLOM_PENGGUNA = ["id", "username", "email", "role", "is_active", "created_at"]
+
+NULL = "\\N"
+ZONA_WIB = 7
+# Bobot relatif laporan per jam lokal (WIB) 00..23
+PROFIL_HARIAN = np.array([
+    1.0, 0.6, 0.4, 0.3, 0.4, 0.8, 1.6, 2.6, 3.0, 2.7, 2.3, 2.1,
+    2.0, 1.9, 1.8, 1.9, 2.1, 2.4, 2.8, 3.0, 2.8, 2.3, 1.8, 1.3,
+])
+PROFIL_HARIAN = PROFIL_HARIAN / PROFIL_HARIAN.sum()
+
+# Kotak titik latar (Jawa–Bali) dan parameter campuran
+KOTAK_LATAR   = (-8.8, 105.0, -5.8, 115.5)    # selatan, barat, utara, timur
+PORSI_LATAR   = 0.03
+PORSI_WABAH   = 0.35
+PORSI_ANONIM  = 0.2
+PELUANG_GEJALA_TAMBAHAN = 0.04
+
+
+def rencana(kluster, template, jumlah_pengguna: int, hari: int, benih: int) -> dict:
+    """
+    Parameter bersama untuk semua potongan: kluster berbobot, gelombang
+    wabah, dan template gejala (dari KLUSTER/TEMPLATE setup_db.py).
+    """
+    rng = np.random.default_rng([benih, 1])
+    n_kluster = len(kluster)
+    bobot = 1 / np.arange(1, n_kluster + 1) ** 0.8
+    bobot = rng.permutation(bobot / bobot.sum())
+
+    n_wabah = max(3, hari // 30)
+    akhir = datetime.now(timezone.utc)
+    return {
+        "benih":    benih,
+        "akhir":    akhir.timestamp(),
+        "mulai":    (akhir - timedelta(days=hari)).timestamp(),
+        "hari":     hari,
+        "pengguna": jumlah_pengguna,
+        "kluster":  [(lat, lng) for lat, lng, _ in kluster],
+        "wilayah":  [nama for _, _, nama in kluster],
+        "bobot":    bobot.tolist(),
+        "sebaran":  rng.uniform(0.008, 0.035, n_kluster).tolist(),   # derajat
+        "wabah": [
+            {
+                "kluster": int(rng.choice(n_kluster, p=bobot)),
+                "puncak":  float(rng.uniform(0.1, 1.0) * hari),
+                "lebar":   float(rng.uniform(3, 10)),
+            }
+            for _ in range(n_wabah)
+        ],
+        "template": [
+            (mask_gejala(*gejala), keparahan, usia, vaksin)
+            for gejala, keparahan, usia, vaksin in template
+        ],
+    }
+
+
+def _uuid_acak(rng, n: int) -> list[str]:
+    """n UUID v4 (string) dari generator NumPy — dapat diulang dengan benih yang sama."""
+    b = np.frombuffer(rng.bytes(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    b[:, 6] = b[:, 6] & 0x0F | 0x40
+    b[:, 8] = b[:, 8] & 0x3F | 0x80
+    h = b.tobytes().hex()
+    return [
+        f"{h[i:i + 8]}-{h[i + 8:i + 12]}-{h[i + 12:i + 16]}-{h[i + 16:i + 20]}-{h[i + 20:i + 32]}"
+        for i in range(0, 32 * n, 32)
+    ]
+
+
+_ID_PENGGUNA: dict = {}     # (benih, jumlah) -> list id, per proses
+
+
+def id_pengguna(r: dict) -> list[str]:
+    """id pengguna sintetis — sama di semua proses karena diturunkan dari benih."""
+    kunci = (r["benih"], r["pengguna"])
+    if kunci not in _ID_PENGGUNA:
+        _ID_PENGGUNA[kunci] = _uuid_acak(np.random.default_rng([r["benih"], 2]), r["pengguna"])
+    return _ID_PENGGUNA[kunci]
+
+
+def _iso(epoch: np.ndarray) -> np.ndarray:
+    us = (epoch * 1e6).astype("int64").astype("datetime64[us]")
+    return np.char.add(np.datetime_as_string(us, unit="us"), "+00")
+
+
+def teks_pengguna(r: dict) -> str:
+    """Baris COPY (format text) untuk tabel pengguna sintetis."""
+    rng = np.random.default_rng([r["benih"], 3])
+    n = r["pengguna"]
+    dibuat = _iso(r["mulai"] - rng.uniform(0, 365 * 86400, n))
+    aktif  = np.where(rng.random(n) < 0.98, "t", "f")
+    return "".join(
+        f"{uid}\tsintetis_{r['benih']}_{i}\tsintetis_{r['benih']}_{i}@sintetis.invalid"
+        f"\tpengguna\t{aktif[i]}\t{dibuat[i]}\n"
+        for i, uid in enumerate(id_pengguna(r))
+    )
+
+
+def teks_laporan(r: dict, nomor: int, n: int) -> str:
+    """Bangkitkan satu potongan n laporan sebagai baris COPY (format text)."""
+    rng = np.random.default_rng([r["benih"], 100, nomor])
+    n_kluster = len(r["kluster"])
+    pusat   = np.asarray(r["kluster"])
+    sebaran = np.asarray(r["sebaran"])
+
+    # ── Waktu: endemik (profil harian) atau gelombang wabah ──
+    wabah = rng.random(n) < (PORSI_WABAH if r["wabah"] else 0)
+    kluster = rng.choice(n_kluster, size=n, p=r["bobot"])
+    hari = rng.uniform(0, r["hari"], n)
+    if wabah.any():
+        pilih  = rng.integers(len(r["wabah"]), size=int(wabah.sum()))
+        puncak = np.array([w["puncak"] for w in r["wabah"]])[pilih]
+        lebar  = np.array([w["lebar"] for w in r["wabah"]])[pilih]
+        kluster[wabah] = np.array([w["kluster"] for w in r["wabah"]])[pilih]
+        hari[wabah] = np.clip(rng.normal(puncak, lebar), 0, r["hari"] - 1e-6)
+
+    tengah_malam = (np.floor((r["mulai"] + ZONA_WIB * 3600) / 86400) * 86400) - ZONA_WIB * 3600
+    jam_lokal = rng.choice(24, size=n, p=PROFIL_HARIAN)
+    waktu = tengah_malam + np.floor(hari) * 86400 + (jam_lokal + rng.random(n)) * 3600
+    waktu = np.clip(waktu, r["mulai"], r["akhir"])
+    dibuat = np.minimum(waktu + rng.exponential(30, n), r["akhir"])
+
+    # ── Lokasi: Gaussian di sekitar kluster + titik latar ──
+    lat = pusat[kluster, 0] + rng.normal(0, sebaran[kluster])
+    lng = pusat[kluster, 1] + rng.normal(0, sebaran[kluster])
+    latar = rng.random(n) < PORSI_LATAR
+    selatan, barat, utara, timur = KOTAK_LATAR
+    lat[latar] = rng.uniform(selatan, utara, int(latar.sum()))
+    lng[latar] = rng.uniform(barat, timur, int(latar.sum()))
+    wilayah = np.array(r["wilayah"], dtype=object)[kluster]
+    wilayah[latar] = NULL
+
+    # ── Gejala & detail dari template; wabah condong ke template berat ──
+    tpl = r["template"]
+    mask_tpl  = np.array([t[0] for t in tpl])
+    parah_tpl = np.array([t[1] for t in tpl])
+    usia_tpl  = np.array([t[2] for t in tpl], dtype=object)
+    vaks_tpl  = np.array([t[3] for t in tpl])
+    berat = np.flatnonzero(parah_tpl >= 8)
+    t = rng.integers(len(tpl), size=n)
+    ke_berat = wabah & (rng.random(n) < 0.7)
+    t[ke_berat] = rng.choice(berat, size=int(ke_berat.sum()))
+
+    tambahan = (rng.random((n, len(GEJALA_FIELDS))) < PELUANG_GEJALA_TAMBAHAN) \
+        @ (1 << np.arange(len(GEJALA_FIELDS)))
+    mask = mask_tpl[t] | tambahan
+    skor = np.asarray(SKOR_PER_MASK)[mask]
+    keparahan = np.clip(parah_tpl[t] + rng.integers(-1, 2, n), 1, 10)
+    usia = usia_tpl[t]
+    acak_usia = rng.random(n) < 0.25
+    usia[acak_usia] = rng.choice(RekapLaporanJam.KELOMPOK_USIA, size=int(acak_usia.sum()))
+    vaksin = np.where(vaks_tpl[t] ^ (rng.random(n) < 0.15), "t", "f").astype(object)
+    vaksin[rng.random(n) < 0.1] = NULL
+    durasi = rng.integers(1, 11, n).astype(str).astype(object)
+    durasi[rng.random(n) < 0.1] = NULL
+
+    # ── Pengguna: aktivitas condong ke indeks kecil, sebagian anonim ──
+    if r["pengguna"]:
+        indeks = (r["pengguna"] * rng.random(n) ** 2).astype(int)
+        user = np.array(id_pengguna(r), dtype=object)[indeks]
+        user[rng.random(n) < PORSI_ANONIM] = NULL
+    else:
+        user = np.full(n, NULL, dtype=object)
+
+    kolom = [
+        _uuid_acak(rng, n),
+        lat.round(7).astype(str), lng.round(7).astype(str),
+        wilayah, sel_grid_banyak(lat, lng).astype(str),
+        *[np.where(mask >> i & 1, "t", "f") for i in range(len(GEJALA_FIELDS))],
+        mask.astype(str), durasi, keparahan.astype(str), vaksin, usia,
+        skor.astype(str), user, _iso(waktu), _iso(dibuat),
+    ]
+    buf = io.StringIO()
+    buf.writelines("\t".join(baris) + "\n" for baris in zip(*kolom))
+    return buf.getvalue()
+
+
+def muat_potongan(tugas) -> int:
+    """Dijalankan di proses anak: bangkitkan satu potongan lalu COPY ke Postgres."""
+    dsn, r, nomor, n = tugas
+    teks = teks_laporan(r, nomor, n)
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.copy_expert(
+                f"COPY laporan_influenza ({', '.join(KOLOM_LAPORAN)}) FROM STDIN",
+                io.StringIO(teks),
+            )
+    finally:
+        conn.close()
+    return n
@@ -0,0 +1,82 @@
+"""
+Cache status pengiriman laporan per pengguna: (akun aktif, waktu laporan
+terakhir) — untuk POST /api/laporan dan aturan 1 laporan per 4 hari.
+
+Cache per worker dengan TTL pendek (STATUS_KIRIM_CACHE_DETIK). Penolakan
+(akun nonaktif / masih dalam 4 hari) dijawab langsung dari cache, sehingga
+percobaan ulang yang ditolak tidak menyentuh database. Jika cache
+mengizinkan, status dimuat ulang dari DB sebelum laporan disimpan: worker
+lain mungkin baru saja menerima laporan pengguna yang sama.
+
+- status_kirim()       : dari cache, atau DB jika belum ada
+- status_kirim_segar() : selalu dari DB (+ antrean write-behind), lalu di-cache
+- catat_laporan()      : perbarui waktu terakhir setelah laporan diterima
+- invalidasi_status()  : buang entri (admin mengubah/menghapus pengguna/laporan)
+"""
+import uuid
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import func, select
+
+from config import config
+from models import LaporanInfluenza, Pengguna, db
+from utils.antrean import antrean_laporan
+from utils.cache import CacheTTL
+
+cache_status = CacheTTL(config.STATUS_KIRIM_CACHE_DETIK, maks=10000)
+
+
+class StatusKirim(NamedTuple):
+    aktif: bool
+    terakhir: datetime | None   # timestamp laporan terbaru pengguna
+    segar: bool                 # True jika baru dimuat dari DB di request ini
+
+
+def _kunci(user_id) -> uuid.UUID:
+    return user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+
+
+def status_kirim_segar(user_id) -> StatusKirim | None:
+    """Muat dari DB (satu query, index (user_id, timestamp)). None jika pengguna tidak ada."""
+    kunci = _kunci(user_id)
+    L = LaporanInfluenza
+    terakhir = select(func.max(L.timestamp)).where(L.user_id == kunci).scalar_subquery()
+    baris = db.session.execute(
+        select(Pengguna.is_active, terakhir).where(Pengguna.id == kunci)
+    ).first()
+    if baris is None:
+        cache_status.hapus(kunci)
+        return None
+
+    aktif, waktu = baris
+    if antrean_laporan.aktif:
+        tertunda = antrean_laporan.tertunda_pengguna(kunci)
+        if tertunda and (waktu is None or tertunda[0]["timestamp"] > waktu):
+            waktu = tertunda[0]["timestamp"]
+
+    cache_status.simpan(kunci, (aktif, waktu))
+    return StatusKirim(aktif, waktu, True)
+
+
+def status_kirim(user_id) -> StatusKirim | None:
+    entri = cache_status.ambil(_kunci(user_id))
+    if entri is None:
+        return status_kirim_segar(user_id)
+    return StatusKirim(*entri, False)
+
+
+def catat_laporan(user_id, timestamp: datetime) -> None:
+    """Laporan pengguna baru saja diterima di worker ini."""
+    kunci = _kunci(user_id)
+    entri = cache_status.ambil(kunci)
+    if entri is None:
+        return
+    aktif, terakhir = entri
+    if terakhir is None or timestamp > terakhir:
+        cache_status.simpan(kunci, (aktif, timestamp))
+
+
+def invalidasi_status(user_id) -> None:
+    if user_id is not None:
+        cache_status.hapus(_kunci(user_id))
@@ -0,0 +1,122 @@
+"""
+Tile heatmap slippy-map (skema XYZ / Web Mercator, sama dengan tile OSM).
+
+Satu tile berisi bobot heatmap laporan di dalamnya, diagregasi per piksel
+(grid EKSTENSI × EKSTENSI) di Postgres dan dikodekan sebagai array datar
+[px, py, skor, jumlah, ...]. Hasil disimpan di cache per tile; laporan baru
+hanya menghapus tile yang memuat koordinatnya (satu tile per level zoom).
+"""
+import math
+import zlib
+
+from sqlalchemy import Float, cast, func, select
+
+from config import config
+from models import LaporanInfluenza, db
+from utils.cache import CacheTTL
+from utils.klaster import ZOOM_MAX, ZOOM_MIN
+
+EKSTENSI = 256        # resolusi grid piksel per tile
+LAT_MAKS = 85.0511287798   # batas lintang Web Mercator
+
+# kunci (z, x, y, jam) -> dict {"isi", "etag"}
+cache_tile = CacheTTL(config.TILE_CACHE_DETIK, maks=config.TILE_CACHE_MAKS)
+
+
+def tile_valid(z: int, x: int, y: int) -> bool:
+    return ZOOM_MIN <= z <= ZOOM_MAX and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def _y_mercator(lat: float) -> float:
+    """Posisi y ternormalisasi 0..1 (0 = utara) untuk lintang tertentu."""
+    lat = math.radians(max(min(lat, LAT_MAKS), -LAT_MAKS))
+    return (1 - math.asinh(math.tan(lat)) / math.pi) / 2
+
+
+def tile_untuk(lat: float, lng: float, z: int) -> tuple[int, int]:
+    """Koordinat tile (x, y) yang memuat titik pada zoom z."""
+    n = 2 ** z
+    x = min(int((lng + 180) / 360 * n), n - 1)
+    y = min(int(_y_mercator(lat) * n), n - 1)
+    return x, y
+
+
+def batas_tile(z: int, x: int, y: int) -> dict:
+    """Bounding box (derajat) sebuah tile."""
+    n = 2 ** z
+
+    def lat_dari_y(yy):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * yy / n))))
+
+    return {
+        "min_lat": lat_dari_y(y + 1), "max_lat": lat_dari_y(y),
+        "min_lng": x / n * 360 - 180, "max_lng": (x + 1) / n * 360 - 180,
+    }
+
+
+def isi_tile(z: int, x: int, y: int, mulai) -> dict:
+    """
+    Query satu tile: bobot heatmap per piksel + ETag kuat yang diturunkan
+    dari laporan terbaru (created_at), jumlah laporan dan isi tile.
+    """
+    L = LaporanInfluenza
+    kotak = batas_tile(z, x, y)
+    n = 2 ** z
+    lat_f = cast(L.lat, Float)
+    lng_f = cast(L.lng, Float)
+
+    # Posisi piksel dalam tile — rumus sama dengan tile_untuk(), di sisi SQL
+    lat_r = func.radians(lat_f)
+    y_merc = (1 - func.ln(func.tan(lat_r) + 1 / func.cos(lat_r)) / math.pi) / 2
+    px = func.floor(((lng_f + 180) / 360 * n - x) * EKSTENSI).label("px")
+    py = func.floor((y_merc * n - y) * EKSTENSI).label("py")
+
+    rows = db.session.execute(
+        select(
+            px, py,
+            func.avg(L.skor_influenza).label("skor"),
+            func.count().label("jumlah"),
+            func.max(L.created_at).label("terbaru"),
+        )
+        .where(
+            L.timestamp >= mulai,
+            L.lat > kotak["min_lat"], L.lat <= kotak["max_lat"],
+            L.lng >= kotak["min_lng"], L.lng < kotak["max_lng"],
+        )
+        .group_by(px, py)
+        .order_by(py, px)
+    ).all()
+
+    titik, jumlah, terbaru = [], 0, None
+    for r in rows:
+        titik += [
+            min(max(int(r.px), 0), EKSTENSI - 1),
+            min(max(int(r.py), 0), EKSTENSI - 1),
+            round(float(r.skor)),
+            r.jumlah,
+        ]
+        jumlah += r.jumlah
+        if terbaru is None or r.terbaru > terbaru:
+            terbaru = r.terbaru
+
+    isi = {"tile": [z, x, y], "ekstensi": EKSTENSI, "jumlah": jumlah, "titik": titik}
+    ms_terbaru = int(terbaru.timestamp() * 1000) if terbaru else 0
+    crc = zlib.crc32(repr(titik).encode())
+    return {"isi": isi, "etag": f"{ms_terbaru:x}-{jumlah:x}-{crc:08x}"}
+
+
+def invalidasi_tile(lat: float, lng: float) -> int:
+    """Hapus dari cache semua tile (setiap zoom) yang memuat koordinat ini."""
+    return invalidasi_tile_banyak([(lat, lng)])
+
+
+def invalidasi_tile_banyak(koordinat) -> int:
+    """Seperti invalidasi_tile() untuk banyak (lat, lng) — satu kali sapu cache."""
+    terdampak = {
+        (z, *tile_untuk(lat, lng, z))
+        for lat, lng in koordinat
+        for z in range(ZOOM_MIN, ZOOM_MAX + 1)
+    }
+    if not terdampak:
+        return 0
+    return cache_tile.hapus_jika(lambda kunci: kunci[:3] in terdampak)
@@ -15,6 +15,7 @@ CREATE TABLE IF NOT EXISTS laporan_influenza (
     lat                 DECIMAL(10, 8)  NOT NULL,
     lng                 DECIMAL(11, 8)  NOT NULL,
     nama_wilayah        VARCHAR(255),               -- Nama kelurahan/kota (opsional)
+    sel_grid            INTEGER,                    -- Sel grid 0.1° (utils/haversine.py)
 
     -- Kuesioner Gejala Influenza (Ya/Tidak)
     demam               BOOLEAN NOT NULL DEFAULT FALSE,   -- Suhu > 38°C
@@ -28,6 +29,9 @@ CREATE TABLE IF NOT EXISTS laporan_influenza (
     mual_muntah         BOOLEAN NOT NULL DEFAULT FALSE,
     sesak_napas         BOOLEAN NOT NULL DEFAULT FALSE,
 
+    -- Bitmask 10 gejala di atas (bit 0 = demam ... bit 9 = sesak_napas)
+    gejala_mask         SMALLINT NOT NULL DEFAULT 0,
+
     -- Detail tambahan
     durasi_hari         SMALLINT CHECK (durasi_hari BETWEEN 1 AND 30),
     tingkat_keparahan   SMALLINT NOT NULL DEFAULT 5
@@ -47,7 +51,57 @@ CREATE TABLE IF NOT EXISTS laporan_influenza (
 -- ── Indeks untuk performa ──────────────────────────────────
 CREATE INDEX IF NOT EXISTS idx_laporan_timestamp  ON laporan_influenza (timestamp DESC);
 CREATE INDEX IF NOT EXISTS idx_laporan_lokasi     ON laporan_influenza (lat, lng);
+CREATE INDEX IF NOT EXISTS idx_laporan_sel_waktu  ON laporan_influenza (sel_grid, timestamp);
+CREATE INDEX IF NOT EXISTS idx_laporan_created_at ON laporan_influenza (created_at);
+CREATE INDEX IF NOT EXISTS idx_laporan_timestamp_id ON laporan_influenza (timestamp, id);
 CREATE INDEX IF NOT EXISTS idx_laporan_keparahan  ON laporan_influenza (tingkat_keparahan);
+CREATE INDEX IF NOT EXISTS idx_laporan_user_timestamp ON laporan_influenza (user_id, timestamp);
+
+-- Pencarian ILIKE '%teks%' pada nama_wilayah (filter admin) — index trigram
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_laporan_wilayah_trgm
+    ON laporan_influenza USING gin (nama_wilayah gin_trgm_ops);
+
+-- ============================================================
+-- TABEL REKAP: rekap_laporan_jam
+-- Agregat laporan per jam (UTC), dipelihara inkremental oleh backend
+-- (utils/rekap.py). Bangun ulang: python backend/rekap_db.py
+-- ============================================================
+CREATE TABLE IF NOT EXISTS rekap_laporan_jam (
+    jam                      TIMESTAMPTZ PRIMARY KEY,     -- awal jam, UTC
+    jumlah                   INTEGER NOT NULL DEFAULT 0,
+    ringan                   INTEGER NOT NULL DEFAULT 0,  -- keparahan < 5
+    aktif                    INTEGER NOT NULL DEFAULT 0,  -- keparahan >= 5
+    berat                    INTEGER NOT NULL DEFAULT 0,  -- keparahan >= 7
+    total_skor               INTEGER NOT NULL DEFAULT 0,
+    total_keparahan          INTEGER NOT NULL DEFAULT 0,
+    gejala_demam             INTEGER NOT NULL DEFAULT 0,
+    gejala_batuk             INTEGER NOT NULL DEFAULT 0,
+    gejala_sakit_tenggorokan INTEGER NOT NULL DEFAULT 0,
+    gejala_pilek             INTEGER NOT NULL DEFAULT 0,
+    gejala_nyeri_otot        INTEGER NOT NULL DEFAULT 0,
+    gejala_sakit_kepala      INTEGER NOT NULL DEFAULT 0,
+    gejala_kelelahan         INTEGER NOT NULL DEFAULT 0,
+    gejala_menggigil         INTEGER NOT NULL DEFAULT 0,
+    gejala_mual_muntah       INTEGER NOT NULL DEFAULT 0,
+    gejala_sesak_napas       INTEGER NOT NULL DEFAULT 0,
+    usia_anak                INTEGER NOT NULL DEFAULT 0,
+    usia_remaja              INTEGER NOT NULL DEFAULT 0,
+    usia_dewasa              INTEGER NOT NULL DEFAULT 0,
+    usia_lansia              INTEGER NOT NULL DEFAULT 0
+);
+
+-- ============================================================
+-- TABEL: versi_data
+-- Versi data laporan untuk ETag/Last-Modified endpoint publik
+-- (backend/utils/http_cache.py). Satu baris, id = 1.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS versi_data (
+    id                SMALLINT PRIMARY KEY DEFAULT 1,
+    jumlah_perubahan  BIGINT NOT NULL DEFAULT 0,   -- naik saat laporan/pengguna dihapus
+    diubah_pada       TIMESTAMPTZ
+);
+INSERT INTO versi_data (id, jumlah_perubahan) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
 
 -- ============================================================
 -- VIEW: laporan_48jam
@@ -69,19 +123,20 @@ ORDER BY timestamp DESC;
 
 -- ============================================================
 -- VIEW: statistik_harian
--- Ringkasan harian untuk dashboard
+-- Ringkasan harian untuk dashboard (dibaca dari rekap_laporan_jam)
 -- ============================================================
 CREATE OR REPLACE VIEW statistik_harian AS
 SELECT
-    DATE_TRUNC('day', timestamp)                    AS tanggal,
-    COUNT(*)                                        AS total_kasus,
-    ROUND(AVG(tingkat_keparahan), 1)                AS rata_keparahan,
-    COUNT(*) FILTER (WHERE demam = TRUE)            AS kasus_demam,
-    COUNT(*) FILTER (WHERE batuk = TRUE)            AS kasus_batuk,
-    COUNT(*) FILTER (WHERE nyeri_otot = TRUE)       AS kasus_nyeri_otot,
-    COUNT(*) FILTER (WHERE tingkat_keparahan >= 7)  AS kasus_berat
-FROM laporan_influenza
-GROUP BY DATE_TRUNC('day', timestamp)
+    DATE_TRUNC('day', jam)                                  AS tanggal,
+    SUM(jumlah)                                             AS total_kasus,
+    ROUND(CAST(SUM(total_keparahan) AS NUMERIC)
+          / NULLIF(SUM(jumlah), 0), 1)                      AS rata_keparahan,
+    SUM(gejala_demam)                                       AS kasus_demam,
+    SUM(gejala_batuk)                                       AS kasus_batuk,
+    SUM(gejala_nyeri_otot)                                  AS kasus_nyeri_otot,
+    SUM(berat)                                              AS kasus_berat
+FROM rekap_laporan_jam
+GROUP BY DATE_TRUNC('day', jam)
 ORDER BY tanggal DESC;
 
 -- ============================================================
@@ -130,6 +185,38 @@ LANGUAGE sql STABLE AS $$
     ORDER BY jarak_km ASC;
 $$;
 
+-- ============================================================
+-- TRIGGER: siaran aktivitas langsung (SSE, backend/utils/siaran.py)
+-- NOTIFY 'aktivitas' per laporan baru; id dari sequence bersama
+-- (trigger pengguna dibuat oleh backend/migrasi.py)
+-- ============================================================
+CREATE SEQUENCE IF NOT EXISTS aktivitas_seq;
+
+CREATE OR REPLACE FUNCTION notify_laporan_baru() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('aktivitas', json_build_object(
+        'id',   nextval('aktivitas_seq'),
+        'tipe', 'laporan',
+        'data', json_build_object(
+            'lat',               NEW.lat,
+            'lng',               NEW.lng,
+            'nama_wilayah',      NEW.nama_wilayah,
+            'skor_influenza',    NEW.skor_influenza,
+            'tingkat_keparahan', NEW.tingkat_keparahan,
+            'gejala_mask',       NEW.gejala_mask,
+            'kelompok_usia',     NEW.kelompok_usia,
+            'timestamp',         NEW.timestamp
+        )
+    )::text);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_laporan_notify ON laporan_influenza;
+CREATE TRIGGER trg_laporan_notify AFTER INSERT ON laporan_influenza
+    FOR EACH ROW EXECUTE FUNCTION notify_laporan_baru();
+
 -- ============================================================
 -- DATA CONTOH (untuk pengembangan)
 -- Sekitar Jakarta Selatan
@@ -147,3 +234,49 @@ VALUES
     (-6.2420, 106.8150, 'Mampang Prapatan', FALSE, FALSE, TRUE,  FALSE, FALSE, TRUE,  FALSE, 3, 2, TRUE,  'anak',   30),
     (-6.2650, 106.8250, 'Jagakarsa',        TRUE,  TRUE,  TRUE,  TRUE,  TRUE,  TRUE,  FALSE, 7, 3, FALSE, 'dewasa', 78),
     (-6.2350, 106.7900, 'Pesanggrahan',     TRUE,  FALSE, FALSE, TRUE,  FALSE, TRUE,  TRUE,  6, 2, FALSE, 'lansia', 62);
+
+-- Bitmask gejala dan sel grid untuk data contoh di atas
+UPDATE laporan_influenza
+SET sel_grid    = CAST(LEAST(GREATEST(FLOOR((CAST(lat AS DOUBLE PRECISION) + 90) * 10), 0), 1799) * 3600
+                  + MOD(CAST(FLOOR((CAST(lng AS DOUBLE PRECISION) + 180) * 10) AS INTEGER), 3600) AS INTEGER),
+    -- Penjumlahan, bukan | dan <<: keduanya setingkat di Postgres (kiri ke kanan)
+    gejala_mask = (CAST(demam AS INT)
+                  + CAST(batuk AS INT)             * 2
+                  + CAST(sakit_tenggorokan AS INT) * 4
+                  + CAST(pilek AS INT)             * 8
+                  + CAST(nyeri_otot AS INT)        * 16
+                  + CAST(sakit_kepala AS INT)      * 32
+                  + CAST(kelelahan AS INT)         * 64
+                  + CAST(menggigil AS INT)         * 128
+                  + CAST(mual_muntah AS INT)       * 256
+                  + CAST(sesak_napas AS INT)       * 512);
+
+ALTER TABLE laporan_influenza ALTER COLUMN sel_grid SET NOT NULL;
+
+-- Rekap per jam untuk data contoh di atas
+INSERT INTO rekap_laporan_jam
+SELECT
+    DATE_TRUNC('hour', timestamp AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS jam,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE tingkat_keparahan < 5),
+    COUNT(*) FILTER (WHERE tingkat_keparahan >= 5),
+    COUNT(*) FILTER (WHERE tingkat_keparahan >= 7),
+    COALESCE(SUM(skor_influenza), 0),
+    SUM(tingkat_keparahan),
+    COUNT(*) FILTER (WHERE demam),
+    COUNT(*) FILTER (WHERE batuk),
+    COUNT(*) FILTER (WHERE sakit_tenggorokan),
+    COUNT(*) FILTER (WHERE pilek),
+    COUNT(*) FILTER (WHERE nyeri_otot),
+    COUNT(*) FILTER (WHERE sakit_kepala),
+    COUNT(*) FILTER (WHERE kelelahan),
+    COUNT(*) FILTER (WHERE menggigil),
+    COUNT(*) FILTER (WHERE mual_muntah),
+    COUNT(*) FILTER (WHERE sesak_napas),
+    COUNT(*) FILTER (WHERE kelompok_usia = 'anak'),
+    COUNT(*) FILTER (WHERE kelompok_usia = 'remaja'),
+    COUNT(*) FILTER (WHERE kelompok_usia = 'dewasa'),
+    COUNT(*) FILTER (WHERE kelompok_usia = 'lansia')
+FROM laporan_influenza
+GROUP BY 1
+ON CONFLICT (jam) DO NOTHING;